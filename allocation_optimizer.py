@@ -0,0 +1,371 @@
+import time
+from itertools import combinations
+
+import numpy as np
+
+from asset_stats import asset_return_vectors, asset_covariance
+from multi_asset_engine import simulate_asset_returns
+from tax_adjustment import net_cost_factors, apply_net_costs
+from instrumentation import stage, increment
+
+# Relative weight of a goal's success probability in the objective, by goal priority
+PRIORITY_WEIGHTS = {"high": 3.0, "medium": 2.0, "low": 1.0}
+SEARCH_METHODS = ("random", "grid")
+# Size of one candidate block's running values, small enough to stay in the CPU cache across years
+DEFAULT_BLOCK_BYTES = 1024 * 1024
+
+
+def risk_volatility_limit(risk_score, covariance):
+    """
+    Maps a risk score to the highest portfolio volatility a client may hold.
+
+    The limit interpolates linearly between the least and the most volatile single asset, so a
+    score of 0 only admits portfolios about as calm as the calmest asset and a score of 1 admits
+    everything up to an all-in position in the riskiest one.
+
+    Parameters:
+    - risk_score (float): Risk score from risk_profile (0 to 1).
+    - covariance (ndarray): Annualized covariance matrix of the assets.
+
+    Returns:
+    - max_volatility (float): Annualized volatility limit.
+    """
+    volatilities = np.sqrt(np.diag(covariance))
+    risk_score = min(max(float(risk_score), 0.0), 1.0)
+    return float(volatilities.min() + risk_score * (volatilities.max() - volatilities.min()))
+
+
+class SharedDraws:
+    """
+    One set of correlated per-asset return paths that every candidate allocation is scored on.
+
+    Scoring all candidates on the same draws (common random numbers) makes the objective a
+    deterministic function of the allocation, so differences between candidates reflect the
+    allocations and not simulation noise, and a gradient-free search can compare them reliably.
+    The draws come from the same stream simulate_allocation_horizon_values uses for a single chunk,
+    so a seeded optimum can be re-evaluated there with chunk_size=num_simulations (equal up to
+    floating point rounding).
+    """
+
+    def __init__(self, initial_investment, goals, financial_data, assets, tax_rates, fees, inflation_rate,
+                 num_simulations=2000, seed=None, dtype=np.float64, block_bytes=DEFAULT_BLOCK_BYTES):
+        self.assets = list(assets)
+        self.goal_names = list(goals)
+        self.initial_investment = initial_investment
+        self.dtype = np.dtype(dtype)
+        self.block_bytes = block_bytes
+        self.mean_returns, _ = asset_return_vectors(financial_data, self.assets)
+        self.covariance = asset_covariance(financial_data, self.assets)
+
+        # Goals grouped by horizon: every candidate's growth is read off once per distinct horizon
+        self.horizons = sorted({goal["timeline_years"] for goal in goals.values()})
+        self.goal_columns = np.array([self.horizons.index(goal["timeline_years"]) for goal in goals.values()])
+        self.goal_amounts = np.array([goal["goal_amount"] for goal in goals.values()], dtype=np.float64)
+        priority_weights = np.array([PRIORITY_WEIGHTS.get(goal.get("priority", "medium"), 1.0)
+                                     for goal in goals.values()])
+        self.priority_weights = priority_weights / priority_weights.sum()
+        self.cost_factors = net_cost_factors(tax_rates, fees, inflation_rate, self.horizons)
+
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        stream = seed_sequence.spawn(1)[0]
+        max_years = max(self.horizons) if self.horizons else 0
+        returns = simulate_asset_returns(self.mean_returns, self.covariance, max_years, num_simulations,
+                                         np.random.default_rng(stream), self.dtype)
+        # Year-major, so every year's (paths x assets) slice is contiguous
+        self.returns = np.ascontiguousarray(returns.transpose(1, 0, 2))
+
+    @property
+    def num_simulations(self):
+        return self.returns.shape[1]
+
+    def volatility(self, weights):
+        """
+        Annualized volatility of every candidate.
+
+        Parameters:
+        - weights (ndarray): Candidates as rows of fractions, shape (candidates, assets).
+
+        Returns:
+        - volatilities (ndarray): One volatility per candidate.
+        """
+        return np.sqrt(np.einsum("ij,jk,ik->i", weights, self.covariance, weights))
+
+    def success_probabilities(self, weights):
+        """
+        Net-of-cost success probability of every goal for every candidate.
+
+        Each candidate is rebalanced yearly, so its growth is 1 + returns @ weights. A block of
+        candidates is stepped through the years together, one matrix multiply per year, compounding
+        a (paths x candidates) array sized by block_bytes so it stays in cache instead of
+        materializing every year of every candidate.
+
+        Parameters:
+        - weights (ndarray): Candidates as rows of fractions, shape (candidates, assets).
+
+        Returns:
+        - probabilities (ndarray): Array of shape (candidates, goals) with probabilities in [0, 1].
+        """
+        weights = np.atleast_2d(np.asarray(weights, dtype=self.dtype))
+        probabilities = np.empty((len(weights), len(self.goal_names)))
+        increment("allocations_evaluated", len(weights))
+        if not self.horizons:
+            return probabilities
+        column_of_year = {horizon - 1: column for column, horizon in enumerate(self.horizons)}
+        years, rows, _ = self.returns.shape
+        block = max(1, int(self.block_bytes // (rows * self.dtype.itemsize)))
+        for start in range(0, len(weights), block):
+            block_weights = weights[start:start + block].T
+            growth = np.ones((rows, block_weights.shape[1]), dtype=self.dtype)
+            yearly = np.empty_like(growth)
+            # Values at the goal horizons, horizons last as apply_net_costs expects
+            values = np.empty((rows, block_weights.shape[1], len(self.horizons)), dtype=self.dtype)
+            for year in range(years):
+                np.matmul(self.returns[year], block_weights, out=yearly)
+                yearly += 1
+                growth *= yearly
+                if year in column_of_year:
+                    values[:, :, column_of_year[year]] = growth
+            values *= self.dtype.type(self.initial_investment)
+            apply_net_costs(values, self.cost_factors, out=values)
+            successes = values[:, :, self.goal_columns] >= self.goal_amounts
+            probabilities[start:start + block] = successes.mean(axis=0)
+        return probabilities
+
+    def score(self, weights):
+        """
+        Priority-weighted success probability of every candidate.
+
+        Parameters:
+        - weights (ndarray): Candidates as rows of fractions, shape (candidates, assets).
+
+        Returns:
+        - scores (ndarray): Objective per candidate, in [0, 1].
+        - probabilities (ndarray): Per-goal success probabilities, shape (candidates, goals).
+        """
+        probabilities = self.success_probabilities(weights)
+        return probabilities @ self.priority_weights, probabilities
+
+
+def _bound_vectors(assets, bounds):
+    # Lower and upper percentage bounds per asset, validated to admit at least one allocation
+    bounds = bounds or {}
+    lower = np.array([bounds.get(asset, (0, 100))[0] for asset in assets], dtype=np.float64)
+    upper = np.array([bounds.get(asset, (0, 100))[1] for asset in assets], dtype=np.float64)
+    if (lower > upper).any() or lower.sum() > 100 or upper.sum() < 100:
+        raise ValueError("Allocation bounds admit no allocation summing to 100%.")
+    return lower, upper
+
+
+def grid_candidates(num_assets, step=5):
+    """
+    Enumerates every allocation on a percentage grid of the simplex.
+
+    Parameters:
+    - num_assets (int): Number of asset classes.
+    - step (float): Grid spacing in percent; must divide 100.
+
+    Returns:
+    - candidates (ndarray): Percentage allocations of shape (candidates, num_assets).
+    """
+    units = int(round(100 / step))
+    if not np.isclose(units * step, 100):
+        raise ValueError("The grid step must divide 100.")
+    # Stars and bars: each choice of num_assets - 1 bar positions is one composition of the units
+    bars = np.array(list(combinations(range(units + num_assets - 1), num_assets - 1)), dtype=np.int64)
+    bars = bars.reshape(-1, num_assets - 1)
+    edges = np.column_stack([np.full(len(bars), -1), bars, np.full(len(bars), units + num_assets - 1)])
+    return (np.diff(edges, axis=1) - 1) * float(step)
+
+
+def random_candidates(count, lower, upper, rng):
+    """
+    Draws allocations uniformly from the simplex within per-asset bounds.
+
+    Parameters:
+    - count (int): Number of draws before bounds are enforced.
+    - lower (ndarray): Lower bound per asset in percent.
+    - upper (ndarray): Upper bound per asset in percent.
+    - rng (Generator): NumPy random generator.
+
+    Returns:
+    - candidates (ndarray): Percentage allocations within bounds (at most count rows).
+    """
+    # The mass above the lower bounds is spread uniformly; draws breaking an upper bound are dropped
+    free = 100 - lower.sum()
+    candidates = lower + rng.dirichlet(np.ones(len(lower)), count) * free
+    return candidates[(candidates <= upper + 1e-9).all(axis=1)]
+
+
+def _pattern_moves(allocation, step, lower, upper):
+    # Compass moves on the simplex: shift step percent from every asset to every other one
+    num_assets = len(allocation)
+    sources, targets = np.nonzero(~np.eye(num_assets, dtype=bool))
+    moves = np.repeat(allocation[None, :], len(sources), axis=0)
+    moves[np.arange(len(sources)), sources] -= step
+    moves[np.arange(len(sources)), targets] += step
+    return moves[((moves >= lower - 1e-9) & (moves <= upper + 1e-9)).all(axis=1)]
+
+
+def optimize_allocation(initial_investment, goals, financial_data, tax_rates, fees, inflation_rate, risk_score=None,
+                        assets=None, bounds=None, max_volatility=None, method="random", num_candidates=5000,
+                        grid_step=5, refine=True, initial_step=5.0, min_step=0.25, baseline=None,
+                        num_simulations=2000, seed=None, time_budget=None, batch_size=1000,
+                        block_bytes=DEFAULT_BLOCK_BYTES):
+    """
+    Searches for the allocation that maximizes the priority-weighted success probability of goals.
+
+    Every candidate is scored on one shared set of correlated per-asset draws (see SharedDraws),
+    net of taxes, fees and inflation; whole batches of candidates are evaluated by one matrix
+    multiply. A global random or grid search is followed by an optional pattern search that moves
+    step percent between pairs of assets, halving the step whenever no move improves the score.
+    Ties are broken toward the lower volatility.
+
+    Unlike check_multi_goal_feasibility, the allocation is held for all goals as is, without the
+    per-priority nudges; the priorities weight the goals in the objective instead.
+
+    Parameters:
+    - initial_investment (float): Starting capital.
+    - goals (dict): Goals as passed to check_multi_goal_feasibility.
+    - financial_data (AssetStats or DataFrame): Asset statistics.
+    - tax_rates (dict): Tax rates for 'short_term' and 'long_term' gains.
+    - fees (dict): Transaction fees as percentages for each asset class.
+    - inflation_rate (float): Annual inflation rate (e.g., 0.05 for 5%).
+    - risk_score (float): Client risk score; sets max_volatility through risk_volatility_limit.
+    - assets (list): Asset classes to allocate (defaults to the baseline's keys or ASSET_CLASSES).
+    - bounds (dict): Optional (lower, upper) percentage bounds per asset.
+    - max_volatility (float): Explicit annualized volatility limit; overrides risk_score.
+    - method (str): 'random' (Dirichlet draws) or 'grid' (every multiple of grid_step).
+    - num_candidates (int): Random candidates to draw before refinement.
+    - grid_step (float): Grid spacing in percent.
+    - refine (bool): Run the pattern search from the best global candidate.
+    - initial_step (float): First pattern-search step in percent.
+    - min_step (float): Pattern search stops once the step falls below this.
+    - baseline (dict): Allocation to include as a candidate, e.g. from dynamic_allocation.
+    - num_simulations (int): Number of shared paths.
+    - seed (int or SeedSequence): Seed of the shared draws and the random search.
+    - time_budget (float): Wall-time limit in seconds; the search returns its best candidate so far
+      once it runs out (the first batch is always evaluated).
+    - batch_size (int): Candidates evaluated per batch.
+    - block_bytes (int): Size of one candidate block's running values (see SharedDraws).
+
+    Returns:
+    - result (dict): 'allocation' (percentages per asset), 'score', 'success_probabilities' per goal,
+      'volatility', 'max_volatility', 'baseline_score' (None without a baseline),
+      'candidates_evaluated', 'refinement_steps', 'elapsed_seconds' and 'budget_exhausted'.
+    """
+    from risk_profiler import ASSET_CLASSES
+
+    started = time.perf_counter()
+    deadline = None if time_budget is None else started + time_budget
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method: {method}")
+    assets = list(assets or (baseline.keys() if baseline else ASSET_CLASSES))
+    lower, upper = _bound_vectors(assets, bounds)
+
+    with stage("optimization"):
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        draw_seed, search_seed = seed_sequence.spawn(2)
+        draws = SharedDraws(initial_investment, goals, financial_data, assets, tax_rates, fees, inflation_rate,
+                            num_simulations, draw_seed, block_bytes=block_bytes)
+        if max_volatility is None and risk_score is not None:
+            max_volatility = risk_volatility_limit(risk_score, draws.covariance)
+        limit = np.inf if max_volatility is None else max_volatility
+
+        best = {"score": -np.inf, "volatility": np.inf, "allocation": None, "probabilities": None}
+        evaluated = 0
+
+        def evaluate(candidates):
+            # Score the feasible candidates of a batch and keep the best (ties to lower volatility)
+            nonlocal evaluated
+            weights = candidates / 100
+            volatilities = draws.volatility(weights)
+            feasible = volatilities <= limit + 1e-12
+            if not feasible.any():
+                return False
+            candidates, weights, volatilities = candidates[feasible], weights[feasible], volatilities[feasible]
+            scores, probabilities = draws.score(weights)
+            evaluated += len(candidates)
+            order = np.lexsort((volatilities, -scores))
+            top = order[0]
+            improved = scores[top] > best["score"] + 1e-12 or (
+                scores[top] >= best["score"] - 1e-12 and volatilities[top] < best["volatility"] - 1e-12
+            )
+            if improved:
+                best.update(score=float(scores[top]), volatility=float(volatilities[top]),
+                            allocation=candidates[top].copy(), probabilities=probabilities[top])
+            return improved
+
+        def out_of_time():
+            return deadline is not None and time.perf_counter() >= deadline
+
+        baseline_score = None
+        if baseline:
+            baseline_row = np.array([[baseline.get(asset, 0.0) for asset in assets]], dtype=np.float64)
+            baseline_row *= 100 / baseline_row.sum()
+            baseline_score = float(draws.score(baseline_row / 100)[0][0])
+            if ((baseline_row >= lower - 1e-9) & (baseline_row <= upper + 1e-9)).all():
+                evaluate(baseline_row)
+
+        # Global search in batches, so the time budget is checked between matrix multiplies
+        if method == "grid":
+            candidates = grid_candidates(len(assets), grid_step)
+            candidates = candidates[((candidates >= lower) & (candidates <= upper)).all(axis=1)]
+            batches = (candidates[start:start + batch_size] for start in range(0, len(candidates), batch_size))
+        else:
+            rng = np.random.default_rng(search_seed)
+            batches = (random_candidates(min(batch_size, num_candidates - start), lower, upper, rng)
+                       for start in range(0, num_candidates, batch_size))
+        for index, batch in enumerate(batches):
+            if index and out_of_time():
+                break
+            if len(batch):
+                evaluate(batch)
+
+        # Pattern search from the best candidate, halving the step once no move improves it
+        refinement_steps = 0
+        step = initial_step
+        while refine and best["allocation"] is not None and step >= min_step and not out_of_time():
+            moves = _pattern_moves(best["allocation"], step, lower, upper)
+            if len(moves) and evaluate(moves):
+                refinement_steps += 1
+            else:
+                step /= 2
+
+    if best["allocation"] is None:
+        raise ValueError("No candidate allocation satisfies the volatility limit and bounds.")
+    return {
+        "allocation": {asset: round(float(value), 2) for asset, value in zip(assets, best["allocation"])},
+        "score": round(best["score"], 4),
+        "success_probabilities": {goal_name: round(float(probability) * 100, 2)
+                                  for goal_name, probability in zip(draws.goal_names, best["probabilities"])},
+        "volatility": round(best["volatility"], 4),
+        "max_volatility": None if max_volatility is None else round(float(max_volatility), 4),
+        "baseline_score": None if baseline_score is None else round(baseline_score, 4),
+        "candidates_evaluated": evaluated,
+        "refinement_steps": refinement_steps,
+        "elapsed_seconds": round(time.perf_counter() - started, 4),
+        "budget_exhausted": out_of_time()
+    }
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    # Example: best allocation for three goals of a client with risk score 0.6
+    goals = {
+        "House": {"goal_amount": 2000000, "timeline_years": 15, "priority": "high"},
+        "Retirement": {"goal_amount": 10000000, "timeline_years": 30, "priority": "medium"},
+        "Education": {"goal_amount": 1000000, "timeline_years": 10, "priority": "low"}
+    }
+    financial_data = pd.DataFrame({
+        "ticker": ["stocks", "bonds", "real_estate", "crypto"],
+        "annualized_return": [0.12, 0.04, 0.07, 0.15],
+        "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
+    })
+    tax_rates = {"short_term": 0.15, "long_term": 0.10}
+    fees = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}
+    baseline = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
+
+    result = optimize_allocation(1000000, goals, financial_data, tax_rates, fees, 0.05, risk_score=0.6,
+                                 baseline=baseline, seed=42, time_budget=5)
+    print(result)
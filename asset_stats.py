@@ -0,0 +1,409 @@
+import hashlib
+
+import numpy as np
+
+# Daily bars are annualized with the usual number of trading days per year
+TRADING_DAYS = 252
+# Assets quoted every day of the week (e.g., crypto) are annualized over calendar days
+CALENDAR_DAYS = 365
+# Share of a ticker's quotes falling on weekends above which it is treated as quoted every day;
+# an exchange's occasional weekend session stays far below it (a daily calendar gives 2/7)
+DAILY_WEEKEND_SHARE = 0.1
+
+
+def close_price_panel(price_data, price_field="Close"):
+    """
+    Extracts a (dates x tickers) close price panel from a fetch_financial_data frame.
+
+    Parameters:
+    - price_data (DataFrame): Frame returned by yf.download(..., group_by='ticker'), with (ticker, field)
+      column pairs, or a frame that already holds one price column per ticker.
+    - price_field (str): OHLC field to use as the price (e.g., 'Close' or 'Adj Close').
+
+    Returns:
+    - panel (DataFrame): Prices indexed by date with one column per ticker.
+    """
+    import pandas as pd
+
+    if isinstance(price_data.columns, pd.MultiIndex):
+        panel = price_data.xs(price_field, axis=1, level=-1)
+    else:
+        panel = price_data
+    panel = panel.sort_index()
+    return panel.astype(np.float64)
+
+
+def _own_calendar_returns(log_prices):
+    """
+    Computes every ticker's log returns on its own calendar.
+
+    Each quote is compared with the ticker's previous quote, so dates on which a ticker did not
+    trade (NaN, e.g. equity weekends in a panel joined with crypto) are skipped instead of voiding
+    the returns next to them.
+
+    Parameters:
+    - log_prices (ndarray): Log prices (dates x tickers), NaN where a ticker has no quote.
+
+    Returns:
+    - returns (ndarray): Matrix of shape (dates - 1, tickers), NaN on dates without a quote.
+    """
+    valid = ~np.isnan(log_prices)
+    # Forward fill by carrying the row index of the last quote down every column
+    last_quote = np.maximum.accumulate(np.where(valid, np.arange(len(log_prices))[:, None], 0), axis=0)
+    filled = np.take_along_axis(log_prices, last_quote, axis=0)
+    returns = filled[1:] - filled[:-1]
+    returns[~valid[1:]] = np.nan
+    return returns
+
+
+def _quote_counts(panel):
+    """
+    Counts every ticker's quotes and the share of them on weekends.
+
+    Returns:
+    - quotes (ndarray), weekend_quotes (ndarray): Per-ticker counts.
+    """
+    valid = panel.notna().to_numpy()
+    weekend = np.asarray(getattr(panel.index, "dayofweek", np.zeros(len(panel), dtype=np.int64))) >= 5
+    return valid.sum(axis=0).astype(np.float64), (valid & weekend[:, None]).sum(axis=0).astype(np.float64)
+
+
+def _moments(returns):
+    """
+    Computes per-column count, mean and sum of squared deviations, ignoring NaNs.
+
+    Parameters:
+    - returns (ndarray): Matrix of log returns (dates x tickers), NaN where missing.
+
+    Returns:
+    - count, mean, m2 (ndarray): Per-ticker sufficient statistics.
+    """
+    valid = ~np.isnan(returns)
+    count = valid.sum(axis=0).astype(np.float64)
+    filled = np.where(valid, returns, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, filled.sum(axis=0) / count, 0.0)
+    deviations = np.where(valid, returns - mean, 0.0)
+    m2 = (deviations ** 2).sum(axis=0)
+    return count, mean, m2
+
+
+def _co_moments(returns):
+    """
+    Computes count, mean vector and co-moment matrix over rows where every ticker has a return.
+
+    Parameters:
+    - returns (ndarray): Matrix of log returns between consecutive dates on which every ticker
+      is quoted, NaN where missing.
+
+    Returns:
+    - count (float), mean (ndarray), comoment (ndarray): Sufficient statistics for the covariance.
+    """
+    complete = returns[~np.isnan(returns).any(axis=1)]
+    count = float(complete.shape[0])
+    if count == 0:
+        return 0.0, np.zeros(returns.shape[1]), np.zeros((returns.shape[1], returns.shape[1]))
+    mean = complete.mean(axis=0)
+    deviations = complete - mean
+    return count, mean, deviations.T @ deviations
+
+
+def _merge(count_a, mean_a, m2_a, count_b, mean_b, m2_b, outer=False):
+    """
+    Merges two sets of (count, mean, second moment) statistics (Chan et al. parallel update).
+
+    Parameters:
+    - count_a, mean_a, m2_a: Statistics of the existing history.
+    - count_b, mean_b, m2_b: Statistics of the appended bars.
+    - outer (bool): Whether the second moments are co-moment matrices rather than per-ticker sums.
+
+    Returns:
+    - count, mean, m2: Statistics of the combined history.
+    """
+    count = count_a + count_b
+    safe_count = np.maximum(count, 1)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / safe_count)
+    scale = count_a * count_b / safe_count
+    if outer:
+        m2 = m2_a + m2_b + np.outer(delta, delta) * scale
+    else:
+        m2 = m2_a + m2_b + delta ** 2 * scale
+    return count, mean, m2
+
+
+def _last_quotes(prices):
+    # Last non-NaN price of every ticker (NaN for tickers without any quote)
+    valid = ~np.isnan(prices)
+    if not len(prices):
+        return np.full(prices.shape[1], np.nan)
+    last_row = len(prices) - 1 - np.argmax(valid[::-1], axis=0)
+    return np.where(valid.any(axis=0), prices[last_row, np.arange(prices.shape[1])], np.nan)
+
+
+class AssetStats:
+    """
+    Per-ticker annualized log-return statistics and covariance computed from a price panel.
+
+    Tickers are held in a fixed order, so lookups by name are O(1) dictionary hits and aligned NumPy
+    vectors can be handed straight to the simulators. Only sufficient statistics and the last price
+    of each ticker are kept, so appending new bars never revisits the full history.
+
+    Tickers may trade on different calendars (e.g., exchange-listed funds and crypto in one joined
+    panel). Each ticker's return and volatility come from its own quotes, annualized over
+    CALENDAR_DAYS when it is quoted every day and TRADING_DAYS otherwise; the covariance comes from
+    returns between the dates on which every ticker is quoted.
+    """
+
+    def __init__(self, tickers, count, mean, m2, cov_count, cov_mean, comoment, last_prices, last_date,
+                 common_prices=None, quotes=None, weekend_quotes=None, covariance_periods=None):
+        self.tickers = list(tickers)
+        self.index = {ticker: position for position, ticker in enumerate(self.tickers)}
+        self._count, self._mean, self._m2 = count, mean, m2
+        self._cov_count, self._cov_mean, self._comoment = cov_count, cov_mean, comoment
+        # Last quote of every ticker, and the prices on the last date all of them were quoted
+        self.last_prices = last_prices
+        self._common_prices = common_prices
+        self._quotes = np.zeros(len(self.tickers)) if quotes is None else quotes
+        self._weekend_quotes = np.zeros(len(self.tickers)) if weekend_quotes is None else weekend_quotes
+        # Fixed for views, whose co-moments come from the common dates of the full ticker set
+        self._covariance_periods = covariance_periods
+        self.last_date = last_date
+        self.version = 0
+        self._fingerprint = None
+        self._refresh()
+
+    @classmethod
+    def from_price_history(cls, price_data, price_field="Close"):
+        """
+        Builds the statistics in one vectorized pass over the price history.
+
+        Parameters:
+        - price_data (DataFrame): Frame from fetch_financial_data or a (dates x tickers) price panel.
+        - price_field (str): OHLC field to use as the price.
+
+        Returns:
+        - stats (AssetStats): Statistics for every ticker in the panel.
+        """
+        panel = close_price_panel(price_data, price_field)
+        prices = panel.to_numpy()
+        count, mean, m2 = _moments(_own_calendar_returns(np.log(prices)))
+        common = prices[~np.isnan(prices).any(axis=1)]
+        cov_count, cov_mean, comoment = _co_moments(np.diff(np.log(common), axis=0))
+        last_prices = _last_quotes(prices)
+        common_prices = common[-1] if len(common) else None
+        last_date = panel.index[-1] if len(panel) else None
+        return cls(panel.columns, count, mean, m2, cov_count, cov_mean, comoment, last_prices, last_date,
+                   common_prices, *_quote_counts(panel))
+
+    def update(self, price_data, price_field="Close"):
+        """
+        Folds newly appended bars into the statistics without recomputing the history.
+
+        Parameters:
+        - price_data (DataFrame): New bars in the same layout as the original history; rows at or
+          before the last seen date are ignored.
+        - price_field (str): OHLC field to use as the price.
+
+        Returns:
+        - stats (AssetStats): The updated object (for chaining).
+        """
+        panel = close_price_panel(price_data, price_field).reindex(columns=self.tickers)
+        if self.last_date is not None:
+            panel = panel[panel.index > self.last_date]
+        if panel.empty:
+            return self
+
+        # Prepend every ticker's last quote so its first new quote yields a return
+        new_prices = panel.to_numpy()
+        prices = np.vstack([self.last_prices, new_prices])
+        self._count, self._mean, self._m2 = _merge(self._count, self._mean, self._m2,
+                                                   *_moments(_own_calendar_returns(np.log(prices))))
+        # Likewise the prices of the last date every ticker was quoted, for the covariance
+        common = new_prices[~np.isnan(new_prices).any(axis=1)]
+        if len(common):
+            if self._common_prices is not None:
+                common = np.vstack([self._common_prices, common])
+            self._cov_count, self._cov_mean, self._comoment = _merge(
+                self._cov_count, self._cov_mean, self._comoment, *_co_moments(np.diff(np.log(common), axis=0)),
+                outer=True
+            )
+            self._common_prices = common[-1]
+        quotes, weekend_quotes = _quote_counts(panel)
+        self._quotes = self._quotes + quotes
+        self._weekend_quotes = self._weekend_quotes + weekend_quotes
+        self.last_prices = _last_quotes(prices)
+        self.last_date = panel.index[-1]
+        self.version += 1
+        self._fingerprint = None
+        self._refresh()
+        return self
+
+    def _refresh(self):
+        # Annualize the running statistics (sample variance, ddof=1) over each ticker's calendar
+        with np.errstate(invalid="ignore", divide="ignore"):
+            variance = np.where(self._count > 1, self._m2 / (self._count - 1), np.nan)
+            covariance = self._comoment / (self._cov_count - 1) if self._cov_count > 1 else np.full_like(self._comoment, np.nan)
+            daily = self._weekend_quotes > DAILY_WEEKEND_SHARE * self._quotes
+        periods = np.where(daily, CALENDAR_DAYS, TRADING_DAYS)
+        self.periods_per_year = periods
+        self.annualized_return = self._mean * periods
+        self.annualized_volatility = np.sqrt(variance * periods)
+        # Common dates include weekends only when every ticker is quoted daily
+        self.covariance_periods = self._covariance_periods or (
+            CALENDAR_DAYS if len(daily) and daily.all() else TRADING_DAYS
+        )
+        self.covariance = covariance * self.covariance_periods
+
+    def fingerprint(self):
+        """
+        Returns a content hash of the statistics, identifying the market-data snapshot they describe.
+
+        Equal statistics give equal fingerprints in any process, and every update() that folds in new
+        bars changes it, so results keyed by the fingerprint are invalidated by new market data.
+
+        Returns:
+        - fingerprint (str): Hex SHA-256 digest.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update(repr(self.tickers).encode())
+            digest.update(repr(str(self.last_date)).encode())
+            for values in (self.annualized_return, self.annualized_volatility, self.covariance):
+                digest.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def __contains__(self, ticker):
+        return ticker in self.index
+
+    def __getitem__(self, ticker):
+        """
+        Returns (annualized_return, annualized_volatility) for one ticker.
+        """
+        position = self.index[ticker]
+        return self.annualized_return[position], self.annualized_volatility[position]
+
+    def positions(self, assets):
+        """
+        Maps asset names to their column positions.
+
+        Parameters:
+        - assets (list): Tickers to look up.
+
+        Returns:
+        - positions (ndarray): Integer positions aligned with assets.
+        """
+        return np.array([self.index[asset] for asset in assets], dtype=np.intp)
+
+    def vectors(self, assets):
+        """
+        Returns annualized returns and volatilities aligned with the given assets.
+
+        Parameters:
+        - assets (list): Tickers to look up.
+
+        Returns:
+        - returns (ndarray), volatilities (ndarray): Aligned statistics.
+        """
+        positions = self.positions(assets)
+        return self.annualized_return[positions], self.annualized_volatility[positions]
+
+    def covariance_matrix(self, assets):
+        """
+        Returns the annualized covariance matrix restricted to and ordered by the given assets.
+
+        Parameters:
+        - assets (list): Tickers to look up.
+
+        Returns:
+        - covariance (ndarray): Matrix of shape (len(assets), len(assets)).
+        """
+        positions = self.positions(assets)
+        return self.covariance[np.ix_(positions, positions)]
+
+    def for_assets(self, asset_tickers, assets=None):
+        """
+        Returns the statistics re-keyed by asset class, each class reading the ticker that holds it.
+
+        The goal checkers look statistics up by asset class ('stocks', 'bonds', ...) while the price
+        history is keyed by ticker; this view bridges the two without recomputing anything.
+
+        Parameters:
+        - asset_tickers (dict): Ticker holding each asset class; classes missing from it are looked
+          up under their own name.
+        - assets (list): Asset classes to keep (defaults to the keys of asset_tickers).
+
+        Returns:
+        - stats (AssetStats): Statistics whose tickers are the asset classes.
+        """
+        assets = list(assets or asset_tickers)
+        tickers = [asset_tickers.get(asset, asset) for asset in assets]
+        missing = [f"{ticker} ({asset})" for asset, ticker in zip(assets, tickers) if ticker not in self.index]
+        if missing:
+            raise ValueError(f"No price history for the tickers of asset classes: {', '.join(missing)}. "
+                             f"Map every asset class to a loaded ticker.")
+        positions = self.positions(tickers)
+        common_prices = None if self._common_prices is None else self._common_prices[positions]
+        view = AssetStats(assets, self._count[positions], self._mean[positions], self._m2[positions],
+                          self._cov_count, self._cov_mean[positions],
+                          self._comoment[np.ix_(positions, positions)], self.last_prices[positions],
+                          self.last_date, common_prices, self._quotes[positions], self._weekend_quotes[positions],
+                          self.covariance_periods)
+        view.version = self.version
+        return view
+
+    def to_frame(self):
+        """
+        Exports the statistics in the layout expected by the goal checkers.
+
+        Returns:
+        - financial_data (DataFrame): Columns 'ticker', 'annualized_return' and 'annualized_volatility'.
+        """
+        import pandas as pd
+
+        return pd.DataFrame({
+            "ticker": self.tickers,
+            "annualized_return": self.annualized_return,
+            "annualized_volatility": self.annualized_volatility
+        })
+
+
+def asset_return_vectors(financial_data, assets):
+    """
+    Looks up annualized returns and volatilities for several assets at once.
+
+    Parameters:
+    - financial_data (AssetStats or DataFrame): Asset statistics; a DataFrame needs 'ticker',
+      'annualized_return' and 'annualized_volatility' columns.
+    - assets (list): Tickers to look up.
+
+    Returns:
+    - returns (ndarray), volatilities (ndarray): Statistics aligned with assets.
+    """
+    assets = list(assets)
+    if isinstance(financial_data, AssetStats):
+        return financial_data.vectors(assets)
+    # Index the table once instead of scanning it for every asset
+    indexed = financial_data.drop_duplicates('ticker').set_index('ticker')
+    rows = indexed.loc[assets]
+    return rows['annualized_return'].to_numpy(dtype=np.float64), rows['annualized_volatility'].to_numpy(dtype=np.float64)
+
+
+def asset_covariance(financial_data, assets):
+    """
+    Looks up the annualized covariance matrix of several assets.
+
+    Parameters:
+    - financial_data (AssetStats or DataFrame): Asset statistics. A plain DataFrame carries no
+      correlations, so its assets are treated as uncorrelated (diagonal covariance).
+    - assets (list): Tickers to look up.
+
+    Returns:
+    - covariance (ndarray): Matrix of shape (len(assets), len(assets)).
+    """
+    assets = list(assets)
+    if isinstance(financial_data, AssetStats):
+        return financial_data.covariance_matrix(assets)
+    _, volatilities = asset_return_vectors(financial_data, assets)
+    return np.diag(volatilities ** 2)
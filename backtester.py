@@ -0,0 +1,239 @@
+import numpy as np
+
+from asset_stats import close_price_panel
+from risk_profiler import ASSET_CLASSES, dynamic_allocation_batch
+
+# Calendar rebalancing frequencies and the pandas period they map to
+REBALANCE_PERIODS = {"daily": "D", "weekly": "W", "monthly": "M", "quarterly": "Q", "yearly": "Y"}
+TRADING_DAYS = 252
+# Mean length of a calendar year in days, used to annualize over the elapsed time of a backtest
+DAYS_PER_YEAR = 365.25
+
+
+def _asset_prices(price_data, assets, asset_tickers, price_field):
+    # Raw (dates x assets) prices, NaN where an asset has no bar on a date
+    asset_tickers = asset_tickers or {}
+    panel = close_price_panel(price_data, price_field)
+    prices = panel[[asset_tickers.get(asset, asset) for asset in assets]]
+    return panel.index, prices.to_numpy()
+
+
+def _simple_returns(prices):
+    # Forward-filled prices turn a missing bar into a zero return
+    import pandas as pd
+
+    prices = pd.DataFrame(prices).ffill().to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = prices[1:] / prices[:-1] - 1
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _trading_rows(prices):
+    # Return rows closing on a bar of every asset already listed, i.e. when all held markets trade
+    quoted = ~np.isnan(prices)
+    listed = np.logical_or.accumulate(quoted, axis=0)
+    return (quoted | ~listed).all(axis=1)[1:]
+
+
+def daily_return_panel(price_data, assets=None, asset_tickers=None, price_field="Close"):
+    """
+    Builds the (dates x assets) matrix of simple daily returns used by the backtester.
+
+    Prices are forward-filled across missing bars (e.g., holidays of one market, or equity weekends
+    in a panel joined with daily crypto), so a missing bar is a zero return; an asset without any
+    price yet also returns zero until its first bar.
+
+    Parameters:
+    - price_data (DataFrame): Frame from fetch_financial_data or a (dates x tickers) price panel.
+    - assets (list): Asset classes in column order (defaults to ASSET_CLASSES).
+    - asset_tickers (dict): Ticker holding each asset class; assets are their own tickers if omitted.
+    - price_field (str): OHLC field to use as the price.
+
+    Returns:
+    - dates (DatetimeIndex): Date of every return row (the first bar has no return and is dropped).
+    - returns (ndarray): Simple returns of shape (len(dates), len(assets)).
+    """
+    index, prices = _asset_prices(price_data, list(assets or ASSET_CLASSES), asset_tickers, price_field)
+    return index[1:], _simple_returns(prices)
+
+
+def rebalance_starts(dates, rebalance="monthly", trading_rows=None):
+    """
+    Finds the rows that start a new holding segment, i.e. after which the portfolio is rebalanced.
+
+    Rebalancing trades on the close of the row before a segment start, so only trading rows are
+    used for it: calendar frequencies rebalance on the last trading row of every period and a fixed
+    number of bars counts trading rows only. Markets closed on a row (e.g., equities on a weekend of
+    a panel that also holds daily crypto) are thus never traded.
+
+    Parameters:
+    - dates (DatetimeIndex): Dates of the return rows.
+    - rebalance (str or int): 'daily', 'weekly', 'monthly', 'quarterly', 'yearly', 'never', or a
+      fixed number of bars between rebalances.
+    - trading_rows (ndarray): Boolean mask of the rows on which every asset trades; all rows if omitted.
+
+    Returns:
+    - starts (ndarray): Sorted first row of every segment, always including 0.
+    """
+    if rebalance in (None, "never"):
+        return np.zeros(1, dtype=np.intp)
+    trading = np.arange(len(dates)) if trading_rows is None else np.flatnonzero(trading_rows)
+    if isinstance(rebalance, (int, np.integer)):
+        if rebalance < 1:
+            raise ValueError("Rebalancing every N bars needs N >= 1.")
+        rebalance_rows = trading[rebalance - 1::rebalance]
+    else:
+        if rebalance not in REBALANCE_PERIODS:
+            raise ValueError(f"Unknown rebalancing frequency: {rebalance}")
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        periods = dates[trading].to_period(REBALANCE_PERIODS[rebalance]).asi8
+        rebalance_rows = trading[:-1][periods[1:] != periods[:-1]]
+    starts = rebalance_rows[rebalance_rows < len(dates) - 1] + 1
+    return np.concatenate([[0], starts]).astype(np.intp)
+
+
+def _weight_matrix(allocations, assets):
+    # Allocation dicts or (candidates x assets) percentage matrices as rows of fractions summing to 1
+    if isinstance(allocations, dict):
+        allocations = [[allocations.get(asset, 0.0) for asset in assets]]
+    weights = np.atleast_2d(np.asarray(allocations, dtype=np.float64))
+    if weights.shape[1] != len(assets):
+        raise ValueError(f"Allocations have {weights.shape[1]} columns for {len(assets)} assets.")
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def backtest(price_data, allocations, fees=None, rebalance="monthly", initial_investment=1.0, assets=None,
+             asset_tickers=None, price_field="Close"):
+    """
+    Replays one or many target allocations against historical daily returns.
+
+    Between rebalances the holdings drift with the market; at every rebalance they are traded back
+    to the target weights, paying each asset's fee on the value traded in it. Nothing loops over
+    dates: with L the cumulative log growth of every asset, the growth of a holding since its
+    segment start is exp(L(t) - L(start)), so the portfolio value inside every segment is one matrix
+    product of the candidate weights with these growth factors, and segments chain through a
+    cumulative product. All candidates are evaluated together.
+
+    Parameters:
+    - price_data (DataFrame): Frame from fetch_financial_data or a (dates x tickers) price panel.
+    - allocations (dict or array-like): One allocation dict (as from dynamic_allocation) or a
+      (candidates x assets) matrix of percentages (as from dynamic_allocation_batch).
+    - fees (dict): Transaction fees in percent of the traded value per asset class; the initial
+      purchase is charged as well.
+    - rebalance (str or int): Rebalancing frequency (see rebalance_starts); rebalances only trade on
+      dates on which every asset has a bar.
+    - initial_investment (float): Starting capital.
+    - assets (list): Asset classes in allocation column order (defaults to ASSET_CLASSES).
+    - asset_tickers (dict): Ticker holding each asset class; assets are their own tickers if omitted.
+    - price_field (str): OHLC field to use as the price.
+
+    Returns:
+    - result (dict): 'dates'; 'equity' and 'drawdown' of shape (candidates, dates); and per
+      candidate 'total_return', 'annualized_return' (over the calendar time elapsed since the first
+      bar, so it does not depend on how many rows a calendar has), 'max_drawdown', 'turnover' (one-way traded
+      fraction of the portfolio summed over rebalances, the initial purchase excluded) and 'fees_paid'.
+    """
+    assets = list(assets or ASSET_CLASSES)
+    weights = _weight_matrix(allocations, assets)
+    fee_rates = np.array([(fees or {}).get(asset, 0.0) for asset in assets], dtype=np.float64) / 100
+    index, prices = _asset_prices(price_data, assets, asset_tickers, price_field)
+    dates, returns = index[1:], _simple_returns(prices)
+    candidates, rows = weights.shape[0], len(dates)
+    if rows == 0:
+        raise ValueError("A backtest needs at least two price bars.")
+    starts = rebalance_starts(dates, rebalance, _trading_rows(prices))
+
+    # Growth of every asset since the start of the segment each row belongs to
+    log_growth = np.zeros((rows + 1, len(assets)))
+    np.cumsum(np.log1p(returns), axis=0, out=log_growth[1:])
+    segment_of_row = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, rows)))
+    growth = np.exp(log_growth[1:] - log_growth[starts][segment_of_row])
+
+    # Portfolio growth within the segment for every candidate, shape (candidates, rows)
+    portfolio_growth = weights @ growth.T
+
+    # Weights drifted by the end of every segment but the last, against which rebalancing trades
+    ends = np.append(starts[1:], rows) - 1
+    rebalance_rows = ends[:-1]
+    drifted = weights[:, None, :] * growth[rebalance_rows][None, :, :]
+    drifted /= portfolio_growth[:, rebalance_rows][:, :, None]
+    traded = np.abs(weights[:, None, :] - drifted)
+    rebalance_costs = traded @ fee_rates
+
+    # Chain segments: value at each segment start after the fees of the preceding rebalance
+    initial_cost = weights @ fee_rates
+    segment_factors = portfolio_growth[:, rebalance_rows] * (1 - rebalance_costs)
+    segment_values = np.empty((candidates, len(starts)))
+    segment_values[:, 0] = initial_investment * (1 - initial_cost)
+    np.cumprod(segment_factors, axis=1, out=segment_values[:, 1:])
+    segment_values[:, 1:] *= segment_values[:, :1]
+
+    # Equity at every close, marked after the fees of a rebalance on that close
+    equity = segment_values[:, segment_of_row] * portfolio_growth
+    fees_paid = initial_investment * initial_cost + (equity[:, rebalance_rows] * rebalance_costs).sum(axis=1)
+    equity[:, rebalance_rows] *= 1 - rebalance_costs
+    drawdown = equity / np.maximum.accumulate(equity, axis=1) - 1
+
+    # Annualize over elapsed calendar time, as a bar count depends on which calendars are mixed
+    final_value = equity[:, -1]
+    years = (index[-1] - index[0]).days / DAYS_PER_YEAR
+    with np.errstate(invalid="ignore", divide="ignore"):
+        annualized_return = (final_value / initial_investment) ** (1 / years) - 1
+    return {
+        "dates": dates,
+        "equity": equity,
+        "drawdown": drawdown,
+        "total_return": final_value / initial_investment - 1,
+        "annualized_return": annualized_return,
+        "max_drawdown": drawdown.min(axis=1, initial=0.0),
+        "turnover": traded.sum(axis=(1, 2)) / 2,
+        "fees_paid": fees_paid
+    }
+
+
+def backtest_risk_scores(price_data, risk_scores, sentiment_data, fees=None, rebalance="monthly",
+                         initial_investment=1.0, asset_tickers=None, price_field="Close"):
+    """
+    Backtests the dynamic_allocation of many risk scores in one batched call.
+
+    Parameters:
+    - price_data (DataFrame): Frame from fetch_financial_data or a (dates x tickers) price panel.
+    - risk_scores (array-like): Risk scores to sweep.
+    - sentiment_data (DataFrame): DataFrame with sentiment scores.
+    - fees (dict): Transaction fees in percent per asset class.
+    - rebalance (str or int): Rebalancing frequency (see rebalance_starts).
+    - initial_investment (float): Starting capital.
+    - asset_tickers (dict): Ticker holding each asset class.
+    - price_field (str): OHLC field to use as the price.
+
+    Returns:
+    - result (dict): backtest output, plus the 'allocations' matrix (columns as ASSET_CLASSES).
+    """
+    allocations = dynamic_allocation_batch(risk_scores, sentiment_data, None)
+    result = backtest(price_data, allocations, fees, rebalance, initial_investment, ASSET_CLASSES, asset_tickers,
+                      price_field)
+    result["allocations"] = allocations
+    return result
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    # Example: sweep risk profiles over five years of synthetic daily prices
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2019-01-01", periods=5 * TRADING_DAYS)
+    drifts = np.array([0.10, 0.04, 0.07, 0.30]) / TRADING_DAYS
+    volatilities = np.array([0.18, 0.05, 0.12, 0.70]) / np.sqrt(TRADING_DAYS)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(drifts, volatilities, (len(dates), 4)), axis=0)),
+                          index=dates, columns=ASSET_CLASSES)
+    sentiment_data = pd.DataFrame({"ticker": ["NSEI"], "sentiment_score": [0.1]})
+    fees = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}
+
+    risk_scores = np.linspace(0, 1, 11)
+    result = backtest_risk_scores(prices, risk_scores, sentiment_data, fees, rebalance="quarterly",
+                                  initial_investment=100000)
+    for risk_score, total_return, max_drawdown, turnover in zip(risk_scores, result["total_return"],
+                                                                result["max_drawdown"], result["turnover"]):
+        print(f"Risk {risk_score:.1f}: return {total_return:.1%}, max drawdown {max_drawdown:.1%}, "
+              f"turnover {turnover:.2f}")
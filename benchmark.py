@@ -0,0 +1,445 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import quote
+
+import numpy as np
+
+# Realistic tickers replayed in the pipeline benchmark, mapped to the asset classes the goal checkers
+# work on exactly as a real run maps them
+ASSET_CLASS_TICKERS = {"stocks": "^BSESN", "bonds": "GILT5YBEES.NS", "real_estate": "EMBASSY.NS", "crypto": "BTC-INR"}
+ASSET_TICKERS = list(ASSET_CLASS_TICKERS.values()) + ["NSEI"]
+# Synthetic per-asset return assumptions (annualized return, annualized volatility)
+ASSET_ASSUMPTIONS = {
+    "stocks": (0.12, 0.18),
+    "bonds": (0.04, 0.05),
+    "real_estate": (0.07, 0.12),
+    "crypto": (0.15, 0.25)
+}
+TAX_RATES = {"short_term": 0.15, "long_term": 0.10}
+FEES = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}
+INFLATION_RATE = 0.05
+ASSET_ALLOCATION = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
+# Metrics compared between runs and whether higher values are better
+TRACKED_METRICS = {"throughput": True, "peak_memory_bytes": False}
+
+# Sweeps: full by default, reduced with --quick
+SWEEPS = {
+    "full": {
+        "num_simulations": [1000, 10000, 100000],
+        "horizons": [10, 30],
+        "goal_counts": [1, 3, 10],
+        "ticker_counts": [5, 20, 50],
+        "users": [1000, 100000],
+        "sampling_simulations": [1000, 10000],
+        "sampling_repetitions": 200
+    },
+    "quick": {
+        "num_simulations": [1000, 10000],
+        "horizons": [10],
+        "goal_counts": [1, 3],
+        "ticker_counts": [5],
+        "users": [1000],
+        "sampling_simulations": [1000],
+        "sampling_repetitions": 50
+    }
+}
+
+
+def synthetic_financial_data():
+    """
+    Builds the per-asset statistics table used by the goal checkers.
+    """
+    import pandas as pd
+
+    return pd.DataFrame({
+        "ticker": list(ASSET_ASSUMPTIONS),
+        "annualized_return": [assumption[0] for assumption in ASSET_ASSUMPTIONS.values()],
+        "annualized_volatility": [assumption[1] for assumption in ASSET_ASSUMPTIONS.values()]
+    })
+
+
+def synthetic_goals(count, seed=0):
+    """
+    Builds a seeded set of goals with varied amounts, horizons and priorities.
+    """
+    rng = np.random.default_rng(seed)
+    priorities = ["high", "medium", "low"]
+    return {
+        f"Goal {index}": {
+            "goal_amount": float(rng.integers(1, 20) * 500000),
+            "timeline_years": int(rng.integers(5, 31)),
+            "priority": priorities[index % 3]
+        }
+        for index in range(count)
+    }
+
+
+def write_replay_files(root, tickers, years=5, seed=0, daily_tickers=(ASSET_CLASS_TICKERS["crypto"],)):
+    """
+    Writes seeded random-walk daily bars as '<ticker>.csv' files for ReplayProvider.
+
+    Tickers in daily_tickers are quoted every day of the week, like crypto, and the others on
+    weekdays, so the replayed panel mixes calendars as a real run does.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    weekdays = pd.bdate_range(end="2024-12-31", periods=252 * years, name="Date")
+    every_day = pd.date_range(weekdays[0], weekdays[-1], name="Date")
+    for ticker in tickers:
+        dates = every_day if ticker in daily_tickers else weekdays
+        closes = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, len(dates))))
+        frame = pd.DataFrame({"Open": closes, "High": closes, "Low": closes, "Close": closes,
+                              "Volume": 1e6}, index=dates)
+        frame.to_csv(os.path.join(root, f"{quote(ticker, safe='')}.csv"))
+
+
+def measure(function, repeat=3):
+    """
+    Times a benchmark case and records its peak traced memory.
+
+    The fastest of several untraced runs gives the time; one extra run under tracemalloc gives the
+    peak memory, so tracing overhead never inflates the timing.
+
+    Parameters:
+    - function (callable): Zero-argument function running the case once.
+    - repeat (int): Number of timed runs.
+
+    Returns:
+    - seconds (float): Best wall time of the timed runs.
+    - peak_memory_bytes (int): Peak memory allocated through Python and NumPy during one run.
+    """
+    timings = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+        tracemalloc.start()
+        try:
+            function()
+            _, peak_memory_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return min(timings), peak_memory_bytes
+
+
+def _record(results, name, function, work, unit, parameters, repeat):
+    seconds, peak_memory_bytes = measure(function, repeat)
+    results[name] = {
+        "parameters": parameters,
+        "seconds": round(seconds, 6),
+        "throughput": round(work / seconds, 2),
+        "unit": unit,
+        "peak_memory_bytes": peak_memory_bytes
+    }
+    print(f"{name}: {seconds:.4f}s, {work / seconds:,.0f} {unit}, peak {peak_memory_bytes / 1e6:.1f} MB",
+          file=sys.stderr)
+
+
+def run_benchmarks(quick=False, repeat=3, seed=0):
+    """
+    Runs every benchmark case over the configured sweeps.
+
+    Parameters:
+    - quick (bool): Use the reduced sweep.
+    - repeat (int): Timed runs per case.
+    - seed (int): Seed of all synthetic inputs and simulations.
+
+    Returns:
+    - report (dict): Environment metadata and one result per case.
+    """
+    import pandas as pd
+    from goal_checker import monte_carlo_simulation, check_goal_feasibility
+    from goal_checker_multi import check_multi_goal_feasibility
+    from tax_adjustment import apply_taxes_and_fees, adjust_for_inflation
+    from risk_profiler import dynamic_allocation, dynamic_allocation_batch, risk_profile_batch
+    from allocation_optimizer import SharedDraws
+
+    sweep = SWEEPS["quick" if quick else "full"]
+    financial_data = synthetic_financial_data()
+    results = {}
+
+    for num_simulations in sweep["num_simulations"]:
+        for years in sweep["horizons"]:
+            _record(results, f"monte_carlo_simulation[n={num_simulations},years={years}]",
+                    lambda: monte_carlo_simulation(50000, 0.08, 0.15, years, num_simulations, seed=seed),
+                    num_simulations * years, "paths*years/s",
+                    {"num_simulations": num_simulations, "years": years}, repeat)
+            _record(results, f"check_goal_feasibility[n={num_simulations},years={years}]",
+                    lambda: check_goal_feasibility(50000, 150000, years, ASSET_ALLOCATION, financial_data,
+                                                   seed=seed, num_simulations=num_simulations),
+                    num_simulations * years, "paths*years/s",
+                    {"num_simulations": num_simulations, "years": years}, repeat)
+
+        for goal_count in sweep["goal_counts"]:
+            goals = synthetic_goals(goal_count, seed)
+            total_years = sum(goal["timeline_years"] for goal in goals.values())
+            _record(results, f"check_multi_goal_feasibility[n={num_simulations},goals={goal_count}]",
+                    lambda: check_multi_goal_feasibility(1000000, goals, ASSET_ALLOCATION, financial_data, TAX_RATES,
+                                                         FEES, INFLATION_RATE, seed=seed,
+                                                         num_simulations=num_simulations),
+                    num_simulations * total_years, "paths*years/s",
+                    {"num_simulations": num_simulations, "goals": goal_count}, repeat)
+
+        # Candidate allocations scored on one shared set of draws
+        goals = synthetic_goals(3, seed)
+        draws = SharedDraws(1000000, goals, financial_data, list(ASSET_ALLOCATION), TAX_RATES, FEES, INFLATION_RATE,
+                            num_simulations, seed)
+        candidates = np.random.default_rng(seed).dirichlet(np.ones(len(ASSET_ALLOCATION)), 1000)
+        _record(results, f"allocation_scoring[n={num_simulations},candidates=1000]",
+                lambda: draws.score(candidates), len(candidates), "candidates/s",
+                {"num_simulations": num_simulations, "candidates": len(candidates)}, repeat)
+
+        projections = np.random.default_rng(seed).normal(150000, 50000, num_simulations)
+        _record(results, f"taxes_fees_inflation[n={num_simulations}]",
+                lambda: adjust_for_inflation(apply_taxes_and_fees(projections, TAX_RATES, FEES, 10),
+                                             INFLATION_RATE, 10),
+                num_simulations, "projections/s", {"num_simulations": num_simulations}, repeat)
+
+    sentiment_data = pd.DataFrame({"ticker": ASSET_TICKERS, "sentiment_score": 0.05})
+    _record(results, "dynamic_allocation[users=1]",
+            lambda: dynamic_allocation(0.8, sentiment_data, financial_data),
+            1, "users/s", {"users": 1}, repeat)
+    for user_count in sweep["users"]:
+        rng = np.random.default_rng(seed)
+        users = pd.DataFrame({
+            "age": rng.integers(20, 70, user_count),
+            "income_stability": rng.choice(["stable", "moderate", "unstable"], user_count),
+            "risk_tolerance": rng.choice(["low", "medium", "high"], user_count)
+        })
+        _record(results, f"dynamic_allocation_batch[users={user_count}]",
+                lambda: dynamic_allocation_batch(risk_profile_batch(users), sentiment_data, financial_data),
+                user_count, "users/s", {"users": user_count}, repeat)
+
+    results.update(run_sampling_benchmarks(sweep["sampling_simulations"], sweep["sampling_repetitions"], repeat, seed))
+    results.update(run_pipeline_benchmarks(sweep["ticker_counts"], repeat, seed))
+    return {"metadata": environment_metadata(quick, repeat, seed), "results": results}
+
+
+def sampling_standard_errors(sampling, num_simulations, repetitions, years=10, goal_ratio=2.0, seed=0):
+    """
+    Measures the standard error of a sampling strategy's estimates over independently seeded runs.
+
+    Parameters:
+    - sampling (str): Sampling strategy of simulate_horizon_values.
+    - num_simulations (int): Paths per run.
+    - repetitions (int): Number of independently seeded runs.
+    - years (int): Investment horizon.
+    - goal_ratio (float): Goal as a multiple of the initial investment.
+    - seed (int): First seed of the runs.
+
+    Returns:
+    - errors (dict): Standard deviation across runs of 'probability_of_success' and the 25th, 50th
+      and 75th percentiles.
+    """
+    from simulation_engine import simulate_horizon_values, weighted_success_probability, weighted_percentiles
+
+    estimates = []
+    for run in range(repetitions):
+        values, weights = simulate_horizon_values(1.0, 0.08, 0.15, [years], num_simulations, seed=seed + run,
+                                                  sampling=sampling, return_weights=True)
+        weights = None if weights is None else weights[:, 0]
+        estimates.append([weighted_success_probability(values[:, 0], goal_ratio, weights),
+                          *weighted_percentiles(values[:, 0], [25, 50, 75], weights)])
+    deviations = np.std(estimates, axis=0, ddof=1)
+    return dict(zip(["probability_of_success", "p25", "p50", "p75"], deviations.tolist()))
+
+
+def run_sampling_benchmarks(simulation_counts, repetitions, repeat=3, seed=0, years=10):
+    """
+    Benchmarks the sampling strategies by effective paths per second.
+
+    A strategy whose estimates have variance var at n paths is worth n * var_plain / var plain paths;
+    the smallest of these ratios over the success probability and the quartiles is used, so a
+    strategy only gets credit for the accuracy it delivers on every reported estimate.
+
+    Parameters:
+    - simulation_counts (list): Paths per run.
+    - repetitions (int): Seeded runs used to estimate each standard error.
+    - repeat (int): Timed runs per case.
+    - seed (int): First seed of the runs.
+    - years (int): Investment horizon.
+
+    Returns:
+    - results (dict): One result per strategy and path count, with its standard errors, variance
+      reduction and effective throughput relative to plain sampling.
+    """
+    from simulation_engine import SAMPLING_METHODS, simulate_horizon_values
+
+    results = {}
+    for num_simulations in simulation_counts:
+        plain_errors = sampling_standard_errors("plain", num_simulations, repetitions, years, seed=seed)
+        plain_throughput = None
+        for sampling in SAMPLING_METHODS:
+            errors = plain_errors if sampling == "plain" else sampling_standard_errors(
+                sampling, num_simulations, repetitions, years, seed=seed
+            )
+            variance_reduction = min((plain_errors[name] / errors[name]) ** 2 for name in errors if errors[name] > 0)
+            name = f"sampling[{sampling},n={num_simulations}]"
+            _record(results, name,
+                    lambda: simulate_horizon_values(1.0, 0.08, 0.15, [years], num_simulations, seed=seed,
+                                                    sampling=sampling, return_weights=True),
+                    num_simulations * variance_reduction, "effective paths/s",
+                    {"sampling": sampling, "num_simulations": num_simulations, "years": years,
+                     "repetitions": repetitions}, repeat)
+            plain_throughput = plain_throughput or results[name]["throughput"]
+            results[name].update({
+                "standard_errors": {key: round(value, 8) for key, value in errors.items()},
+                "variance_reduction": round(variance_reduction, 3),
+                "relative_to_plain": round(results[name]["throughput"] / plain_throughput, 3)
+            })
+    return results
+
+
+def run_pipeline_benchmarks(ticker_counts, repeat=3, seed=0):
+    """
+    Benchmarks run_pipeline end to end from replayed bars, cold (empty store) and warm (fresh store).
+
+    Parameters:
+    - ticker_counts (list): Numbers of tickers to load; extra synthetic tickers pad the asset classes.
+    - repeat (int): Timed runs per case.
+    - seed (int): Seed of the synthetic bars and goals.
+
+    Returns:
+    - results (dict): One result per case.
+    """
+    import matplotlib
+
+    # Plots are rendered off-screen so the benchmark never blocks on a window
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from data_providers import ReplayProvider
+    from market_data_store import MarketDataStore
+    from script import run_pipeline
+
+    results = {}
+    goals = synthetic_goals(3, seed)
+    user_data = {"age": 30, "income_stability": "stable", "risk_tolerance": "high"}
+    with tempfile.TemporaryDirectory() as root:
+        replay_root = os.path.join(root, "bars")
+        os.makedirs(replay_root)
+        max_tickers = max(ticker_counts)
+        tickers = ASSET_TICKERS + [f"SYN{index}.NS" for index in range(max(0, max_tickers - len(ASSET_TICKERS)))]
+        write_replay_files(replay_root, tickers, seed=seed)
+        provider = ReplayProvider(replay_root)
+
+        for ticker_count in ticker_counts:
+            selected = tickers[:ticker_count]
+            store_root = os.path.join(root, f"store_{ticker_count}")
+
+            def cold():
+                store = MarketDataStore(os.path.join(store_root, str(time.perf_counter_ns())))
+                run_pipeline(selected, 1000000, goals, user_data, TAX_RATES, FEES, INFLATION_RATE, store,
+                             provider=provider, asset_tickers=ASSET_CLASS_TICKERS)
+                plt.close("all")
+
+            warm_store = MarketDataStore(os.path.join(store_root, "warm"))
+
+            def warm():
+                run_pipeline(selected, 1000000, goals, user_data, TAX_RATES, FEES, INFLATION_RATE, warm_store,
+                             provider=provider, asset_tickers=ASSET_CLASS_TICKERS)
+                plt.close("all")
+
+            _record(results, f"run_pipeline_cold[tickers={ticker_count}]", cold, 1, "runs/s",
+                    {"tickers": ticker_count}, repeat)
+            _record(results, f"run_pipeline_warm[tickers={ticker_count}]", warm, 1, "runs/s",
+                    {"tickers": ticker_count}, repeat)
+    return results
+
+
+def environment_metadata(quick, repeat, seed):
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "quick": quick,
+        "repeat": repeat,
+        "seed": seed
+    }
+
+
+def compare_reports(baseline, current, tolerance=0.1, memory_tolerance=None):
+    """
+    Compares two benchmark reports metric by metric.
+
+    A metric regresses when it is worse than the baseline by more than the tolerance: throughput
+    lower than baseline * (1 - tolerance), or peak memory higher than baseline * (1 + tolerance).
+
+    Parameters:
+    - baseline (dict): Report of the reference run.
+    - current (dict): Report of the run under test.
+    - tolerance (float): Allowed relative slowdown (e.g., 0.1 for 10%).
+    - memory_tolerance (float): Allowed relative memory growth (defaults to tolerance).
+
+    Returns:
+    - regressions (list): One message per regressed metric.
+    - missing (list): Baseline cases absent from the current report.
+    """
+    memory_tolerance = tolerance if memory_tolerance is None else memory_tolerance
+    regressions, missing = [], []
+    for name, reference in baseline["results"].items():
+        result = current["results"].get(name)
+        if result is None:
+            missing.append(name)
+            continue
+        for metric, higher_is_better in TRACKED_METRICS.items():
+            before, after = reference[metric], result[metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            allowed = tolerance if higher_is_better else memory_tolerance
+            if (higher_is_better and change < -allowed) or (not higher_is_better and change > allowed):
+                regressions.append(f"{name}: {metric} {before:,.2f} -> {after:,.2f} ({change:+.1%})")
+    return regressions, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seeded, offline benchmarks of the simulation and pipeline hot paths.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Run the benchmarks and write a JSON report.")
+    run_parser.add_argument("--output", default="benchmark_results.json")
+    run_parser.add_argument("--quick", action="store_true", help="Use the reduced sweep.")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--seed", type=int, default=0)
+    compare_parser = commands.add_parser("compare", help="Fail if a report regresses against a baseline.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative throughput loss.")
+    compare_parser.add_argument("--memory-tolerance", type=float, help="Allowed relative peak memory growth.")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        report = run_benchmarks(args.quick, args.repeat, args.seed)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {len(report['results'])} results to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions, missing = compare_reports(baseline, current, args.tolerance, args.memory_tolerance)
+    for name in missing:
+        print(f"Missing from current report: {name}")
+    for message in regressions:
+        print(f"Regression: {message}")
+    if regressions:
+        return 1
+    print(f"No regressions across {len(baseline['results']) - len(missing)} cases.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
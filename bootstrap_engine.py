@@ -0,0 +1,306 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from asset_stats import close_price_panel
+from simulation_engine import DEFAULT_MAX_CHUNK_BYTES, run_tasks
+from instrumentation import increment
+
+# Trading days per year, used to cut bootstrapped daily histories into yearly returns
+PERIODS_PER_YEAR = 252
+DEFAULT_BLOCK_LENGTH = 20
+BOOTSTRAP_METHODS = ("stationary", "fixed")
+
+
+class ReturnHistory:
+    """
+    Daily multi-asset log-return history stored on disk and memory-mapped for the bootstrap.
+
+    The directory holds the returns, their prefix sums over the history laid out twice (so a block
+    wrapping around the end of the history is still one difference of two rows) and a small JSON
+    file with the asset names and sampling settings. Pickling only carries the directory, so worker
+    processes map the same pages instead of receiving copies.
+    """
+
+    def __init__(self, directory, block_length=DEFAULT_BLOCK_LENGTH, method="stationary",
+                 periods_per_year=PERIODS_PER_YEAR):
+        if method not in BOOTSTRAP_METHODS:
+            raise ValueError(f"Unknown bootstrap method: {method}")
+        if block_length < 1:
+            raise ValueError("The block length must be at least one period.")
+        self.directory = directory
+        self.block_length = block_length
+        self.method = method
+        self.periods_per_year = periods_per_year
+        self._open()
+
+    def _open(self):
+        with open(os.path.join(self.directory, "meta.json")) as f:
+            self.metadata = json.load(f)
+        self.assets = self.metadata["assets"]
+        self.index = {asset: position for position, asset in enumerate(self.assets)}
+        self.returns = np.load(os.path.join(self.directory, "returns.npy"), mmap_mode="r")
+        self.prefix = np.load(os.path.join(self.directory, "prefix.npy"), mmap_mode="r")
+
+    def __getstate__(self):
+        return {"directory": self.directory, "block_length": self.block_length, "method": self.method,
+                "periods_per_year": self.periods_per_year}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self):
+        return self.returns.shape[0]
+
+    @classmethod
+    def from_price_history(cls, price_data, directory=None, asset_tickers=None, price_field="Close", **settings):
+        """
+        Writes the joint daily log-return history of a price panel and opens it memory-mapped.
+
+        Only dates on which every asset has a return are kept, so sampled blocks always carry the
+        co-movement of all assets on the same days.
+
+        Parameters:
+        - price_data (DataFrame): Frame from fetch_financial_data or a (dates x tickers) price panel.
+        - directory (str): Where to store the arrays (a new temporary directory if omitted).
+        - asset_tickers (dict): Ticker holding each asset name (e.g., {'stocks': 'NSEI'}); all panel
+          tickers are used under their own names if omitted.
+        - price_field (str): OHLC field to use as the price.
+        - **settings: block_length, method and periods_per_year for sampling.
+
+        Returns:
+        - history (ReturnHistory): The stored history.
+        """
+        panel = close_price_panel(price_data, price_field)
+        asset_tickers = asset_tickers or {ticker: ticker for ticker in panel.columns}
+        prices = panel[list(asset_tickers.values())].to_numpy()
+        returns = np.diff(np.log(prices), axis=0)
+        returns = np.ascontiguousarray(returns[np.isfinite(returns).all(axis=1)])
+        if len(returns) == 0:
+            raise ValueError("The price history has no dates on which every asset has a return.")
+
+        directory = directory or tempfile.mkdtemp(prefix="return_history_")
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "returns.npy"), returns)
+        # Prefix sums over the history repeated twice: a block of length <= len(returns) starting
+        # anywhere sums to prefix[start + length] - prefix[start]
+        prefix = np.zeros((2 * len(returns) + 1, returns.shape[1]))
+        np.cumsum(np.concatenate([returns, returns]), axis=0, out=prefix[1:])
+        np.save(os.path.join(directory, "prefix.npy"), prefix)
+
+        digest = hashlib.sha256(repr(list(asset_tickers)).encode())
+        digest.update(returns.tobytes())
+        metadata = {
+            "assets": list(asset_tickers),
+            "tickers": list(asset_tickers.values()),
+            "rows": int(len(returns)),
+            "first_date": str(panel.index[0]),
+            "last_date": str(panel.index[-1]),
+            "content_hash": digest.hexdigest()
+        }
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump(metadata, f)
+        return cls(directory, **settings)
+
+    def positions(self, assets):
+        """
+        Maps asset names to their column positions.
+        """
+        return np.array([self.index[asset] for asset in assets], dtype=np.intp)
+
+    def fingerprint(self):
+        """
+        Returns a hash of the stored returns and the sampling settings (used by the result cache).
+        """
+        settings = f"{self.metadata['content_hash']}:{self.block_length}:{self.method}:{self.periods_per_year}"
+        return hashlib.sha256(settings.encode()).hexdigest()
+
+
+def block_layout(num_paths, total_periods, history_length, block_length, method, rng):
+    """
+    Draws the block starts and lengths covering total_periods for every path, vectorized.
+
+    'fixed' uses blocks of exactly block_length periods (circular block bootstrap); 'stationary'
+    (Politis-Romano) uses geometric block lengths with mean block_length, capped at the history
+    length. Block starts are uniform over the history and blocks wrap around its end.
+
+    Parameters:
+    - num_paths (int): Number of paths.
+    - total_periods (int): Periods each path must cover.
+    - history_length (int): Number of historical periods.
+    - block_length (int): Fixed or mean block length in periods.
+    - method (str): 'stationary' or 'fixed'.
+    - rng (Generator): NumPy random generator.
+
+    Returns:
+    - starts (ndarray), lengths (ndarray): Arrays of shape (num_paths, blocks); the blocks of a row
+      cover at least total_periods periods.
+    """
+    if method == "fixed":
+        block_length = min(block_length, history_length)
+        block_count = -(-total_periods // block_length)
+        lengths = np.full((num_paths, block_count), block_length, dtype=np.int64)
+    else:
+        # Draw a margin of extra blocks; top up the rare rows whose blocks fall short
+        block_count = int(np.ceil(total_periods / block_length * 1.25)) + 8
+        lengths = np.minimum(rng.geometric(1 / block_length, (num_paths, block_count)), history_length)
+        while True:
+            short = lengths.sum(axis=1) < total_periods
+            if not short.any():
+                break
+            extra = np.ones((num_paths, block_count), dtype=np.int64)
+            extra[short] = np.minimum(rng.geometric(1 / block_length, (int(short.sum()), block_count)),
+                                      history_length)
+            lengths = np.concatenate([lengths, extra], axis=1)
+    starts = rng.integers(0, history_length, lengths.shape)
+    return starts, lengths
+
+
+def bootstrap_block_indices(num_paths, total_periods, history_length, block_length=DEFAULT_BLOCK_LENGTH,
+                            method="stationary", rng=None):
+    """
+    Expands a block layout into the historical row index of every simulated period.
+
+    Parameters:
+    - num_paths (int): Number of paths.
+    - total_periods (int): Periods per path.
+    - history_length (int): Number of historical periods.
+    - block_length (int): Fixed or mean block length in periods.
+    - method (str): 'stationary' or 'fixed'.
+    - rng (Generator): NumPy random generator.
+
+    Returns:
+    - indices (ndarray): Array of shape (num_paths, total_periods) of rows into the history.
+    """
+    rng = rng or np.random.default_rng()
+    starts, lengths = block_layout(num_paths, total_periods, history_length, block_length, method, rng)
+    # Period t of a row lies in the block whose cumulative end first exceeds t
+    ends = np.cumsum(lengths, axis=1)
+    block = _rows_searchsorted(ends, np.arange(total_periods), side="right")
+    block_start_period = np.take_along_axis(ends - lengths, block, axis=1)
+    offsets = np.arange(total_periods) - block_start_period
+    return (np.take_along_axis(starts, block, axis=1) + offsets) % history_length
+
+
+def _rows_searchsorted(sorted_rows, values, side="left"):
+    # Row-wise searchsorted of the same values in every sorted row, as one flat search: row r is
+    # shifted by r * span so the rows stay sorted when concatenated
+    rows, width = sorted_rows.shape
+    span = max(int(sorted_rows[:, -1].max()), int(np.max(values, initial=0))) + 1 if width else 1
+    shift = np.arange(rows, dtype=np.int64)[:, None] * span
+    flat = (sorted_rows + shift).ravel()
+    positions = np.searchsorted(flat, (np.asarray(values)[None, :] + shift).ravel(), side=side)
+    return positions.reshape(rows, -1) - np.arange(rows)[:, None] * width
+
+
+def bootstrap_annual_returns(history, assets, years, num_simulations, rng):
+    """
+    Samples yearly simple returns of every asset by block-bootstrapping the daily history.
+
+    A block's log return is one difference of the memory-mapped prefix sums, so the cost grows with
+    the number of blocks, not the number of simulated days. The cumulative log return at each year
+    end is the sum of the blocks completed before it plus the covered part of the block it falls in.
+
+    Parameters:
+    - history (ReturnHistory): Daily return history and sampling settings.
+    - assets (list): Asset names, in the order of the returned columns.
+    - years (int): Number of yearly steps.
+    - num_simulations (int): Number of simulated paths.
+    - rng (Generator): NumPy random generator.
+
+    Returns:
+    - returns (ndarray): Array of shape (num_simulations, years, assets), like simulate_asset_returns.
+    """
+    columns = history.positions(assets)
+    periods = history.periods_per_year
+    starts, lengths = block_layout(num_simulations, years * periods, len(history), history.block_length,
+                                   history.method, rng)
+    # Each gather picks (row, column) pairs straight from the shared mapped prefix sums, so only the
+    # pages holding sampled rows are read and the history is never copied
+    prefix = history.prefix
+    columns = columns[None, None, :]
+
+    # Log return of every block and of every run of complete blocks, shape (paths, blocks + 1, assets)
+    block_sums = prefix[(starts + lengths)[:, :, None], columns] - prefix[starts[:, :, None], columns]
+    completed = np.zeros((num_simulations, lengths.shape[1] + 1, columns.size))
+    np.cumsum(block_sums, axis=1, out=completed[:, 1:])
+
+    # For every year end: blocks completed before it and the periods taken from the next block
+    ends = np.cumsum(lengths, axis=1)
+    year_ends = np.arange(1, years + 1) * periods
+    full_blocks = _rows_searchsorted(ends, year_ends, side="right")
+    covered = year_ends[None, :] - np.take_along_axis(np.concatenate([np.zeros((num_simulations, 1), np.int64),
+                                                                     ends], axis=1), full_blocks, axis=1)
+    partial_starts = np.take_along_axis(starts, np.minimum(full_blocks, starts.shape[1] - 1), axis=1)
+    partial = prefix[(partial_starts + covered)[:, :, None], columns] - prefix[partial_starts[:, :, None], columns]
+    cumulative = np.take_along_axis(completed, full_blocks[:, :, None], axis=1) + partial
+
+    # Yearly log returns to simple returns
+    yearly = np.diff(cumulative, axis=1, prepend=0.0)
+    return np.expm1(yearly)
+
+
+def _simulate_bootstrap_chunk(task):
+    """
+    Simulates one chunk of bootstrapped paths for every allocation (runs inside workers).
+    """
+    history, assets, weights, horizons, rows, seed_sequence = task
+    values = np.ones((rows, weights.shape[0], horizons.size))
+    max_years = int(horizons.max()) if horizons.size else 0
+    if max_years == 0:
+        return values
+    returns = bootstrap_annual_returns(history, assets, max_years, rows, np.random.default_rng(seed_sequence))
+    # Yearly rebalancing to the target weights, as in the multi-asset engine
+    growth = returns @ weights.T
+    growth += 1
+    np.cumprod(growth, axis=1, out=growth)
+    nonzero = horizons > 0
+    values[:, :, nonzero] = growth[:, horizons[nonzero] - 1, :].transpose(0, 2, 1)
+    return values
+
+
+def simulate_bootstrap_horizon_values(initial_investment, weights, history, assets, horizons, num_simulations=1000,
+                                      seed=None, workers=1, chunk_size=None, max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES):
+    """
+    Evaluates many allocations on block-bootstrapped historical returns in one batched call.
+
+    Parameters:
+    - initial_investment (float): Starting capital.
+    - weights (ndarray): Allocation matrix of shape (allocations, assets) with weights as fractions.
+    - history (ReturnHistory): Daily return history and sampling settings.
+    - assets (list): Asset names aligned with the weight columns.
+    - horizons (list): Investment horizons in years at which to read the portfolio value.
+    - num_simulations (int): Number of simulated paths.
+    - seed (int or SeedSequence): Root seed; each chunk draws from its own spawned stream, so a seeded
+      run is bit-identical for any number of workers.
+    - workers (int): Number of worker processes (they share the memory-mapped history).
+    - chunk_size (int): Paths per chunk; derived from max_chunk_bytes if omitted.
+    - max_chunk_bytes (int): Memory budget for the per-chunk block and growth arrays.
+
+    Returns:
+    - values (ndarray): Array of shape (num_simulations, allocations, len(horizons)).
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.float64))
+    horizons = np.asarray(horizons, dtype=np.int64).reshape(-1)
+    max_years = int(horizons.max()) if horizons.size else 0
+    if chunk_size is None:
+        # Block starts, lengths, ends and per-asset block sums, plus yearly returns and growth
+        blocks = max_years * history.periods_per_year / history.block_length * 1.25 + 9
+        bytes_per_path = (blocks * (3 + 2 * len(assets)) + max_years * (len(assets) + weights.shape[0])) * 8
+        chunk_size = max(1, int(max_chunk_bytes // max(1.0, bytes_per_path)))
+
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    starts = list(range(0, num_simulations, chunk_size))
+    tasks = [(history, list(assets), weights, horizons, min(chunk_size, num_simulations - start), stream)
+             for start, stream in zip(starts, seed_sequence.spawn(len(starts)))]
+
+    increment("paths_simulated", num_simulations)
+    values = np.empty((num_simulations, weights.shape[0], horizons.size))
+    for start, chunk_values in zip(starts, run_tasks(_simulate_bootstrap_chunk, tasks, workers)):
+        values[start:start + len(chunk_values)] = chunk_values
+    values *= initial_investment
+    return values
@@ -1,6 +1,7 @@
-import yfinance as yf
-import pandas as pd
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from data_providers import YFinanceProvider
 
 # Function to fetch financial data for Indian stocks/indices from Yahoo Finance
 def fetch_financial_data(tickers, period="5y", interval="1d"):
@@ -15,6 +16,8 @@ def fetch_financial_data(tickers, period="5y", interval="1d"):
     Returns:
     - data (DataFrame): Historical data of all tickers.
     """
+    import yfinance as yf
+
     try:
         data = yf.download(tickers, period=period, interval=interval, group_by='ticker')
         return data
@@ -34,6 +37,8 @@ def fetch_sentiment_data(tickers, source="news"):
     Returns:
     - sentiment_df (DataFrame): DataFrame containing sentiment scores.
     """
+    import pandas as pd
+
     sentiment_rows = []
     
     for ticker in tickers:
@@ -48,18 +53,168 @@ def fetch_sentiment_data(tickers, source="news"):
     sentiment_df = pd.DataFrame(sentiment_rows)
     return sentiment_df
 
+# Fetch one batch of tickers, retrying transient failures with exponential backoff
+def fetch_with_retries(provider, tickers, start=None, period="5y", interval="1d", timeout=30, retries=2, backoff=0.5):
+    """
+    Requests one batch of tickers from the provider, retrying failed attempts.
+
+    Parameters:
+    - provider (object): Data provider with a fetch(tickers, start, period, interval, timeout) method.
+    - tickers (list): Tickers requested together.
+    - start (Timestamp): First date to request (inclusive); the full period is used if omitted.
+    - period (str): Period for historical data when no start is given.
+    - interval (str): Data interval (e.g., '1d' for daily).
+    - timeout (float): Timeout in seconds for each attempt.
+    - retries (int): Additional attempts after the first failure.
+    - backoff (float): Delay before the first retry in seconds; doubled for every further retry.
+
+    Returns:
+    - frames (dict): DataFrame of bars per ticker.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return provider.fetch(tickers, start=start, period=period, interval=interval, timeout=timeout)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+# Bounded-parallel fetcher: every request runs on a capped thread pool and fails independently
+def fetch_price_batches(provider, requests, period="5y", interval="1d", max_workers=8, timeout=30, retries=2,
+                        backoff=0.5, executor=None):
+    """
+    Runs several provider requests concurrently and collects results and failures per ticker.
+
+    Parameters:
+    - provider (object): Data provider with a fetch(tickers, start, period, interval, timeout) method.
+    - requests (list): (tickers, start) pairs, one per request.
+    - period (str): Period for historical data when a request has no start.
+    - interval (str): Data interval (e.g., '1d' for daily).
+    - max_workers (int): Maximum number of requests in flight.
+    - timeout (float): Timeout in seconds for each attempt.
+    - retries (int): Additional attempts per request after a failure.
+    - backoff (float): Delay before the first retry in seconds; doubled for every further retry.
+    - executor (Executor): Optional existing thread pool to submit to instead of creating one.
+
+    Returns:
+    - frames (dict): DataFrame of bars per successfully fetched ticker.
+    - errors (dict): Error message per ticker whose request failed after all retries, or that the
+      provider left out of its response (unknown tickers, 404s, empty downloads).
+    """
+    frames, errors = {}, {}
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(fetch_with_retries, provider, batch, start, period, interval, timeout, retries, backoff): batch
+            for batch, start in requests
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                batch_frames = future.result()
+            except Exception as e:
+                for ticker in batch:
+                    errors[ticker] = f"{type(e).__name__}: {e}"
+                continue
+            frames.update(batch_frames)
+            for ticker in batch:
+                if ticker not in batch_frames:
+                    errors[ticker] = "no data returned"
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return frames, errors
+
+def plan_incremental_requests(tickers, store, period="5y", interval="1d", batch_size=None):
+    """
+    Plans the provider requests needed to bring each ticker's stored history up to date.
+
+    Parameters:
+    - tickers (list): List of asset tickers.
+    - store (MarketDataStore): Local store holding the existing history.
+    - period (str): Period for tickers that have no stored history yet.
+    - interval (str): Data interval (e.g., '1d' for daily).
+    - batch_size (int): Maximum tickers per request; tickers sharing a start date form one request if omitted.
+
+    Returns:
+    - requests (list): (tickers, start) pairs; start is the last stored date (inclusive), or None for
+      tickers without stored history.
+    """
+    # Group tickers by their last stored date, so each group needs a single start date. The last
+    # stored bar is fetched again, since it may have been a partial bar of an unfinished session
+    groups = {}
+    for ticker in tickers:
+        start = store.last_date(ticker, period, interval)
+        groups.setdefault(start, []).append(ticker)
+
+    requests = []
+    for start, group in groups.items():
+        size = batch_size or len(group)
+        requests.extend((group[i:i + size], start) for i in range(0, len(group), size))
+    return requests
+
+# Delta fetcher: only the last stored bar and newer ones are requested from the provider
+def fetch_incremental_financial_data(tickers, provider, store, period="5y", interval="1d", max_workers=1,
+                                     timeout=30, retries=0, backoff=0.5, batch_size=None, executor=None):
+    """
+    Brings the stored price history of each ticker up to date with a minimal request per ticker.
+
+    Parameters:
+    - tickers (list): List of asset tickers.
+    - provider (object): Data provider with a fetch(tickers, start, period, interval, timeout) method.
+    - store (MarketDataStore): Local store holding the existing history.
+    - period (str): Period for tickers that have no stored history yet.
+    - interval (str): Data interval (e.g., '1d' for daily).
+    - max_workers (int): Maximum number of requests in flight.
+    - timeout (float): Timeout in seconds for each attempt.
+    - retries (int): Additional attempts per request after a failure.
+    - backoff (float): Delay before the first retry in seconds; doubled for every further retry.
+    - batch_size (int): Maximum tickers per request.
+    - executor (Executor): Optional existing thread pool for the requests.
+
+    Returns:
+    - financial_data (DataFrame): Stored history of all tickers after merging the new bars.
+    - errors (dict): Error message per ticker that could not be refreshed or returned no data (its
+      stored history is kept).
+    """
+    requests = plan_incremental_requests(tickers, store, period, interval, batch_size)
+    frames, errors = fetch_price_batches(provider, requests, period, interval, max_workers, timeout, retries,
+                                         backoff, executor)
+
+    for ticker, frame in frames.items():
+        store.append(ticker, frame, period, interval)
+
+    for ticker, error in errors.items():
+        print(f"Error fetching data for {ticker}: {error}")
+    return store.read_panel(tickers, period, interval), errors
+
 # Combined fetcher for financial and sentiment data tailored to Indian market
-def fetch_data(tickers):
+def fetch_data(tickers, provider=None, store=None, period="5y", interval="1d"):
     """
     Fetches both financial and sentiment data for a comprehensive dataset.
 
     Parameters:
     - tickers (list): List of asset tickers (e.g., ['RELIANCE.NS', 'NSEI']).
+    - provider (object): Price data provider (defaults to YFinanceProvider; ReplayProvider for offline use).
+    - store (MarketDataStore): Optional local store; when given, only bars from the last stored date
+      on are requested for each ticker and merged into the stored history.
+    - period (str): Period for historical data (e.g., '5y' for five years).
+    - interval (str): Data interval (e.g., '1d' for daily).
 
     Returns:
     - combined_data (dict): Dictionary containing financial and sentiment data.
     """
-    financial_data = fetch_financial_data(tickers)
+    import pandas as pd
+
+    if store is not None:
+        financial_data, _ = fetch_incremental_financial_data(tickers, provider or YFinanceProvider(), store, period, interval)
+    elif provider is not None:
+        frames = provider.fetch(tickers, period=period, interval=interval)
+        financial_data = pd.concat(frames, axis=1) if frames else None
+    else:
+        financial_data = fetch_financial_data(tickers, period, interval)
     sentiment_data = fetch_sentiment_data(tickers)
 
     combined_data = {
@@ -69,10 +224,60 @@ def fetch_data(tickers):
     
     return combined_data
 
-# Example usage
-tickers = ["RELIANCE.NS", "TCS.NS", "NSEI", "^BSESN"]  # Example Indian stocks and indices
-result = fetch_data(tickers)
-print(result)
+# Concurrent fetcher: prices per ticker/batch and sentiment all in flight at once
+def fetch_data_concurrent(tickers, provider=None, store=None, period="5y", interval="1d", max_workers=8,
+                          timeout=30, retries=2, backoff=0.5, batch_size=1):
+    """
+    Fetches financial and sentiment data with bounded parallelism and per-ticker failure reporting.
+
+    Parameters:
+    - tickers (list): List of asset tickers (e.g., ['RELIANCE.NS', 'NSEI']).
+    - provider (object): Price data provider (defaults to YFinanceProvider).
+    - store (MarketDataStore): Optional local store; when given, only bars after the last stored date
+      are requested and merged into the stored history.
+    - period (str): Period for historical data (e.g., '5y' for five years).
+    - interval (str): Data interval (e.g., '1d' for daily).
+    - max_workers (int): Maximum number of price requests in flight.
+    - timeout (float): Timeout in seconds for each request attempt.
+    - retries (int): Additional attempts per request after a failure.
+    - backoff (float): Delay before the first retry in seconds; doubled for every further retry.
+    - batch_size (int): Tickers per price request (1 isolates every ticker's failures).
+
+    Returns:
+    - combined_data (dict): Financial data, sentiment data and an 'errors' dict of tickers that failed
+      or returned no data.
+    """
+    import pandas as pd
+
+    provider = provider or YFinanceProvider()
+    # Sentiment runs on its own thread alongside the capped pool of price requests
+    with ThreadPoolExecutor(max_workers=1) as sentiment_executor, \
+            ThreadPoolExecutor(max_workers=max_workers) as price_executor:
+        sentiment_future = sentiment_executor.submit(fetch_sentiment_data, tickers)
+        if store is not None:
+            financial_data, errors = fetch_incremental_financial_data(
+                tickers, provider, store, period, interval, max_workers, timeout, retries, backoff,
+                batch_size, price_executor
+            )
+        else:
+            requests = [(tickers[i:i + batch_size], None) for i in range(0, len(tickers), batch_size)]
+            frames, errors = fetch_price_batches(provider, requests, period, interval, max_workers, timeout,
+                                                 retries, backoff, price_executor)
+            ordered = {ticker: frames[ticker] for ticker in tickers if ticker in frames}
+            financial_data = pd.concat(ordered, axis=1) if ordered else None
+        sentiment_data = sentiment_future.result()
+
+    return {
+        "financial_data": financial_data,
+        "sentiment_data": sentiment_data,
+        "errors": errors
+    }
+
+if __name__ == "__main__":
+    # Example usage
+    tickers = ["RELIANCE.NS", "TCS.NS", "NSEI", "^BSESN"]  # Example Indian stocks and indices
+    result = fetch_data(tickers)
+    print(result)
 
 
 # Explanation
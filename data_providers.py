@@ -0,0 +1,188 @@
+import http.client
+import io
+import os
+import threading
+from urllib.parse import quote, urlencode, urlsplit
+
+from market_data_store import split_by_ticker, period_start
+
+
+class YFinanceProvider:
+    """
+    Price history provider backed by yf.download.
+    """
+
+    def __init__(self, session=None):
+        # An optional shared HTTP session lets concurrent requests reuse connections
+        self.session = session
+
+    def fetch(self, tickers, start=None, period="5y", interval="1d", timeout=None):
+        """
+        Downloads bars for the tickers, either the full period or only bars from start onwards.
+
+        Parameters:
+        - tickers (list): List of asset tickers.
+        - start (Timestamp): First date to download (inclusive); the full period is used if omitted.
+        - period (str): Period for historical data when no start is given.
+        - interval (str): Data interval (e.g., '1d' for daily).
+        - timeout (float): Request timeout in seconds.
+
+        Returns:
+        - frames (dict): DataFrame of bars per ticker.
+        """
+        # pandas and yfinance are only loaded when this provider actually downloads
+        import pandas as pd
+        import yfinance as yf
+
+        options = {"interval": interval, "group_by": 'ticker', "progress": False}
+        if timeout is not None:
+            options["timeout"] = timeout
+        if self.session is not None:
+            options["session"] = self.session
+        if start is None:
+            data = yf.download(tickers, period=period, **options)
+        else:
+            data = yf.download(tickers, start=pd.Timestamp(start).strftime("%Y-%m-%d"), **options)
+        if data is None or data.empty:
+            return {}
+        return split_by_ticker(data, list(tickers))
+
+
+class ReplayProvider:
+    """
+    Offline provider replaying stored bar files, one '<ticker>.csv' or '<ticker>.parquet' per ticker.
+
+    Useful for tests and reproducible runs without network access. The period is measured back from
+    the last bar in each file rather than from today, so replays stay deterministic.
+    """
+
+    def __init__(self, root, file_format="csv"):
+        self.root = root
+        self.file_format = file_format
+
+    def _load(self, ticker):
+        import pandas as pd
+
+        path = os.path.join(self.root, f"{quote(ticker, safe='')}.{self.file_format}")
+        if not os.path.exists(path):
+            return None
+        if self.file_format == "parquet":
+            frame = pd.read_parquet(path)
+        else:
+            frame = pd.read_csv(path, index_col=0, parse_dates=True)
+        frame.index = pd.DatetimeIndex(frame.index, name="Date")
+        return frame.sort_index()
+
+    def fetch(self, tickers, start=None, period="5y", interval="1d", timeout=None):
+        """
+        Replays bars for the tickers from local files.
+
+        Parameters:
+        - tickers (list): List of asset tickers; tickers without a file are left out.
+        - start (Timestamp): First date to return (inclusive); the full period is used if omitted.
+        - period (str): Period for historical data when no start is given.
+        - interval (str): Data interval (replay files are returned as stored).
+        - timeout (float): Unused; local files are read synchronously.
+
+        Returns:
+        - frames (dict): DataFrame of bars per ticker.
+        """
+        frames = {}
+        for ticker in tickers:
+            frame = self._load(ticker)
+            if frame is None:
+                continue
+            frames[ticker] = _restrict_to_window(frame, start, period)
+        return frames
+
+
+def _restrict_to_window(frame, start, period):
+    # Bars from start onwards, or the trailing period measured back from the last bar
+    import pandas as pd
+
+    if start is not None:
+        return frame[frame.index >= pd.Timestamp(start)]
+    if len(frame):
+        first = period_start(period, frame.index[-1])
+        if first is not None:
+            return frame[frame.index > first]
+    return frame
+
+
+class HTTPProvider:
+    """
+    Provider fetching one CSV of bars per ticker from an HTTP endpoint.
+
+    Requests go to base_url + path_template (with the quoted ticker filled in) and carry start,
+    period and interval as query parameters. Each thread keeps its own persistent keep-alive
+    connection, so concurrent fetches reuse connections instead of reconnecting per ticker.
+    Any server returning '<Date>,<field>,...' CSV works, including a plain local file server.
+    """
+
+    def __init__(self, base_url, path_template="/{ticker}.csv"):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.path_template = path_template
+        self._local = threading.local()
+
+    def _connection(self, timeout):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            connection = connection_class(self.host, self.port, timeout=timeout)
+            self._local.connection = connection
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection
+
+    def _get(self, path, timeout):
+        connection = self._connection(timeout)
+        try:
+            connection.request("GET", path, headers={"Connection": "keep-alive"})
+            response = connection.getresponse()
+            body = response.read()
+        except Exception:
+            # Drop the broken connection so the next attempt reconnects
+            connection.close()
+            self._local.connection = None
+            raise
+        if response.status == 404:
+            return None
+        if response.status != 200:
+            raise IOError(f"HTTP {response.status} for {path}")
+        return body
+
+    def fetch(self, tickers, start=None, period="5y", interval="1d", timeout=None):
+        """
+        Downloads bars for the tickers, one request per ticker over the thread's persistent connection.
+
+        Parameters:
+        - tickers (list): List of asset tickers; tickers the server does not know (404) are left out.
+        - start (Timestamp): First date to download (inclusive); the full period is used if omitted.
+        - period (str): Period for historical data when no start is given.
+        - interval (str): Data interval (e.g., '1d' for daily).
+        - timeout (float): Socket timeout in seconds for each request.
+
+        Returns:
+        - frames (dict): DataFrame of bars per ticker.
+        """
+        import pandas as pd
+
+        query = {"period": period, "interval": interval}
+        if start is not None:
+            query["start"] = pd.Timestamp(start).strftime("%Y-%m-%d")
+        frames = {}
+        for ticker in tickers:
+            path = self.base_path + self.path_template.format(ticker=quote(ticker, safe='')) + "?" + urlencode(query)
+            body = self._get(path, timeout)
+            if body is None:
+                continue
+            frame = pd.read_csv(io.BytesIO(body), index_col=0, parse_dates=True)
+            frame.index = pd.DatetimeIndex(frame.index, name="Date")
+            # Servers may ignore the query, so the window is enforced client-side as well
+            frames[ticker] = _restrict_to_window(frame.sort_index(), start, period)
+        return frames
@@ -1,7 +1,17 @@
 import numpy as np
-import pandas as pd
+from asset_stats import asset_return_vectors, asset_covariance
+from multi_asset_engine import simulate_allocation_horizon_values
+from bootstrap_engine import simulate_bootstrap_horizon_values
+from simulation_engine import (simulate_terminal_values, simulate_horizon_values, aggregate_horizon_values,
+                               adaptive_horizon_values, adaptive_batch_values, weighted_success_probability,
+                               weighted_percentiles, seed_snapshot, DEFAULT_MAX_CHUNK_BYTES)
+from streaming_stats import wilson_interval
+from goal_solver import solve_goal, model_growth_paths, adjustment_recommendation, bound_to_verdict
+from instrumentation import stage
 
-def monte_carlo_simulation(initial_investment, annual_return, annual_volatility, years, num_simulations=1000):
+def monte_carlo_simulation(initial_investment, annual_return, annual_volatility, years, num_simulations=1000,
+                           dtype=np.float64, seed=None, workers=1, chunk_size=None,
+                           max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES, sampling="plain"):
     """
     Runs a Monte Carlo simulation to project future investment values.
     
@@ -11,20 +21,24 @@ def monte_carlo_simulation(initial_investment, annual_return, annual_volatility,
     - annual_volatility (float): Annual volatility of returns.
     - years (int): Investment horizon in years.
     - num_simulations (int): Number of simulation runs.
+    - dtype (dtype): np.float32 or np.float64 precision for the simulated paths.
+    - seed (int or SeedSequence): Root seed making the run reproducible.
+    - workers (int): Number of worker processes to split the simulations across.
+    - chunk_size (int): Paths per chunk; each chunk draws from its own seed stream.
+    - max_chunk_bytes (int): Memory budget for the return matrix simulated at once.
+    - sampling (str): 'plain', 'antithetic' or 'sobol' sampling of the yearly returns.
     
     Returns:
-    - projections (list): List of simulated end values for each run.
+    - projections (ndarray): Simulated end values for each run.
     """
-    projections = []
-    for _ in range(num_simulations):
-        yearly_growth = np.random.normal(annual_return, annual_volatility, years)
-        end_value = initial_investment
-        for growth in yearly_growth:
-            end_value *= (1 + growth)
-        projections.append(end_value)
-    return projections
-
-def check_goal_feasibility(initial_investment, goal_amount, timeline_years, asset_allocation, financial_data):
+    return simulate_terminal_values(initial_investment, annual_return, annual_volatility, years, num_simulations,
+                                    dtype=dtype, seed=seed, workers=workers, chunk_size=chunk_size,
+                                    max_chunk_bytes=max_chunk_bytes, sampling=sampling)
+
+def check_goal_feasibility(initial_investment, goal_amount, timeline_years, asset_allocation, financial_data,
+                           seed=None, workers=1, chunk_size=None, return_model="scalar", aggregation="exact",
+                           num_simulations=1000, adaptive=False, tolerance=0.01, confidence=0.95,
+                           max_simulations=100000, return_history=None, sampling="plain"):
     """
     Evaluates if the user’s financial goal is feasible and provides suggestions if adjustments are needed.
     
@@ -33,32 +47,116 @@ def check_goal_feasibility(initial_investment, goal_amount, timeline_years, asse
     - goal_amount (float): Target future amount.
     - timeline_years (int): Investment horizon in years.
     - asset_allocation (dict): Percentage allocations for each asset class.
-    - financial_data (DataFrame): DataFrame containing returns and volatilities for assets.
+    - financial_data (DataFrame or AssetStats): Returns and volatilities for assets.
+    - seed (int): Optional root seed; the same seed gives bit-identical results for any worker count.
+    - workers (int): Number of worker processes used for the simulation.
+    - chunk_size (int): Paths simulated per chunk / seed stream.
+    - return_model (str): 'scalar' simulates one series with the weighted return and linearly weighted
+      volatility; 'multi_asset' simulates correlated per-asset returns from the covariance matrix;
+      'bootstrap' resamples blocks of the historical daily returns in return_history.
+    - aggregation (str): 'exact' keeps every projection; 'streaming' reduces chunks to a success count
+      and a quantile sketch as they are simulated (constant memory, scalar model only; percentiles
+      within the sketch's relative accuracy of the exact ones).
+    - num_simulations (int): Number of simulated paths (the batch size when adaptive).
+    - adaptive (bool): Simulate in batches of num_simulations until the confidence interval of the
+      success probability is within tolerance or entirely above or below the 75% cut (streamed,
+      scalar model only).
+    - tolerance (float): Target half-width of the confidence interval in adaptive mode (0 to 1).
+    - confidence (float): Confidence level of the reported interval.
+    - max_simulations (int): Cap on the total number of paths in adaptive mode.
+    - return_history (ReturnHistory): Historical returns of the allocation's assets, required by the
+      'bootstrap' return model.
+    - sampling (str): 'plain', 'antithetic', 'control_variate' or 'sobol' (scalar model, exact
+      aggregation); the variance-reduced strategies reach the plain standard error of the success
+      probability and percentiles with fewer paths (see the README's "Sampling strategies" section
+      for the run sizes at which each one pays off). The reported interval stays the plain-sampling
+      bound for the path count, which is conservative for them.
     
     Returns:
-    - result (dict): Feasibility status, projected values, and recommendations.
+    - result (dict): Feasibility status, projected values, recommendations, the number of paths
+      used and the width of the success probability's confidence interval (in percent). Infeasible
+      goals also carry 'required_investment', 'required_timeline_years' and 'achievable_goal_amount'
+      from goal_solver, solved on the very paths the probability was counted on (replayed from the
+      same seed streams), so they never contradict the verdict.
     """
     # Weighted average return and volatility based on allocation and financial data
-    weighted_return = 0
-    weighted_volatility = 0
-    for asset, allocation_percent in asset_allocation.items():
-        asset_return = financial_data[financial_data['ticker'] == asset]['annualized_return'].values[0]
-        asset_volatility = financial_data[financial_data['ticker'] == asset]['annualized_volatility'].values[0]
-        weight = allocation_percent / 100
-        weighted_return += weight * asset_return
-        weighted_volatility += weight * asset_volatility
+    asset_returns, asset_volatilities = asset_return_vectors(financial_data, asset_allocation.keys())
+    weights = np.fromiter(asset_allocation.values(), dtype=np.float64) / 100
+
+    if sampling != "plain" and (return_model != "scalar" or adaptive or aggregation == "streaming"):
+        raise ValueError("Sampling strategies other than 'plain' support the scalar model with exact aggregation only.")
+
+    # The goal solver replays the check's draws, so unseeded runs fix their entropy up front
+    seed = seed_snapshot(seed)
+    replay_seed = seed_snapshot(seed)
 
     # Run Monte Carlo simulations to project future value
-    projections = monte_carlo_simulation(initial_investment, weighted_return, weighted_volatility, timeline_years)
-    
-    # Calculate probability of achieving the goal
-    successful_runs = [p for p in projections if p >= goal_amount]
-    probability_of_success = len(successful_runs) / len(projections) * 100
+    if adaptive or aggregation == "streaming":
+        if return_model != "scalar":
+            raise ValueError("Streaming and adaptive aggregation support the scalar return model only.")
+        with stage("simulation"):
+            if adaptive:
+                summaries, _ = adaptive_horizon_values(initial_investment, weights @ asset_returns,
+                                                       weights @ asset_volatilities, [timeline_years], [goal_amount],
+                                                       num_simulations, max_simulations, 0.75, tolerance, confidence,
+                                                       seed=seed, workers=workers, chunk_size=chunk_size)
+            else:
+                summaries = aggregate_horizon_values(initial_investment, weights @ asset_returns,
+                                                     weights @ asset_volatilities, [timeline_years], [goal_amount],
+                                                     num_simulations, seed=seed, workers=workers,
+                                                     chunk_size=chunk_size)
+        paths_used = summaries[0].count
+        successes = summaries[0].success.successes
+        streamed = summaries[0].summary()
+        probability_of_success = streamed["probability_of_success"]
+        median_projection = streamed["median_projection"]
+        lower_projection, upper_projection = streamed["projection_range"]
+    else:
+        with stage("simulation"):
+            projections, path_weights = _simulate_projections(initial_investment, timeline_years, asset_allocation,
+                                                              financial_data, weights, asset_returns,
+                                                              asset_volatilities, num_simulations, seed, workers,
+                                                              chunk_size, return_model, return_history, sampling)
+        with stage("post_processing"):
+            # Calculate probability of achieving the goal
+            paths_used = len(projections)
+            if path_weights is None:
+                successes = int(np.count_nonzero(projections >= goal_amount))
+                probability_of_success = successes / paths_used * 100
+                median_projection = np.median(projections)
+                lower_projection, upper_projection = np.percentile(projections, 25), np.percentile(projections, 75)
+            else:
+                # Control-variate estimates from the weighted path distribution
+                probability = weighted_success_probability(projections, goal_amount, path_weights)
+                successes = probability * paths_used
+                probability_of_success = probability * 100
+                lower_projection, median_projection, upper_projection = weighted_percentiles(
+                    projections, [25, 50, 75], path_weights
+                )
 
-    # Recommendations based on success probability
-    recommendation = "Goal is achievable with current inputs." if probability_of_success >= 75 else (
-        "Consider increasing investment, extending timeline, or adjusting risk tolerance."
-    )
+    lower_probability, upper_probability = wilson_interval(successes, paths_used, confidence)
+
+    # Recommendations based on success probability, with concrete adjustments when the goal falls short
+    solution = {}
+    if probability_of_success >= 75:
+        recommendation = "Goal is achievable with current inputs."
+    else:
+        with stage("goal_solver"):
+            covariance = None
+            if return_model == "multi_asset":
+                covariance = asset_covariance(financial_data, asset_allocation.keys())
+            growth_paths = model_growth_paths(return_model, weights, asset_returns, asset_volatilities, covariance,
+                                              return_history, asset_allocation.keys(), num_simulations,
+                                              replay_seed, workers, chunk_size)
+            growth, growth_weights = _checked_growth(timeline_years, weights, asset_returns, asset_volatilities,
+                                                     num_simulations, replay_seed, workers, chunk_size, return_model,
+                                                     growth_paths, sampling, paths_used if adaptive else None)
+            solution = solve_goal(initial_investment, goal_amount, timeline_years, weights @ asset_returns,
+                                  weights @ asset_volatilities, num_simulations=num_simulations, seed=seed,
+                                  workers=workers, growth_paths=growth_paths, growth=growth,
+                                  path_weights=growth_weights)
+            solution = bound_to_verdict(solution, initial_investment, goal_amount, timeline_years)
+        recommendation = adjustment_recommendation(solution)
 
     # Compile result
     result = {
@@ -67,33 +165,84 @@ def check_goal_feasibility(initial_investment, goal_amount, timeline_years, asse
         "timeline_years": timeline_years,
         "probability_of_success": round(probability_of_success, 2),
         "recommendation": recommendation,
-        "median_projection": round(np.median(projections), 2),
-        "projection_range": (round(np.percentile(projections, 25), 2), round(np.percentile(projections, 75), 2))
+        "median_projection": round(median_projection, 2),
+        "projection_range": (round(lower_projection, 2), round(upper_projection, 2)),
+        "paths_used": paths_used,
+        "interval_width": round((upper_probability - lower_probability) * 100, 2)
     }
+    result.update(solution)
 
     return result
 
-# Example usage
-user_goal = {
-    "initial_investment": 50000,
-    "goal_amount": 150000,
-    "timeline_years": 10
-}
-asset_allocation = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
-financial_data = pd.DataFrame({
-    "ticker": ["stocks", "bonds", "real_estate", "crypto"],
-    "annualized_return": [0.12, 0.04, 0.07, 0.15],
-    "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
-})
-
-feasibility_result = check_goal_feasibility(
-    user_goal["initial_investment"],
-    user_goal["goal_amount"],
-    user_goal["timeline_years"],
-    asset_allocation,
-    financial_data
-)
-print(feasibility_result)
+
+def _checked_growth(timeline_years, weights, asset_returns, asset_volatilities, num_simulations, seed, workers,
+                    chunk_size, return_model, growth_paths, sampling="plain", adaptive_paths=None):
+    # Growth of one unit after every year up to the timeline along the paths the check counted, with
+    # their control-variate weights. The draws only depend on the seed streams, the chunk layout and
+    # the longest horizon, so extending the horizons to every year replays the same paths.
+    horizons = np.arange(1, timeline_years + 1)
+    if adaptive_paths is not None:
+        return adaptive_batch_values(1.0, weights @ asset_returns, weights @ asset_volatilities, horizons,
+                                     adaptive_paths, num_simulations, seed=seed, workers=workers,
+                                     chunk_size=chunk_size), None
+    if return_model == "scalar":
+        return simulate_horizon_values(1.0, weights @ asset_returns, weights @ asset_volatilities, horizons,
+                                       num_simulations, seed=seed, workers=workers, chunk_size=chunk_size,
+                                       sampling=sampling, return_weights=True)
+    # The multi-asset and bootstrap paths come from the model's own engine, drawn first from seed
+    return growth_paths(timeline_years), None
+
+
+def _simulate_projections(initial_investment, timeline_years, asset_allocation, financial_data, weights, asset_returns,
+                          asset_volatilities, num_simulations, seed, workers, chunk_size, return_model,
+                          return_history=None, sampling="plain"):
+    # Projections and their weights (None unless control variates reweight the paths)
+    if return_model == "bootstrap":
+        if return_history is None:
+            raise ValueError("The bootstrap return model needs a return_history.")
+        return simulate_bootstrap_horizon_values(initial_investment, weights, return_history,
+                                                 list(asset_allocation.keys()), [timeline_years], num_simulations,
+                                                 seed=seed, workers=workers, chunk_size=chunk_size)[:, 0, 0], None
+    if return_model == "multi_asset":
+        covariance = asset_covariance(financial_data, asset_allocation.keys())
+        return simulate_allocation_horizon_values(initial_investment, weights, asset_returns, covariance,
+                                                  [timeline_years], num_simulations, seed=seed, workers=workers,
+                                                  chunk_size=chunk_size)[:, 0, 0], None
+    weighted_return = weights @ asset_returns
+    weighted_volatility = weights @ asset_volatilities
+    if sampling == "control_variate":
+        values, path_weights = simulate_horizon_values(initial_investment, weighted_return, weighted_volatility,
+                                                       [timeline_years], num_simulations, seed=seed, workers=workers,
+                                                       chunk_size=chunk_size, sampling=sampling, return_weights=True)
+        return values[:, 0], path_weights[:, 0]
+    return monte_carlo_simulation(initial_investment, weighted_return, weighted_volatility, timeline_years,
+                                  num_simulations, seed=seed, workers=workers, chunk_size=chunk_size,
+                                  sampling=sampling), None
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    # Example usage
+    user_goal = {
+        "initial_investment": 50000,
+        "goal_amount": 150000,
+        "timeline_years": 10
+    }
+    asset_allocation = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
+    financial_data = pd.DataFrame({
+        "ticker": ["stocks", "bonds", "real_estate", "crypto"],
+        "annualized_return": [0.12, 0.04, 0.07, 0.15],
+        "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
+    })
+
+    feasibility_result = check_goal_feasibility(
+        user_goal["initial_investment"],
+        user_goal["goal_amount"],
+        user_goal["timeline_years"],
+        asset_allocation,
+        financial_data
+    )
+    print(feasibility_result)
 
 
 # Explanation of Key Components
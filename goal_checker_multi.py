@@ -1,84 +1,502 @@
+from functools import partial
+
 import numpy as np
-import pandas as pd
-from tax_adjustment import apply_taxes_and_fees, adjust_for_inflation
+from tax_adjustment import net_projections, sweep_net_costs
+from asset_stats import asset_return_vectors, asset_covariance
+from multi_asset_engine import simulate_allocation_horizon_values
+from bootstrap_engine import simulate_bootstrap_horizon_values
+from simulation_engine import (simulate_terminal_values, simulate_horizon_values, aggregate_horizon_values,
+                               adaptive_horizon_values, adaptive_batch_values, seed_snapshot, DEFAULT_MAX_CHUNK_BYTES)
+from streaming_stats import wilson_interval
+from goal_solver import (solve_goal, model_growth_paths, adjustment_recommendation, bound_to_verdict,
+                         DEFAULT_MAX_YEARS)
+from instrumentation import stage
+from result_cache import ENGINE_VERSION, stable_hash
 
 
-def monte_carlo_simulation_multi(initial_investment, annual_return, annual_volatility, years, num_simulations=1000):
-    projections = []
-    for _ in range(num_simulations):
-        yearly_growth = np.random.normal(annual_return, annual_volatility, years)
-        end_value = initial_investment
-        for growth in yearly_growth:
-            end_value *= (1 + growth)
-        projections.append(end_value)
-    return projections
+def monte_carlo_simulation_multi(initial_investment, annual_return, annual_volatility, years, num_simulations=1000,
+                                 dtype=np.float64, seed=None, workers=1, chunk_size=None,
+                                 max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES):
+    return simulate_terminal_values(initial_investment, annual_return, annual_volatility, years, num_simulations,
+                                    dtype=dtype, seed=seed, workers=workers, chunk_size=chunk_size,
+                                    max_chunk_bytes=max_chunk_bytes)
+
+def priority_adjusted_allocation(asset_allocation, priority):
+    # Adjust allocation based on goal priority
+    allocation = asset_allocation.copy()
+    if priority == "high":
+        allocation["bonds"] += 0.1
+        allocation["crypto"] -= 0.1
+    elif priority == "low":
+        allocation["stocks"] += 0.1
+        allocation["bonds"] -= 0.1
+    return allocation
+
+def weighted_return_and_volatility(allocation, financial_data):
+    # Calculate weighted return and volatility
+    asset_returns, asset_volatilities = asset_return_vectors(financial_data, allocation.keys())
+    weights = np.fromiter(allocation.values(), dtype=np.float64) / 100
+    weighted_return = weights @ asset_returns
+    weighted_volatility = weights @ asset_volatilities
+    return weighted_return, weighted_volatility
+
+def summarize_goal(goal, projections, tax_rates, fees, inflation_rate, confidence=0.95):
+    inflation_adjusted_projections = net_projections(projections, tax_rates, fees, inflation_rate,
+                                                     goal["timeline_years"])
+    return summarize_net_goal(goal, inflation_adjusted_projections, confidence)
+
+def summarize_net_goal(goal, inflation_adjusted_projections, confidence=0.95):
+    # Summary of projections that are already net of taxes, fees and inflation
+    goal_amount = goal["goal_amount"]
+    timeline_years = goal["timeline_years"]
+
+    # Goal success probability and recommendation
+    successes = int(np.count_nonzero(inflation_adjusted_projections >= goal_amount))
+    success_probability = successes / len(inflation_adjusted_projections) * 100
+    lower_probability, upper_probability = wilson_interval(successes, len(inflation_adjusted_projections), confidence)
+    recommendation = "Goal is achievable" if success_probability >= 75 else "Increase investment or extend timeline."
+
+    return {
+        "goal_amount": goal_amount,
+        "timeline_years": timeline_years,
+        "priority": goal["priority"],
+        "success_probability": round(success_probability, 2),
+        "median_projection": round(np.median(inflation_adjusted_projections), 2),
+        "projection_range": (round(np.percentile(inflation_adjusted_projections, 25), 2), 
+                             round(np.percentile(inflation_adjusted_projections, 75), 2)),
+        "recommendation": recommendation,
+        "paths_used": len(inflation_adjusted_projections),
+        "interval_width": round((upper_probability - lower_probability) * 100, 2)
+    }
+
+def net_of_costs(values, horizon, tax_rates, fees, inflation_rate):
+    # Taxes, fees and inflation for one chunk of projections at the given horizon, applied in place
+    return net_projections(values, tax_rates, fees, inflation_rate, horizon, out=values)
+
+def summarize_streamed_goal(goal, streaming_summary, confidence=0.95):
+    streamed = streaming_summary.summary()
+    lower_probability, upper_probability = wilson_interval(streaming_summary.success.successes,
+                                                           streaming_summary.count, confidence)
+    success_probability = streamed["probability_of_success"]
+    recommendation = "Goal is achievable" if success_probability >= 75 else "Increase investment or extend timeline."
+    lower_projection, upper_projection = streamed["projection_range"]
+
+    return {
+        "goal_amount": goal["goal_amount"],
+        "timeline_years": goal["timeline_years"],
+        "priority": goal["priority"],
+        "success_probability": round(success_probability, 2),
+        "median_projection": round(streamed["median_projection"], 2),
+        "projection_range": (round(lower_projection, 2), round(upper_projection, 2)),
+        "recommendation": recommendation,
+        "paths_used": streaming_summary.count,
+        "interval_width": round((upper_probability - lower_probability) * 100, 2)
+    }
+
+def check_multi_goal_feasibility(initial_investment, goals, asset_allocation, financial_data, tax_rates, fees, inflation_rate,
+                                 shared_paths=False, seed=None, workers=1, chunk_size=None, return_model="scalar",
+                                 aggregation="exact", num_simulations=1000, adaptive=False, tolerance=0.01,
+                                 confidence=0.95, max_simulations=100000, cache=None, return_projections=False,
+                                 return_history=None):
+    """
+    Evaluates every goal against its priority-adjusted allocation.
+
+    With shared_paths=True, goals whose priority-adjusted allocation is identical are evaluated
+    on one set of simulated paths: the paths run out to the longest horizon of the group and each
+    goal reads its value at its own timeline_years, so only distinct allocations trigger new draws.
+
+    Every goal (or shared-path group) simulates from its own stream spawned from seed, so a seeded
+    run is reproducible and bit-identical for any number of workers.
+
+    With return_model='multi_asset', correlated per-asset returns are drawn from the covariance
+    matrix; with shared_paths=True they are drawn once and every distinct allocation is applied to
+    the same draws in one batched call, otherwise every goal gets its own draws. return_model=
+    'bootstrap' does the same on blocks resampled from the historical daily returns in
+    return_history (a ReturnHistory), keeping their fat tails and volatility clustering. Both spread
+    their chunks across workers like the scalar model.
+
+    With aggregation='streaming', taxes, fees and inflation are applied to each simulated chunk and
+    the chunk is folded into a success counter and a quantile sketch (inside the workers when a
+    process pool is used), so memory stays constant however large num_simulations is.
+
+    With adaptive=True, every goal (or shared-path group) is streamed in batches of num_simulations
+    until the confidence interval of its net success probability is within tolerance or entirely
+    above or below the 75% cut, using at most max_simulations paths. Every result reports the paths
+    used and the width of that interval (in percent), so undecided goals are visible.
+
+    Goals below the 75% cut also get 'required_investment', 'required_timeline_years' and
+    'achievable_goal_amount' from goal_solver, net of fees and inflation and solved on the paths the
+    goal was checked on (replayed from its own seed stream), so they never contradict the verdict.
+
+    With a ResultCache and a seed, results are memoized under a hash of every input that affects
+    them (goals, allocation, the asset statistics' content, costs, seed, simulation options and
+    ENGINE_VERSION; not workers, which never change a seeded result). New market data changes the
+    asset statistics and therefore the key, so stale plans are never served. Unseeded runs are
+    random by design and always simulate afresh.
+
+    With return_projections=True (exact aggregation only), the net projection array of every goal
+    is returned as well, e.g. for report histograms: the result is (results, projections_by_goal).
+    """
+    if cache is not None and seed is not None:
+        key = stable_hash(ENGINE_VERSION, "multi_goal_feasibility", initial_investment, goals, asset_allocation,
+                          financial_data, tax_rates, fees, inflation_rate, shared_paths, seed, chunk_size,
+                          return_model, aggregation, num_simulations, adaptive, tolerance, confidence,
+                          max_simulations, return_projections, return_history)
+        return cache.get_or_compute(key, partial(
+            check_multi_goal_feasibility, initial_investment, goals, asset_allocation, financial_data, tax_rates,
+            fees, inflation_rate, shared_paths, seed, workers, chunk_size, return_model, aggregation,
+            num_simulations, adaptive, tolerance, confidence, max_simulations, return_projections=return_projections,
+            return_history=return_history
+        ))
 
-def check_multi_goal_feasibility(initial_investment, goals, asset_allocation, financial_data, tax_rates, fees, inflation_rate):
-    results = {}
     total_investment = initial_investment
-    for goal_name, goal in goals.items():
-        # Goal-specific details
-        goal_amount = goal["goal_amount"]
-        timeline_years = goal["timeline_years"]
-        priority = goal["priority"]
-
-        # Adjust allocation based on goal priority
-        allocation = asset_allocation.copy()
-        if priority == "high":
-            allocation["bonds"] += 0.1
-            allocation["crypto"] -= 0.1
-        elif priority == "low":
-            allocation["stocks"] += 0.1
-            allocation["bonds"] -= 0.1
-
-        # Calculate weighted return and volatility
-        weighted_return = 0
-        weighted_volatility = 0
-        for asset, allocation_percent in allocation.items():
-            asset_return = financial_data[financial_data['ticker'] == asset]['annualized_return'].values[0]
-            asset_volatility = financial_data[financial_data['ticker'] == asset]['annualized_volatility'].values[0]
-            weight = allocation_percent / 100
-            weighted_return += weight * asset_return
-            weighted_volatility += weight * asset_volatility
+    seed_sequence = np.random.SeedSequence(seed)
+    # The goal solver replays every goal's draws from the same streams
+    replay_sequence = seed_snapshot(seed_sequence)
+    simulation_options = {"num_simulations": num_simulations, "workers": workers, "chunk_size": chunk_size}
+    if adaptive or aggregation == "streaming":
+        if return_model != "scalar":
+            raise ValueError("Streaming and adaptive aggregation support the scalar return model only.")
+        if return_projections:
+            raise ValueError("Streaming and adaptive aggregation keep no projection arrays to return.")
+        transform = partial(net_of_costs, tax_rates=tax_rates, fees=fees, inflation_rate=inflation_rate)
+        adaptive_options = None
+        if adaptive:
+            adaptive_options = {"max_simulations": max_simulations, "tolerance": tolerance, "confidence": confidence}
+        # Post-processing runs inside the simulation chunks, so both are timed as one stage
+        with stage("simulation"):
+            summaries = _streamed_goal_summaries(total_investment, goals, asset_allocation, financial_data,
+                                                 shared_paths, seed_sequence, simulation_options, transform,
+                                                 adaptive_options)
+            results = {goal_name: summarize_streamed_goal(goal, summaries[goal_name], confidence)
+                       for goal_name, goal in goals.items()}
+        paths_used = {goal_name: result["paths_used"] for goal_name, result in results.items()} if adaptive else None
+        _add_goal_adjustments(results, total_investment, goals, asset_allocation, financial_data, tax_rates, fees,
+                              inflation_rate, replay_sequence, simulation_options, shared_paths, paths_used=paths_used)
+        return results
 
-        # Run simulation
-        projections = monte_carlo_simulation_multi(total_investment, weighted_return, weighted_volatility, timeline_years)
-        adjusted_projections = apply_taxes_and_fees(projections, tax_rates, fees, timeline_years)
-        inflation_adjusted_projections = adjust_for_inflation(adjusted_projections, inflation_rate, timeline_years)
-
-        # Goal success probability and recommendation
-        success_probability = len([p for p in inflation_adjusted_projections if p >= goal_amount]) / len(inflation_adjusted_projections) * 100
-        recommendation = "Goal is achievable" if success_probability >= 75 else "Increase investment or extend timeline."
-
-        results[goal_name] = {
-            "goal_amount": goal_amount,
-            "timeline_years": timeline_years,
-            "priority": priority,
-            "success_probability": round(success_probability, 2),
-            "median_projection": round(np.median(inflation_adjusted_projections), 2),
-            "projection_range": (round(np.percentile(inflation_adjusted_projections, 25), 2), 
-                                 round(np.percentile(inflation_adjusted_projections, 75), 2)),
-            "recommendation": recommendation
-        }
+    with stage("simulation"):
+        projections_by_goal = _goal_projections(total_investment, goals, asset_allocation, financial_data,
+                                                seed_sequence, simulation_options, shared_paths, return_model,
+                                                return_history)
+
+    results = {}
+    net_projections_by_goal = {}
+    with stage("post_processing"):
+        for goal_name, goal in goals.items():
+            net_projections_by_goal[goal_name] = net_projections(projections_by_goal[goal_name], tax_rates, fees,
+                                                                 inflation_rate, goal["timeline_years"])
+            results[goal_name] = summarize_net_goal(goal, net_projections_by_goal[goal_name], confidence)
+    _add_goal_adjustments(results, total_investment, goals, asset_allocation, financial_data, tax_rates, fees,
+                          inflation_rate, replay_sequence, simulation_options, shared_paths, return_model,
+                          return_history)
     
+    if return_projections:
+        return results, net_projections_by_goal
     return results
 
-# Example usage with multiple goals
-goals = {
-    "House": {"goal_amount": 2000000, "timeline_years": 15, "priority": "high"},
-    "Retirement": {"goal_amount": 10000000, "timeline_years": 30, "priority": "medium"},
-    "Education": {"goal_amount": 1000000, "timeline_years": 10, "priority": "low"}
-}
-initial_investment = 1000000
-asset_allocation = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
-financial_data = pd.DataFrame({
-    "ticker": ["stocks", "bonds", "real_estate", "crypto"],
-    "annualized_return": [0.12, 0.04, 0.07, 0.15],
-    "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
-})
-tax_rates = {"short_term": 0.15, "long_term": 0.10}
-fees = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}
-inflation_rate = 0.05
-
-multi_goal_results = check_multi_goal_feasibility(initial_investment, goals, asset_allocation, financial_data, tax_rates, fees, inflation_rate)
-print(multi_goal_results)
+def _goal_projections(initial_investment, goals, asset_allocation, financial_data, seed_sequence, simulation_options,
+                      shared_paths=False, return_model="scalar", return_history=None):
+    # Pre-tax projections of every goal for the exact aggregation modes
+    if return_model in ("multi_asset", "bootstrap"):
+        return _multi_asset_projections(initial_investment, goals, asset_allocation, financial_data, seed_sequence,
+                                        simulation_options["num_simulations"], simulation_options["chunk_size"],
+                                        return_model, return_history, simulation_options["workers"], shared_paths)
+    if shared_paths:
+        return _shared_path_projections(initial_investment, goals, asset_allocation, financial_data, seed_sequence,
+                                        simulation_options)
+    projections_by_goal = {}
+    for (goal_name, goal), goal_seed in zip(goals.items(), seed_sequence.spawn(len(goals))):
+        allocation = priority_adjusted_allocation(asset_allocation, goal["priority"])
+        weighted_return, weighted_volatility = weighted_return_and_volatility(allocation, financial_data)
+
+        # Run simulation
+        projections_by_goal[goal_name] = monte_carlo_simulation_multi(
+            initial_investment, weighted_return, weighted_volatility, goal["timeline_years"],
+            seed=goal_seed, **simulation_options
+        )
+    return projections_by_goal
+
+def sensitivity_sweep(initial_investment, goals, asset_allocation, financial_data, tax_rates, fees, inflation_rates,
+                      shared_paths=False, seed=None, workers=1, chunk_size=None, return_model="scalar",
+                      num_simulations=1000, return_history=None, projections_by_goal=None):
+    """
+    Answers what-if questions on taxes, fees and inflation without re-simulating.
+
+    The pre-tax projections are simulated once, exactly as check_multi_goal_feasibility with
+    aggregation='exact' draws them (so a seeded sweep point equals that run with the same costs),
+    and every combination of the scenario lists is applied to them with sweep_net_costs.
+
+    Parameters:
+    - initial_investment (float): Starting capital.
+    - goals (dict): Goals as passed to check_multi_goal_feasibility.
+    - asset_allocation (dict): Allocation before the per-priority adjustment.
+    - financial_data (AssetStats or DataFrame): Asset statistics.
+    - tax_rates (dict or list): Tax rate dict or a list of scenarios.
+    - fees (dict or list): Fee dict or a list of scenarios.
+    - inflation_rates (float or list): Inflation rate or a list of scenarios.
+    - shared_paths, seed, workers, chunk_size, return_model, num_simulations, return_history: As in
+      check_multi_goal_feasibility.
+    - projections_by_goal (dict): Pre-tax projections per goal to sweep instead of simulating.
+
+    Returns:
+    - sweep (DataFrame): One row per goal and scenario with the scenario indices and rates
+      ('tax_scenario', 'fee_scenario', 'short_term_tax', 'long_term_tax', 'total_fees',
+      'inflation_rate') and 'success_probability', 'median_projection', 'lower_quartile',
+      'upper_quartile' and 'iqr' of the net projections.
+    """
+    import pandas as pd
+
+    tax_rates = [tax_rates] if isinstance(tax_rates, dict) else list(tax_rates)
+    fees = [fees] if isinstance(fees, dict) else list(fees)
+    inflation_rates = np.atleast_1d(inflation_rates).astype(np.float64)
+    if projections_by_goal is None:
+        simulation_options = {"num_simulations": num_simulations, "workers": workers, "chunk_size": chunk_size}
+        with stage("simulation"):
+            projections_by_goal = _goal_projections(initial_investment, goals, asset_allocation, financial_data,
+                                                    np.random.SeedSequence(seed), simulation_options, shared_paths,
+                                                    return_model, return_history)
+
+    # Scenario columns in the (tax, fee, inflation) order of the sweep cubes
+    tax_index, fee_index, inflation_index = np.indices((len(tax_rates), len(fees), len(inflation_rates))).reshape(3, -1)
+    scenarios = {
+        "tax_scenario": tax_index,
+        "fee_scenario": fee_index,
+        "short_term_tax": np.array([tax_rate["short_term"] for tax_rate in tax_rates])[tax_index],
+        "long_term_tax": np.array([tax_rate["long_term"] for tax_rate in tax_rates])[tax_index],
+        "total_fees": np.array([sum(fee.values()) for fee in fees], dtype=np.float64)[fee_index],
+        "inflation_rate": inflation_rates[inflation_index]
+    }
+    frames = []
+    with stage("post_processing"):
+        for goal_name, goal in goals.items():
+            cube = sweep_net_costs(projections_by_goal[goal_name], goal["goal_amount"], goal["timeline_years"],
+                                   tax_rates, fees, inflation_rates, percentiles=(25, 75))
+            lower_quartile, upper_quartile = cube["percentile_25"].reshape(-1), cube["percentile_75"].reshape(-1)
+            frames.append(pd.DataFrame({
+                "goal": goal_name,
+                **scenarios,
+                "success_probability": cube["success_probability"].reshape(-1),
+                "median_projection": cube["median_projection"].reshape(-1),
+                "lower_quartile": lower_quartile,
+                "upper_quartile": upper_quartile,
+                "iqr": upper_quartile - lower_quartile
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+def _add_goal_adjustments(results, initial_investment, goals, asset_allocation, financial_data, tax_rates, fees,
+                          inflation_rate, seed_sequence, simulation_options, shared_paths=False, return_model="scalar",
+                          return_history=None, paths_used=None):
+    # Concrete investment / timeline / goal amount for every goal below the 75% cut. Fees and
+    # inflation are proportional to the projected value, so they enter the solver as per-horizon factors.
+    with stage("goal_solver"):
+        _solve_goal_adjustments(results, initial_investment, goals, asset_allocation, financial_data, tax_rates,
+                                fees, inflation_rate, seed_sequence, simulation_options, shared_paths, return_model,
+                                return_history, paths_used)
+
+def _solve_goal_adjustments(results, initial_investment, goals, asset_allocation, financial_data, tax_rates, fees,
+                            inflation_rate, seed_sequence, simulation_options, shared_paths=False,
+                            return_model="scalar", return_history=None, paths_used=None):
+    infeasible = [goal_name for goal_name in goals if results[goal_name]["success_probability"] < 75]
+    if not infeasible:
+        return
+    # The paths every goal was checked on, replayed from a snapshot of the check's root stream
+    checked_growth = _checked_growth_paths(set(infeasible), goals, asset_allocation, financial_data,
+                                           seed_snapshot(seed_sequence), simulation_options, shared_paths,
+                                           return_model, return_history, paths_used)
+    for goal_name in infeasible:
+        goal = goals[goal_name]
+        allocation = priority_adjusted_allocation(asset_allocation, goal["priority"])
+        asset_returns, asset_volatilities = asset_return_vectors(financial_data, allocation.keys())
+        weights = np.fromiter(allocation.values(), dtype=np.float64) / 100
+        covariance = None
+        if return_model == "multi_asset":
+            covariance = asset_covariance(financial_data, allocation.keys())
+        # Longer timelines are searched on fresh paths of the same return model
+        growth_paths = model_growth_paths(return_model, weights, asset_returns, asset_volatilities, covariance,
+                                          return_history, allocation.keys(), simulation_options["num_simulations"],
+                                          seed_snapshot(seed_sequence), simulation_options["workers"],
+                                          simulation_options["chunk_size"])
+        max_years = max(DEFAULT_MAX_YEARS, goal["timeline_years"])
+        cost_factors = net_projections(np.ones(max_years), tax_rates, fees, inflation_rate,
+                                       np.arange(1, max_years + 1))
+        solution = solve_goal(initial_investment, goal["goal_amount"], goal["timeline_years"], weights @ asset_returns,
+                              weights @ asset_volatilities, max_years=max_years,
+                              num_simulations=simulation_options["num_simulations"],
+                              workers=simulation_options["workers"], cost_factors=cost_factors,
+                              growth_paths=growth_paths, growth=checked_growth[goal_name])
+        solution = bound_to_verdict(solution, initial_investment, goal["goal_amount"], goal["timeline_years"])
+        results[goal_name].update(solution)
+        results[goal_name]["recommendation"] = adjustment_recommendation(solution)
+
+def _checked_growth_paths(goal_names, goals, asset_allocation, financial_data, seed_sequence, simulation_options,
+                          shared_paths=False, return_model="scalar", return_history=None, paths_used=None):
+    # Growth of one unit after every year up to each goal's timeline along the paths it was checked
+    # on. Every goal or shared-path group is replayed from the same stream, allocation matrix and
+    # chunk layout as the check, and the draws only depend on the longest horizon, so extending the
+    # horizons to every year leaves them unchanged. Groups without any of goal_names are skipped.
+    num_simulations, workers, chunk_size = (simulation_options[name]
+                                            for name in ("num_simulations", "workers", "chunk_size"))
+    growth_by_goal = {}
+    if return_model in ("multi_asset", "bootstrap"):
+        if shared_paths:
+            batches = [(list(goals), seed_sequence)]
+        else:
+            batches = [([goal_name], goal_seed) for goal_name, goal_seed in zip(goals, seed_sequence.spawn(len(goals)))]
+        for batch_names, batch_seed in batches:
+            if goal_names.isdisjoint(batch_names):
+                continue
+            batch_goals = {goal_name: goals[goal_name] for goal_name in batch_names}
+            weights, rows = _allocation_matrix(batch_goals, asset_allocation)
+            horizons = np.arange(1, max(goal["timeline_years"] for goal in batch_goals.values()) + 1)
+            values = _allocation_values(1.0, weights, asset_allocation, financial_data, horizons, num_simulations,
+                                        batch_seed, workers, chunk_size, return_model, return_history)
+            for goal_name in batch_names:
+                growth_by_goal[goal_name] = values[:, rows[goal_name], :goals[goal_name]["timeline_years"]]
+        return growth_by_goal
+
+    if shared_paths:
+        groups = _allocation_groups(goals, asset_allocation)
+    else:
+        groups = [(priority_adjusted_allocation(asset_allocation, goal["priority"]), [goal_name])
+                  for goal_name, goal in goals.items()]
+    for (allocation, group_names), group_seed in zip(groups, seed_sequence.spawn(len(groups))):
+        if goal_names.isdisjoint(group_names):
+            continue
+        weighted_return, weighted_volatility = weighted_return_and_volatility(allocation, financial_data)
+        horizons = np.arange(1, max(goals[goal_name]["timeline_years"] for goal_name in group_names) + 1)
+        if paths_used is not None:
+            values = adaptive_batch_values(1.0, weighted_return, weighted_volatility, horizons,
+                                           paths_used[group_names[0]], num_simulations, seed=group_seed,
+                                           workers=workers, chunk_size=chunk_size)
+        else:
+            values = simulate_horizon_values(1.0, weighted_return, weighted_volatility, horizons, num_simulations,
+                                             seed=group_seed, workers=workers, chunk_size=chunk_size)
+        for goal_name in group_names:
+            growth_by_goal[goal_name] = values[:, :goals[goal_name]["timeline_years"]]
+    return growth_by_goal
+
+def _allocation_groups(goals, asset_allocation):
+    # Group goals by their effective (priority-adjusted) allocation
+    groups = {}
+    for goal_name, goal in goals.items():
+        allocation = priority_adjusted_allocation(asset_allocation, goal["priority"])
+        key = tuple(sorted(allocation.items()))
+        groups.setdefault(key, (allocation, []))[1].append(goal_name)
+    return list(groups.values())
+
+def _streamed_goal_summaries(initial_investment, goals, asset_allocation, financial_data, shared_paths, seed_sequence,
+                             simulation_options, transform, adaptive_options=None):
+    # Same grouping and seed streams as the exact modes: one simulation per goal or per shared-path group
+    if shared_paths:
+        groups = _allocation_groups(goals, asset_allocation)
+    else:
+        groups = [(priority_adjusted_allocation(asset_allocation, goal["priority"]), [goal_name])
+                  for goal_name, goal in goals.items()]
+
+    summaries = {}
+    for (allocation, goal_names), group_seed in zip(groups, seed_sequence.spawn(len(groups))):
+        weighted_return, weighted_volatility = weighted_return_and_volatility(allocation, financial_data)
+        horizons = [goals[goal_name]["timeline_years"] for goal_name in goal_names]
+        goal_amounts = [goals[goal_name]["goal_amount"] for goal_name in goal_names]
+        if adaptive_options is not None:
+            # A shared-path group keeps sampling until every goal in it is settled
+            group_summaries, _ = adaptive_horizon_values(
+                initial_investment, weighted_return, weighted_volatility, horizons, goal_amounts,
+                simulation_options["num_simulations"], transform=transform, seed=group_seed,
+                workers=simulation_options["workers"], chunk_size=simulation_options["chunk_size"],
+                **adaptive_options
+            )
+        else:
+            group_summaries = aggregate_horizon_values(initial_investment, weighted_return, weighted_volatility,
+                                                       horizons, goal_amounts, transform=transform, seed=group_seed,
+                                                       **simulation_options)
+        summaries.update(zip(goal_names, group_summaries))
+    return summaries
+
+def _shared_path_projections(initial_investment, goals, asset_allocation, financial_data, seed_sequence,
+                             simulation_options):
+    groups = _allocation_groups(goals, asset_allocation)
+
+    # One simulation per group, read off at each goal's horizon
+    projections_by_goal = {}
+    for (allocation, goal_names), group_seed in zip(groups, seed_sequence.spawn(len(groups))):
+        weighted_return, weighted_volatility = weighted_return_and_volatility(allocation, financial_data)
+        horizons = [goals[goal_name]["timeline_years"] for goal_name in goal_names]
+        values = simulate_horizon_values(initial_investment, weighted_return, weighted_volatility, horizons,
+                                         seed=group_seed, **simulation_options)
+        for column, goal_name in enumerate(goal_names):
+            projections_by_goal[goal_name] = values[:, column]
+    return projections_by_goal
+
+def _multi_asset_projections(initial_investment, goals, asset_allocation, financial_data, seed_sequence,
+                             num_simulations, chunk_size, return_model="multi_asset", return_history=None, workers=1,
+                             shared_paths=True):
+    if not shared_paths:
+        # Every goal draws from its own stream, as in the scalar model
+        projections_by_goal = {}
+        for (goal_name, goal), goal_seed in zip(goals.items(), seed_sequence.spawn(len(goals))):
+            projections_by_goal.update(_multi_asset_projections(
+                initial_investment, {goal_name: goal}, asset_allocation, financial_data, goal_seed, num_simulations,
+                chunk_size, return_model, return_history, workers
+            ))
+        return projections_by_goal
+
+    weights, rows = _allocation_matrix(goals, asset_allocation)
+    horizons = sorted({goal["timeline_years"] for goal in goals.values()})
+    values = _allocation_values(initial_investment, weights, asset_allocation, financial_data, horizons,
+                                num_simulations, seed_sequence, workers, chunk_size, return_model, return_history)
+
+    projections_by_goal = {}
+    for goal_name, goal in goals.items():
+        projections_by_goal[goal_name] = values[:, rows[goal_name], horizons.index(goal["timeline_years"])]
+    return projections_by_goal
+
+def _allocation_matrix(goals, asset_allocation):
+    # Distinct priority-adjusted allocations become rows of one weight matrix; rows maps goals to them
+    assets = list(asset_allocation.keys())
+    allocation_rows = {}
+    rows = {}
+    for goal_name, goal in goals.items():
+        allocation = priority_adjusted_allocation(asset_allocation, goal["priority"])
+        rows[goal_name] = allocation_rows.setdefault(tuple(allocation[asset] for asset in assets), len(allocation_rows))
+    return np.array(list(allocation_rows.keys()), dtype=np.float64) / 100, rows
+
+def _allocation_values(initial_investment, weights, asset_allocation, financial_data, horizons, num_simulations,
+                       seed_sequence, workers, chunk_size, return_model="multi_asset", return_history=None):
+    # Values of every allocation row at every horizon on one set of per-asset draws
+    assets = list(asset_allocation.keys())
+    if return_model == "bootstrap":
+        if return_history is None:
+            raise ValueError("The bootstrap return model needs a return_history.")
+        return simulate_bootstrap_horizon_values(initial_investment, weights, return_history, assets, horizons,
+                                                 num_simulations, seed=seed_sequence, workers=workers,
+                                                 chunk_size=chunk_size)
+    asset_returns, _ = asset_return_vectors(financial_data, assets)
+    covariance = asset_covariance(financial_data, assets)
+    return simulate_allocation_horizon_values(initial_investment, weights, asset_returns, covariance, horizons,
+                                              num_simulations, seed=seed_sequence, workers=workers,
+                                              chunk_size=chunk_size)
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    # Example usage with multiple goals
+    goals = {
+        "House": {"goal_amount": 2000000, "timeline_years": 15, "priority": "high"},
+        "Retirement": {"goal_amount": 10000000, "timeline_years": 30, "priority": "medium"},
+        "Education": {"goal_amount": 1000000, "timeline_years": 10, "priority": "low"}
+    }
+    initial_investment = 1000000
+    asset_allocation = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
+    financial_data = pd.DataFrame({
+        "ticker": ["stocks", "bonds", "real_estate", "crypto"],
+        "annualized_return": [0.12, 0.04, 0.07, 0.15],
+        "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
+    })
+    tax_rates = {"short_term": 0.15, "long_term": 0.10}
+    fees = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}
+    inflation_rate = 0.05
+
+    multi_goal_results = check_multi_goal_feasibility(initial_investment, goals, asset_allocation, financial_data, tax_rates, fees, inflation_rate)
+    print(multi_goal_results)
@@ -0,0 +1,358 @@
+from collections import OrderedDict
+from functools import partial
+
+import numpy as np
+
+from simulation_engine import simulate_horizon_values, weighted_success_probability
+
+# Normalized growth paths keyed by their simulation inputs, so repeated solves skip the Monte Carlo run
+_GROWTH_CACHE = OrderedDict()
+GROWTH_CACHE_SIZE = 16
+# Feasibility cut used by the goal checkers
+DEFAULT_TARGET_PROBABILITY = 0.75
+# Longest timeline the solver searches (in years)
+DEFAULT_MAX_YEARS = 50
+
+
+def cached_growth_paths(annual_return, annual_volatility, max_years=DEFAULT_MAX_YEARS, num_simulations=1000, seed=None,
+                        workers=1, chunk_size=None):
+    """
+    Returns the growth of one unit of capital after every year from 1 to max_years.
+
+    Terminal wealth scales linearly with the initial investment, so these normalized paths answer
+    any investment, timeline or goal amount question for the same return assumptions. Path sets
+    with an integer seed are cached; others are simulated afresh on every call.
+
+    Parameters:
+    - annual_return (float): Expected annual return rate.
+    - annual_volatility (float): Annual volatility of returns.
+    - max_years (int): Longest horizon simulated.
+    - num_simulations (int): Number of simulated paths.
+    - seed (int): Root seed of the simulation.
+    - workers (int): Number of worker processes used for the simulation.
+    - chunk_size (int): Paths per chunk / seed stream.
+
+    Returns:
+    - growth (ndarray): Read-only array of shape (num_simulations, max_years); column t holds the
+      growth after t + 1 years.
+    """
+    # A SeedSequence advances as streams are spawned from it, so only integer seeds name a path set
+    cacheable = isinstance(seed, (int, np.integer))
+    key = (float(annual_return), float(annual_volatility), int(max_years), int(num_simulations), seed, chunk_size)
+    growth = _GROWTH_CACHE.get(key) if cacheable else None
+    if growth is not None:
+        _GROWTH_CACHE.move_to_end(key)
+        return growth
+
+    growth = simulate_horizon_values(1.0, annual_return, annual_volatility, np.arange(1, max_years + 1),
+                                     num_simulations, seed=seed, workers=workers, chunk_size=chunk_size)
+    growth.setflags(write=False)
+    if cacheable:
+        _GROWTH_CACHE[key] = growth
+        if len(_GROWTH_CACHE) > GROWTH_CACHE_SIZE:
+            _GROWTH_CACHE.popitem(last=False)
+    return growth
+
+
+def success_probability(growth, initial_investment, goal_amount, timeline_years, weights=None):
+    """
+    Fraction of paths on which the investment reaches the goal amount (0 to 1), optionally with the
+    per-horizon path weights of a control-variate run.
+    """
+    if timeline_years == 0:
+        return float(initial_investment >= goal_amount)
+    # One vector compare: investment * growth >= goal  <=>  growth >= goal / investment
+    if initial_investment <= 0:
+        return float(goal_amount <= 0)
+    column = growth[:, timeline_years - 1]
+    if weights is not None:
+        return weighted_success_probability(column, goal_amount / initial_investment, weights[:, timeline_years - 1])
+    return int(np.count_nonzero(column >= goal_amount / initial_investment)) / len(column)
+
+
+def _bisect(is_feasible, low, high, tolerance):
+    # Smallest feasible value in (low, high] when larger values are more feasible
+    while high - low > tolerance:
+        middle = (low + high) / 2
+        if is_feasible(middle):
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def minimum_investment(growth, goal_amount, timeline_years, target_probability=DEFAULT_TARGET_PROBABILITY,
+                       tolerance=1.0, weights=None):
+    """
+    Finds the smallest initial investment reaching the goal with the target probability.
+
+    Parameters:
+    - growth (ndarray): Normalized growth paths from cached_growth_paths.
+    - goal_amount (float): Target future amount.
+    - timeline_years (int): Investment horizon in years.
+    - target_probability (float): Required success probability (0 to 1).
+    - tolerance (float): Precision of the returned amount.
+    - weights (ndarray): Optional path weights aligned with growth.
+
+    Returns:
+    - investment (float): Minimum initial investment, or None if no investment suffices (e.g., too
+      many paths end at or below zero).
+    """
+    def is_feasible(investment):
+        return success_probability(growth, investment, goal_amount, timeline_years, weights) >= target_probability
+
+    if is_feasible(0.0):
+        return 0.0
+    # Grow the upper bound until it is feasible, then bisect
+    high = max(float(goal_amount), tolerance)
+    while not is_feasible(high):
+        high *= 2
+        if high > goal_amount * 1e12:
+            return None
+    return _bisect(is_feasible, 0.0, high, tolerance)
+
+
+def shortest_timeline(growth, initial_investment, goal_amount, target_probability=DEFAULT_TARGET_PROBABILITY,
+                      weights=None):
+    """
+    Finds the fewest whole years after which the goal is reached with the target probability.
+
+    Success probability generally rises with the horizon for a positive expected return, which the
+    bisection over years relies on; the returned timeline is always checked to be feasible.
+
+    Parameters:
+    - growth (ndarray): Normalized growth paths from cached_growth_paths.
+    - initial_investment (float): Starting capital.
+    - goal_amount (float): Target future amount.
+    - target_probability (float): Required success probability (0 to 1).
+    - weights (ndarray): Optional path weights aligned with growth.
+
+    Returns:
+    - years (int): Shortest feasible timeline, or None if not reached within the simulated horizon.
+    """
+    def is_feasible(years):
+        return success_probability(growth, initial_investment, goal_amount, years, weights) >= target_probability
+
+    low, high = 0, growth.shape[1]
+    if is_feasible(low):
+        return low
+    if not is_feasible(high):
+        return None
+    while high - low > 1:
+        middle = (low + high) // 2
+        if is_feasible(middle):
+            high = middle
+        else:
+            low = middle
+    return high
+
+
+def maximum_goal_amount(growth, initial_investment, timeline_years, target_probability=DEFAULT_TARGET_PROBABILITY,
+                        tolerance=1.0, weights=None):
+    """
+    Finds the largest goal amount reached with the target probability.
+
+    Parameters:
+    - growth (ndarray): Normalized growth paths from cached_growth_paths.
+    - initial_investment (float): Starting capital.
+    - timeline_years (int): Investment horizon in years.
+    - target_probability (float): Required success probability (0 to 1).
+    - tolerance (float): Precision of the returned amount.
+    - weights (ndarray): Optional path weights aligned with growth.
+
+    Returns:
+    - goal_amount (float): Largest achievable goal amount, or None if even a zero goal is out of reach.
+    """
+    def is_feasible(goal_amount):
+        return success_probability(growth, initial_investment, goal_amount, timeline_years, weights) >= target_probability
+
+    if timeline_years == 0:
+        return float(initial_investment)
+    low, high = 0.0, float(initial_investment * growth[:, timeline_years - 1].max())
+    if not is_feasible(low):
+        return None
+    if is_feasible(high):
+        return high
+    while high - low > tolerance:
+        middle = (low + high) / 2
+        if is_feasible(middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def model_growth_paths(return_model, weights, asset_returns, asset_volatilities, covariance=None,
+                       return_history=None, assets=None, num_simulations=1000, seed=None, workers=1,
+                       chunk_size=None):
+    """
+    Returns a growth_paths(max_years) function for solve_goal drawing from the given return model.
+
+    Parameters:
+    - return_model (str): 'scalar', 'multi_asset' or 'bootstrap', as in check_goal_feasibility.
+    - weights (ndarray): Allocation weights as fractions, aligned with the assets.
+    - asset_returns (ndarray): Expected annual return per asset.
+    - asset_volatilities (ndarray): Annual volatility per asset (scalar model).
+    - covariance (ndarray): Annualized covariance matrix of the assets (multi_asset model).
+    - return_history (ReturnHistory): Historical daily returns (bootstrap model).
+    - assets (list): Asset names aligned with the weights (bootstrap model).
+    - num_simulations (int): Number of simulated paths.
+    - seed (int): Root seed of the simulation.
+    - workers (int): Number of worker processes used for the simulation.
+    - chunk_size (int): Paths per chunk / seed stream.
+
+    Returns:
+    - growth_paths (callable): Maps max_years to normalized growth paths of shape
+      (num_simulations, max_years). Only the scalar model's integer-seeded paths are cached.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if return_model == "scalar":
+        return partial(cached_growth_paths, weights @ asset_returns, weights @ asset_volatilities,
+                       num_simulations=num_simulations, seed=seed, workers=workers, chunk_size=chunk_size)
+    if return_model == "multi_asset":
+        from multi_asset_engine import simulate_allocation_horizon_values
+
+        def growth_paths(max_years):
+            return simulate_allocation_horizon_values(1.0, weights, asset_returns, covariance,
+                                                      np.arange(1, max_years + 1), num_simulations, seed=seed,
+                                                      workers=workers, chunk_size=chunk_size)[:, 0, :]
+        return growth_paths
+    if return_model == "bootstrap":
+        from bootstrap_engine import simulate_bootstrap_horizon_values
+
+        if return_history is None:
+            raise ValueError("The bootstrap return model needs a return_history.")
+
+        def growth_paths(max_years):
+            return simulate_bootstrap_horizon_values(1.0, weights, return_history, list(assets),
+                                                     np.arange(1, max_years + 1), num_simulations, seed=seed,
+                                                     workers=workers, chunk_size=chunk_size)[:, 0, :]
+        return growth_paths
+    raise ValueError(f"Unknown return model: {return_model}")
+
+
+def solve_goal(initial_investment, goal_amount, timeline_years, annual_return, annual_volatility,
+               target_probability=DEFAULT_TARGET_PROBABILITY, max_years=DEFAULT_MAX_YEARS, num_simulations=1000,
+               seed=None, workers=1, cost_factors=None, growth_paths=None, growth=None, path_weights=None):
+    """
+    Computes concrete adjustments that make a goal feasible, all on one model's growth paths.
+
+    Costs that are proportional to the projected value (fees and inflation) keep wealth linear in
+    the investment; they are passed as one multiplier per horizon and folded into the growth paths
+    once, before any candidate is evaluated.
+
+    Pass the paths a feasibility check counted as growth, so the investment and goal amount are
+    solved on exactly the draws behind its verdict. Without them, paths first run to twice the
+    goal's timeline, which answers the investment and goal amount questions and most timeline
+    searches. Longer paths (to twice the timeline, then max_years) are only simulated when the goal
+    is still out of reach at the end of the current ones, and a timeline found on them is never
+    shorter than the years already searched.
+
+    Parameters:
+    - initial_investment (float): Capital the user is willing to invest.
+    - goal_amount (float): Target future amount.
+    - timeline_years (int): Investment horizon in years.
+    - annual_return (float): Expected annual return rate of the portfolio.
+    - annual_volatility (float): Annual volatility of the portfolio.
+    - target_probability (float): Required success probability (0 to 1).
+    - max_years (int): Longest timeline considered.
+    - num_simulations (int): Number of simulated paths.
+    - seed (int): Root seed; integer-seeded path sets are reused across calls.
+    - workers (int): Number of worker processes used for the simulation.
+    - cost_factors (ndarray): Optional net-of-cost multiplier for every horizon from 1 to max_years.
+    - growth_paths (callable): Optional source of growth paths from model_growth_paths, so the
+      solution uses the same return model as the feasibility check; annual_return and
+      annual_volatility are then ignored.
+    - growth (ndarray): Optional normalized growth paths the goal was checked on, with at least
+      timeline_years columns (column t holds the growth after t + 1 years).
+    - path_weights (ndarray): Control-variate weights of growth, of the same shape.
+
+    Returns:
+    - solution (dict): 'required_investment', 'required_timeline_years' and 'achievable_goal_amount'
+      (None where no value within the search range reaches the target probability).
+    """
+    if growth_paths is None:
+        growth_paths = partial(cached_growth_paths, annual_return, annual_volatility,
+                               num_simulations=num_simulations, seed=seed, workers=workers)
+    max_years = max(max_years, timeline_years)
+
+    def with_costs(growth):
+        if cost_factors is not None:
+            growth = growth * np.asarray(cost_factors, dtype=growth.dtype)[:growth.shape[1]]
+        return growth
+
+    if growth is None:
+        growth = growth_paths(min(max_years, max(1, 2 * timeline_years)))
+        path_weights = None
+    growth = with_costs(growth)
+    required_investment = minimum_investment(growth, goal_amount, timeline_years, target_probability,
+                                             weights=path_weights)
+    achievable_goal_amount = maximum_goal_amount(growth, initial_investment, timeline_years, target_probability,
+                                                 weights=path_weights)
+    required_timeline_years = shortest_timeline(growth, initial_investment, goal_amount, target_probability,
+                                                weights=path_weights)
+    searched_years = growth.shape[1]
+    for years in (min(max_years, max(1, 2 * timeline_years)), max_years):
+        if required_timeline_years is not None or years <= searched_years:
+            continue
+        # Fresh, longer paths only answer the years the current ones did not reach
+        required_timeline_years = shortest_timeline(with_costs(growth_paths(years)), initial_investment,
+                                                    goal_amount, target_probability)
+        if required_timeline_years is not None:
+            required_timeline_years = max(required_timeline_years, searched_years + 1)
+        searched_years = years
+    return {
+        "required_investment": None if required_investment is None else round(required_investment, 2),
+        "required_timeline_years": required_timeline_years,
+        "achievable_goal_amount": None if achievable_goal_amount is None else round(achievable_goal_amount, 2)
+    }
+
+
+def bound_to_verdict(solution, initial_investment, goal_amount, timeline_years):
+    """
+    Keeps the solution for a goal its check found infeasible on the right side of the inputs.
+
+    The verdict compares projections with the goal while the solver compares growth with goal /
+    investment (net of costs folded in differently), so at the feasibility boundary rounding alone
+    could otherwise suggest investing less, waiting no longer or aiming higher than the goal.
+
+    Parameters:
+    - solution (dict): Output of solve_goal.
+    - initial_investment (float): Capital the goal was checked with.
+    - goal_amount (float): Goal amount that was checked.
+    - timeline_years (int): Timeline that was checked.
+
+    Returns:
+    - solution (dict): The solution with every adjustment bounded by the checked inputs.
+    """
+    bounded = dict(solution)
+    if bounded.get("required_investment") is not None:
+        bounded["required_investment"] = max(bounded["required_investment"], round(initial_investment, 2))
+    if bounded.get("required_timeline_years") is not None:
+        bounded["required_timeline_years"] = max(bounded["required_timeline_years"], timeline_years + 1)
+    if bounded.get("achievable_goal_amount") is not None:
+        bounded["achievable_goal_amount"] = min(bounded["achievable_goal_amount"], round(goal_amount, 2))
+    return bounded
+
+
+def adjustment_recommendation(solution, target_probability=DEFAULT_TARGET_PROBABILITY):
+    """
+    Turns a goal_solver solution into a recommendation with concrete numbers.
+
+    Parameters:
+    - solution (dict): Output of solve_goal.
+    - target_probability (float): Success probability the solution was solved for.
+
+    Returns:
+    - recommendation (str): Suggested investment, timeline or goal amount.
+    """
+    options = []
+    if solution.get("required_investment") is not None:
+        options.append(f"increase the initial investment to {solution['required_investment']:,.2f}")
+    if solution.get("required_timeline_years") is not None:
+        options.append(f"extend the timeline to {solution['required_timeline_years']} years")
+    if solution.get("achievable_goal_amount") is not None:
+        options.append(f"lower the goal to {solution['achievable_goal_amount']:,.2f}")
+    if not options:
+        return "Consider increasing investment, extending timeline, or adjusting risk tolerance."
+    return f"To reach {target_probability:.0%} success, " + ", or ".join(options) + "."
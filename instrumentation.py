@@ -0,0 +1,260 @@
+import contextlib
+import json
+import sys
+import threading
+import time
+import tracemalloc
+
+# Active metrics registry; None means instrumentation is disabled and every hook is a no-op
+_METRICS = None
+# Shared do-nothing context returned by stage() while disabled
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def _process_peak_rss_bytes():
+    # Peak resident set size of the process (ru_maxrss is in KiB on Linux, bytes on macOS)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Metrics:
+    """
+    Registry of stage timings, counters and memory high-water marks for one process.
+
+    Stages may nest (e.g., 'simulation' inside 'goal_check'); each stage is timed on its own, so
+    nested times are also contained in the enclosing stage's time.
+    """
+
+    def __init__(self, log_stream=None, trace_memory=False):
+        self.log_stream = log_stream
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _frames(self):
+        frames = getattr(self._local, "frames", None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Times a block of work and records its memory high-water mark under the stage name.
+        """
+        frame = {"child_peak": 0, "start_memory": 0}
+        frames = self._frames()
+        if self.trace_memory:
+            frame["start_memory"] = tracemalloc.get_traced_memory()[0]
+            # The enclosing stage keeps its own peak, since resetting clears tracemalloc's one
+            if frames:
+                frames[-1]["child_peak"] = max(frames[-1]["child_peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        frames.append(frame)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            frames.pop()
+            peak_memory = None
+            if self.trace_memory:
+                traced_peak = max(tracemalloc.get_traced_memory()[1], frame["child_peak"])
+                peak_memory = max(0, traced_peak - frame["start_memory"])
+                if frames:
+                    frames[-1]["child_peak"] = max(frames[-1]["child_peak"], traced_peak)
+            self._record_stage(name, seconds, peak_memory)
+
+    def _record_stage(self, name, seconds, peak_memory):
+        process_peak = _process_peak_rss_bytes()
+        with self._lock:
+            entry = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                  "peak_memory_bytes": None, "process_peak_rss_bytes": None})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            if peak_memory is not None:
+                entry["peak_memory_bytes"] = max(entry["peak_memory_bytes"] or 0, peak_memory)
+            if process_peak is not None:
+                entry["process_peak_rss_bytes"] = max(entry["process_peak_rss_bytes"] or 0, process_peak)
+        self.log("stage", stage=name, seconds=round(seconds, 6), peak_memory_bytes=peak_memory,
+                 process_peak_rss_bytes=process_peak)
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def log(self, event, **fields):
+        """
+        Writes one structured JSON log line if a log stream is configured.
+        """
+        if self.log_stream is None:
+            return
+        record = {"timestamp": round(time.time(), 6), "event": event}
+        record.update(fields)
+        self.log_stream.write(json.dumps(record) + "\n")
+
+    def snapshot(self):
+        """
+        Returns a copy of all stage and counter values.
+        """
+        with self._lock:
+            return {
+                "stages": {name: dict(entry) for name, entry in self.stages.items()},
+                "counters": dict(self.counters)
+            }
+
+
+def enable(log_stream=None, trace_memory=False):
+    """
+    Turns instrumentation on with a fresh registry.
+
+    Parameters:
+    - log_stream (file): Optional stream receiving one JSON line per finished stage.
+    - trace_memory (bool): Track per-stage memory peaks with tracemalloc (slower; process peak RSS
+      is always recorded where the platform provides it).
+
+    Returns:
+    - metrics (Metrics): The active registry.
+    """
+    global _METRICS
+    _METRICS = Metrics(log_stream, trace_memory)
+    return _METRICS
+
+
+def disable():
+    """
+    Turns instrumentation off and returns the registry that was active (or None).
+    """
+    global _METRICS
+    metrics, _METRICS = _METRICS, None
+    if metrics is not None and metrics.trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    return metrics
+
+
+def current():
+    """
+    Returns the active registry, or None when instrumentation is disabled.
+    """
+    return _METRICS
+
+
+def stage(name):
+    """
+    Context manager timing a pipeline stage; a shared no-op context when disabled.
+    """
+    metrics = _METRICS
+    if metrics is None:
+        return _NULL_STAGE
+    return metrics.stage(name)
+
+
+def increment(name, value=1):
+    """
+    Adds to a counter (e.g., 'paths_simulated', 'cache_hits'); does nothing when disabled.
+    """
+    metrics = _METRICS
+    if metrics is not None:
+        metrics.increment(name, value)
+
+
+def export_json(metrics=None):
+    """
+    Serializes a registry (the active one by default) as a JSON document.
+    """
+    metrics = metrics or _METRICS
+    return json.dumps(metrics.snapshot() if metrics is not None else {"stages": {}, "counters": {}}, indent=2)
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def export_prometheus(metrics=None, prefix="investment_tool"):
+    """
+    Renders a registry (the active one by default) in the Prometheus text exposition format.
+
+    Parameters:
+    - metrics (Metrics): Registry to export.
+    - prefix (str): Metric name prefix.
+
+    Returns:
+    - text (str): Exposition text with stage timings, memory peaks and counters.
+    """
+    metrics = metrics or _METRICS
+    snapshot = metrics.snapshot() if metrics is not None else {"stages": {}, "counters": {}}
+    stage_metrics = [
+        ("stage_seconds_total", "counter", "Total wall time spent in the stage.", "seconds"),
+        ("stage_calls_total", "counter", "Number of times the stage ran.", "calls"),
+        ("stage_max_seconds", "gauge", "Longest single run of the stage.", "max_seconds"),
+        ("stage_peak_memory_bytes", "gauge", "Traced memory high-water mark of the stage.", "peak_memory_bytes"),
+        ("stage_process_peak_rss_bytes", "gauge", "Process peak RSS observed at the end of the stage.",
+         "process_peak_rss_bytes")
+    ]
+    lines = []
+    for suffix, metric_type, description, field in stage_metrics:
+        samples = [(name, entry[field]) for name, entry in snapshot["stages"].items() if entry[field] is not None]
+        if not samples:
+            continue
+        lines.append(f"# HELP {prefix}_{suffix} {description}")
+        lines.append(f"# TYPE {prefix}_{suffix} {metric_type}")
+        lines.extend(f'{prefix}_{suffix}{{stage="{_escape_label(name)}"}} {value}' for name, value in samples)
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+def profile_run(function, *args, profiler="cprofile", output=None, **kwargs):
+    """
+    Runs a function once under a profiler.
+
+    Parameters:
+    - function (callable): Function to profile.
+    - *args, **kwargs: Arguments for the function.
+    - profiler (str): 'cprofile' (standard library) or 'pyinstrument' (optional dependency).
+    - output (str): File for the profile: pstats data for cProfile, an HTML report for pyinstrument.
+      A text summary is printed to stderr if omitted.
+
+    Returns:
+    - result: Return value of the function.
+    """
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImportError("pyinstrument is not installed; use profiler='cprofile' or pip install pyinstrument")
+        session = Profiler()
+        session.start()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            session.stop()
+            if output:
+                with open(output, "w") as f:
+                    f.write(session.output_html())
+            else:
+                sys.stderr.write(session.output_text())
+
+    if profiler != "cprofile":
+        raise ValueError(f"Unknown profiler: {profiler}")
+    import cProfile
+    import pstats
+
+    session = cProfile.Profile()
+    try:
+        return session.runcall(function, *args, **kwargs)
+    finally:
+        if output:
+            session.dump_stats(output)
+        else:
+            pstats.Stats(session, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
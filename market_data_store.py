@@ -0,0 +1,306 @@
+import json
+import os
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+# Price history older than this is considered stale and re-fetched
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+def split_by_ticker(financial_data, tickers=None):
+    """
+    Splits a multi-ticker frame from fetch_financial_data into one OHLC frame per ticker.
+
+    Parameters:
+    - financial_data (DataFrame): Frame returned by yf.download(..., group_by='ticker').
+    - tickers (list): Tickers expected in the frame; required when the frame holds a single ticker
+      without a (ticker, field) column MultiIndex.
+
+    Returns:
+    - frames (dict): DataFrame of bars per ticker, with all-empty rows dropped.
+    """
+    import pandas as pd
+
+    if isinstance(financial_data.columns, pd.MultiIndex):
+        tickers = tickers or list(dict.fromkeys(financial_data.columns.get_level_values(0)))
+        return {ticker: financial_data[ticker].dropna(how='all') for ticker in tickers
+                if ticker in financial_data.columns.get_level_values(0)}
+    if not tickers or len(tickers) != 1:
+        raise ValueError("A single-level frame can only be split for exactly one ticker.")
+    return {tickers[0]: financial_data.dropna(how='all')}
+
+
+def period_start(period, end):
+    """
+    Converts a Yahoo Finance style period (e.g., '5d', '6mo', '5y', 'max') into a start date.
+
+    Parameters:
+    - period (str): Period string.
+    - end (Timestamp): Date the period is measured back from.
+
+    Returns:
+    - start (Timestamp): First date inside the period, or None for 'max'.
+    """
+    import pandas as pd
+
+    if period == "max":
+        return None
+    units = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+    for suffix, unit in units.items():
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return pd.Timestamp(end) - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unsupported period: {period}")
+
+
+class MarketDataStore:
+    """
+    Local columnar store of price history with one directory per (ticker, period, interval).
+
+    Each ticker holds an int64 nanosecond date column and a column-major (Fortran order) value
+    matrix, both as .npy files. Reads are memory-mapped, so only the pages of the requested columns
+    and date range are touched and materialized. A small JSON file per ticker records when the data
+    was fetched, which drives TTL-based staleness checks.
+    Adding or refreshing one ticker never touches the files of the others.
+    """
+
+    def __init__(self, root="market_data", ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+
+    def _ticker_dir(self, ticker, period, interval):
+        return os.path.join(self.root, f"{quote(period, safe='')}_{quote(interval, safe='')}", quote(ticker, safe=''))
+
+    def _metadata_path(self, ticker, period, interval):
+        return os.path.join(self._ticker_dir(ticker, period, interval), "meta.json")
+
+    def metadata(self, ticker, period="5y", interval="1d"):
+        """
+        Returns the stored metadata for a ticker, or None if nothing is stored.
+        """
+        path = self._metadata_path(ticker, period, interval)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def is_fresh(self, ticker, period="5y", interval="1d", now=None):
+        """
+        Checks whether a ticker is stored and younger than the TTL.
+
+        Parameters:
+        - ticker (str): Asset ticker.
+        - period (str): History period the data was fetched with.
+        - interval (str): Bar interval the data was fetched with.
+        - now (float): Current epoch time (defaults to time.time()).
+
+        Returns:
+        - fresh (bool): True if the stored data can be served without re-fetching.
+        """
+        metadata = self.metadata(ticker, period, interval)
+        if metadata is None:
+            return False
+        now = time.time() if now is None else now
+        return now - metadata["fetched_at"] < self.ttl_seconds
+
+    def stale_tickers(self, tickers, period="5y", interval="1d", now=None):
+        """
+        Lists the tickers that are missing or past their TTL.
+        """
+        return [ticker for ticker in tickers if not self.is_fresh(ticker, period, interval, now)]
+
+    def write(self, ticker, frame, period="5y", interval="1d", fetched_at=None):
+        """
+        Stores the full bar history of one ticker, replacing anything stored before.
+
+        Parameters:
+        - ticker (str): Asset ticker.
+        - frame (DataFrame): Bars indexed by date, one numeric column per field.
+        - period (str): History period the data was fetched with.
+        - interval (str): Bar interval the data was fetched with.
+        - fetched_at (float): Epoch time of the fetch (defaults to now).
+
+        Returns:
+        - None
+        """
+        directory = self._ticker_dir(ticker, period, interval)
+        os.makedirs(directory, exist_ok=True)
+
+        index = _naive_ns_index(frame.index)
+        order = np.argsort(index.asi8, kind="stable")
+        np.save(os.path.join(directory, "dates.npy"), index.asi8[order])
+        columns = [str(column) for column in frame.columns]
+        values = np.asfortranarray(frame.to_numpy(dtype=np.float64)[order])
+        np.save(os.path.join(directory, "values.npy"), values)
+
+        metadata = {
+            "ticker": ticker,
+            "period": period,
+            "interval": interval,
+            "columns": columns,
+            "rows": int(len(index)),
+            "first_date": str(index.min()) if len(index) else None,
+            "last_date": str(index.max()) if len(index) else None,
+            "fetched_at": time.time() if fetched_at is None else fetched_at
+        }
+        # Write metadata last so readers never see a half-written ticker
+        self._write_metadata(ticker, period, interval, metadata)
+
+    def _write_metadata(self, ticker, period, interval, metadata):
+        # Atomic replace, so a concurrent reader sees either the old or the new metadata
+        temporary_path = self._metadata_path(ticker, period, interval) + ".tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(metadata, f)
+        os.replace(temporary_path, self._metadata_path(ticker, period, interval))
+
+    def last_date(self, ticker, period="5y", interval="1d"):
+        """
+        Returns the date of the newest stored bar for a ticker, or None if nothing is stored.
+        """
+        import pandas as pd
+
+        metadata = self.metadata(ticker, period, interval)
+        if metadata is None or metadata["last_date"] is None:
+            return None
+        return pd.Timestamp(metadata["last_date"])
+
+    def append(self, ticker, frame, period="5y", interval="1d", fetched_at=None):
+        """
+        Merges newly fetched bars into the stored history of one ticker.
+
+        Bars dated after the stored history are appended; bars on already stored dates replace the
+        stored ones (e.g., a partial bar fetched before the session closed). Bars that fall out of
+        the trailing period are dropped, so the stored history keeps the window it was fetched with.
+        The fetch time is refreshed even when no new bars arrived.
+
+        Parameters:
+        - ticker (str): Asset ticker.
+        - frame (DataFrame): New bars indexed by date.
+        - period (str): History period the data was fetched with.
+        - interval (str): Bar interval the data was fetched with.
+        - fetched_at (float): Epoch time of the fetch (defaults to now).
+
+        Returns:
+        - None
+        """
+        import pandas as pd
+
+        metadata = self.metadata(ticker, period, interval)
+        if metadata is not None and len(frame) == 0:
+            # Nothing new: only record that the ticker has been checked
+            metadata["fetched_at"] = time.time() if fetched_at is None else fetched_at
+            self._write_metadata(ticker, period, interval, metadata)
+            return
+        stored = self.read(ticker, period, interval)
+        if stored is not None and len(stored):
+            frame = frame.set_axis(_naive_ns_index(frame.index), axis=0)
+            merged = pd.concat([stored[~stored.index.isin(frame.index)], frame.reindex(columns=stored.columns)])
+            frame = merged.sort_index()
+            # Trim to the trailing period measured back from the newest bar, as a full fetch would
+            first = period_start(period, frame.index[-1])
+            if first is not None:
+                frame = frame[frame.index > first]
+        self.write(ticker, frame, period, interval, fetched_at)
+
+    def _read_arrays(self, ticker, period, interval, start, end, columns):
+        import pandas as pd
+
+        metadata = self.metadata(ticker, period, interval)
+        if metadata is None:
+            return None
+        directory = self._ticker_dir(ticker, period, interval)
+        dates = np.load(os.path.join(directory, "dates.npy"), mmap_mode="r")
+        values = np.load(os.path.join(directory, "values.npy"), mmap_mode="r")
+
+        # Binary search the sorted date column so only the requested rows are materialized
+        lower = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).value, side="left"))
+        upper = len(dates) if end is None else int(np.searchsorted(dates, pd.Timestamp(end).value, side="right"))
+
+        stored_columns = metadata["columns"]
+        columns = stored_columns if columns is None else [column for column in columns if column in stored_columns]
+        positions = [stored_columns.index(column) for column in columns]
+        return np.array(dates[lower:upper]), values[lower:upper, positions], columns
+
+    def read(self, ticker, period="5y", interval="1d", start=None, end=None, columns=None):
+        """
+        Reads a date range of selected columns for one ticker.
+
+        Parameters:
+        - ticker (str): Asset ticker.
+        - period (str): History period the data was fetched with.
+        - interval (str): Bar interval the data was fetched with.
+        - start (str or Timestamp): First date to include (inclusive).
+        - end (str or Timestamp): Last date to include (inclusive).
+        - columns (list): Fields to load (e.g., ['Close']); all stored fields if omitted.
+
+        Returns:
+        - frame (DataFrame): Bars indexed by date, or None if the ticker is not stored.
+        """
+        import pandas as pd
+
+        arrays = self._read_arrays(ticker, period, interval, start, end, columns)
+        if arrays is None:
+            return None
+        dates, values, columns = arrays
+        return pd.DataFrame(np.array(values), index=_date_index(dates), columns=columns)
+
+    def read_panel(self, tickers, period="5y", interval="1d", start=None, end=None, columns=None):
+        """
+        Reads several tickers into the (ticker, field) column layout of fetch_financial_data.
+
+        Parameters:
+        - tickers (list): Asset tickers; tickers that are not stored are skipped.
+        - period (str): History period the data was fetched with.
+        - interval (str): Bar interval the data was fetched with.
+        - start (str or Timestamp): First date to include (inclusive).
+        - end (str or Timestamp): Last date to include (inclusive).
+        - columns (list): Fields to load; all stored fields if omitted.
+
+        Returns:
+        - financial_data (DataFrame): Bars of all tickers aligned on date, or None if none are stored.
+        """
+        import pandas as pd
+
+        arrays = {}
+        for ticker in tickers:
+            ticker_arrays = self._read_arrays(ticker, period, interval, start, end, columns)
+            if ticker_arrays is not None:
+                arrays[ticker] = ticker_arrays
+        if not arrays:
+            return None
+
+        # Tickers sharing one calendar are stacked into a single block without per-ticker frames
+        first_dates = next(iter(arrays.values()))[0]
+        if all(np.array_equal(dates, first_dates) for dates, _, _ in arrays.values()):
+            column_index = pd.MultiIndex.from_tuples(
+                [(ticker, column) for ticker, (_, _, ticker_columns) in arrays.items() for column in ticker_columns]
+            )
+            values = np.empty((len(first_dates), len(column_index)), dtype=np.float64)
+            offset = 0
+            for _, ticker_values, _ in arrays.values():
+                values[:, offset:offset + ticker_values.shape[1]] = ticker_values
+                offset += ticker_values.shape[1]
+            return pd.DataFrame(values, index=_date_index(first_dates), columns=column_index, copy=False)
+        frames = {
+            ticker: pd.DataFrame(np.array(values), index=_date_index(dates), columns=ticker_columns)
+            for ticker, (dates, values, ticker_columns) in arrays.items()
+        }
+        # Tickers on different calendars (e.g., weekday equities and daily crypto) join in date order
+        return pd.concat(frames, axis=1, sort=True)
+
+
+def _naive_ns_index(index):
+    # Dates are stored as timezone-naive nanoseconds
+    import pandas as pd
+
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.as_unit("ns")
+
+
+def _date_index(dates):
+    import pandas as pd
+
+    return pd.DatetimeIndex(dates.view("datetime64[ns]"), name="Date")
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+
+from simulation_engine import DEFAULT_MAX_CHUNK_BYTES, run_tasks
+from instrumentation import increment
+
+# Cholesky factors keyed by covariance snapshot, so repeated evaluations skip the decomposition
+_CHOLESKY_CACHE = OrderedDict()
+CHOLESKY_CACHE_SIZE = 32
+
+
+def covariance_key(covariance):
+    """
+    Builds a stable key identifying a covariance snapshot by its contents.
+
+    Parameters:
+    - covariance (ndarray): Covariance matrix.
+
+    Returns:
+    - key (str): Digest of the matrix shape and values.
+    """
+    covariance = np.ascontiguousarray(covariance, dtype=np.float64)
+    digest = hashlib.sha1(str(covariance.shape).encode())
+    digest.update(covariance.tobytes())
+    return digest.hexdigest()
+
+
+def cholesky_factor(covariance):
+    """
+    Returns the lower-triangular Cholesky factor of a covariance matrix, cached per snapshot.
+
+    Estimated covariances can be slightly indefinite; in that case a growing diagonal jitter is added
+    until the decomposition succeeds.
+
+    Parameters:
+    - covariance (ndarray): Annualized covariance matrix (assets x assets).
+
+    Returns:
+    - factor (ndarray): Lower-triangular matrix L with L @ L.T == covariance.
+    """
+    key = covariance_key(covariance)
+    factor = _CHOLESKY_CACHE.get(key)
+    if factor is not None:
+        _CHOLESKY_CACHE.move_to_end(key)
+        return factor
+
+    covariance = np.asarray(covariance, dtype=np.float64)
+    jitter = 0.0
+    scale = max(float(np.abs(np.diag(covariance)).max()) if covariance.size else 1.0, 1e-12)
+    while True:
+        try:
+            factor = np.linalg.cholesky(covariance + jitter * np.eye(len(covariance)))
+            break
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0.0 else jitter * 10
+            if jitter > scale:
+                raise
+
+    factor.setflags(write=False)
+    _CHOLESKY_CACHE[key] = factor
+    if len(_CHOLESKY_CACHE) > CHOLESKY_CACHE_SIZE:
+        _CHOLESKY_CACHE.popitem(last=False)
+    return factor
+
+
+def simulate_asset_returns(mean_returns, covariance, years, num_simulations, rng, dtype=np.float64):
+    """
+    Draws correlated annual returns for every asset.
+
+    Parameters:
+    - mean_returns (ndarray): Expected annual return per asset.
+    - covariance (ndarray): Annualized covariance matrix of the assets.
+    - years (int): Number of yearly steps.
+    - num_simulations (int): Number of simulated paths.
+    - rng (Generator): NumPy random generator.
+    - dtype (dtype): np.float32 or np.float64.
+
+    Returns:
+    - returns (ndarray): Array of shape (num_simulations, years, assets).
+    """
+    factor = cholesky_factor(covariance).astype(dtype, copy=False)
+    draws = rng.standard_normal((num_simulations, years, len(mean_returns)), dtype=dtype)
+    returns = draws @ factor.T
+    returns += np.asarray(mean_returns, dtype=dtype)
+    return returns
+
+
+def _simulate_allocation_chunk(task):
+    """
+    Simulates one chunk of correlated draws for every allocation (runs inside workers).
+    """
+    mean_returns, covariance, weights, horizons, rows, dtype_name, seed_sequence = task
+    dtype = np.dtype(dtype_name)
+    values = np.ones((rows, weights.shape[0], horizons.size), dtype=dtype)
+    max_years = int(horizons.max()) if horizons.size else 0
+    if max_years == 0:
+        return values
+    returns = simulate_asset_returns(mean_returns, covariance, max_years, rows, np.random.default_rng(seed_sequence),
+                                     dtype)
+    # (rows, years, assets) @ (assets, allocations) -> portfolio growth per allocation
+    growth = returns @ weights.T
+    growth += 1
+    np.cumprod(growth, axis=1, out=growth)
+    nonzero = horizons > 0
+    values[:, :, nonzero] = growth[:, horizons[nonzero] - 1, :].transpose(0, 2, 1)
+    return values
+
+
+def simulate_allocation_horizon_values(initial_investment, weights, mean_returns, covariance, horizons,
+                                       num_simulations=1000, dtype=np.float64, seed=None, workers=1, chunk_size=None,
+                                       max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES):
+    """
+    Evaluates many allocations against the same correlated per-asset draws in one batched call.
+
+    Each year the portfolio is rebalanced to its target weights, so its yearly growth is
+    1 + returns @ weights; all allocations are applied to a chunk of draws by one matrix multiply.
+
+    Parameters:
+    - initial_investment (float): Starting capital.
+    - weights (ndarray): Allocation matrix of shape (allocations, assets) with weights as fractions.
+    - mean_returns (ndarray): Expected annual return per asset.
+    - covariance (ndarray): Annualized covariance matrix of the assets.
+    - horizons (list): Investment horizons in years at which to read the portfolio value.
+    - num_simulations (int): Number of simulated paths.
+    - dtype (dtype): np.float32 or np.float64.
+    - seed (int or SeedSequence): Root seed; each chunk draws from its own spawned stream, so a seeded
+      run is bit-identical for any number of workers.
+    - workers (int): Number of worker processes the chunks are spread across.
+    - chunk_size (int): Paths per chunk; derived from max_chunk_bytes if omitted.
+    - max_chunk_bytes (int): Memory budget for the per-chunk return and growth arrays.
+
+    Returns:
+    - values (ndarray): Array of shape (num_simulations, allocations, len(horizons)).
+    """
+    dtype = np.dtype(dtype)
+    weights = np.atleast_2d(np.asarray(weights, dtype=dtype))
+    horizons = np.asarray(horizons, dtype=np.int64).reshape(-1)
+    max_years = int(horizons.max()) if horizons.size else 0
+    num_allocations, num_assets = weights.shape
+
+    if chunk_size is None:
+        bytes_per_path = max(1, max_years) * (num_assets + num_allocations) * dtype.itemsize
+        chunk_size = max(1, int(max_chunk_bytes // bytes_per_path))
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    starts = range(0, num_simulations, chunk_size)
+    mean_returns = np.asarray(mean_returns, dtype=np.float64)
+    covariance = np.asarray(covariance, dtype=np.float64)
+    tasks = [(mean_returns, covariance, weights, horizons, min(chunk_size, num_simulations - start), dtype.name,
+              stream) for start, stream in zip(starts, seed_sequence.spawn(len(starts)))]
+
+    increment("paths_simulated", num_simulations)
+    values = np.empty((num_simulations, num_allocations, horizons.size), dtype=dtype)
+    for start, chunk_values in zip(starts, run_tasks(_simulate_allocation_chunk, tasks, workers)):
+        values[start:start + len(chunk_values)] = chunk_values
+
+    values *= dtype.type(initial_investment)
+    return values
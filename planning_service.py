@@ -0,0 +1,674 @@
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+import numpy as np
+
+from asset_stats import AssetStats
+from goal_checker_multi import priority_adjusted_allocation, summarize_net_goal
+from goal_solver import DEFAULT_MAX_YEARS
+from instrumentation import stage, increment
+from multi_asset_engine import simulate_allocation_horizon_values
+from result_cache import ENGINE_VERSION, ResultCache, stable_hash
+from risk_profiler import ASSET_CLASSES, risk_profile, dynamic_allocation
+from tax_adjustment import net_projections
+
+DEFAULT_WINDOW_SECONDS = 0.01
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_QUEUE = 256
+DEFAULT_WORKERS = 2
+DEFAULT_NUM_SIMULATIONS = 1000
+# Largest path count a single request may ask for; a shared service must bound per-request memory
+DEFAULT_MAX_SIMULATIONS = 100000
+# Paths per simulation chunk, fixed so a seeded result never depends on the requests batched with it
+SERVICE_CHUNK_SIZE = 2048
+# Memory budget for the (paths x allocations x horizons) values of one coalesced simulation
+DEFAULT_MAX_GROUP_BYTES = 128 * 1024 * 1024
+# Number of most recent latencies the percentiles are computed over
+LATENCY_WINDOW = 10000
+
+# Example request body, also the default payload of the load test
+EXAMPLE_REQUEST = {
+    "initial_investment": 1000000,
+    "user": {"age": 30, "income_stability": "stable", "risk_tolerance": "high"},
+    "goals": {
+        "House": {"goal_amount": 2000000, "timeline_years": 15, "priority": "high"},
+        "Retirement": {"goal_amount": 10000000, "timeline_years": 30, "priority": "medium"},
+        "Education": {"goal_amount": 1000000, "timeline_years": 10, "priority": "low"}
+    }
+}
+
+
+class ServiceBusy(Exception):
+    """
+    Raised when the request queue is full; the HTTP layer answers 503 so clients back off.
+    """
+
+
+class InvalidRequest(ValueError):
+    """
+    Raised for malformed plan requests; the HTTP layer answers 400. Failures while evaluating a
+    well-formed request are server errors (500).
+    """
+
+
+class LatencyTracker:
+    """
+    Thread-safe record of the most recent request latencies.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+            self.count += 1
+
+    def percentiles(self, percentiles=(50, 90, 99)):
+        """
+        Returns latency percentiles over the recorded window.
+
+        Parameters:
+        - percentiles (tuple): Percentiles to report.
+
+        Returns:
+        - latencies (dict): 'p<percentile>_seconds' per percentile, 'max_seconds' and 'count'
+          (None values before the first request).
+        """
+        with self._lock:
+            latencies = np.array(self._latencies)
+            count = self.count
+        return _latency_summary(latencies, percentiles, count)
+
+
+def _latency_summary(latencies, percentiles, count):
+    summary = {f"p{percentile:g}_seconds": None for percentile in percentiles}
+    summary.update({"max_seconds": None, "count": count})
+    if len(latencies):
+        for percentile, value in zip(percentiles, np.percentile(latencies, percentiles)):
+            summary[f"p{percentile:g}_seconds"] = round(float(value), 6)
+        summary["max_seconds"] = round(float(latencies.max()), 6)
+    return summary
+
+
+def _parse_request(payload, default_num_simulations, max_simulations=DEFAULT_MAX_SIMULATIONS,
+                   max_years=DEFAULT_MAX_YEARS):
+    # Validated copy of a plan request; raises InvalidRequest with a client-facing message. Path
+    # counts and timelines are clamped to the service limits (results report the clamped values)
+    if not isinstance(payload, dict):
+        raise InvalidRequest("The request body must be a JSON object.")
+    goals = payload.get("goals")
+    if not isinstance(goals, dict) or not goals:
+        raise InvalidRequest("'goals' must map goal names to goal_amount, timeline_years and priority.")
+    try:
+        goals = {str(name): {"goal_amount": float(goal["goal_amount"]), "timeline_years": int(goal["timeline_years"]),
+                             "priority": goal.get("priority", "medium")}
+                 for name, goal in goals.items()}
+        initial_investment = float(payload["initial_investment"])
+        user = payload.get("user")
+        if user is not None:
+            user = {"age": int(user["age"]), "income_stability": str(user["income_stability"]),
+                    "risk_tolerance": str(user["risk_tolerance"])}
+        allocation = payload.get("asset_allocation")
+        if allocation is not None:
+            unknown = set(allocation) - set(ASSET_CLASSES)
+            if unknown:
+                raise InvalidRequest(f"Unknown asset classes in asset_allocation: {sorted(unknown)}")
+            # Every allocation covers all asset classes in one order, so requests can share a batch
+            allocation = {asset: float(allocation.get(asset, 0.0)) for asset in ASSET_CLASSES}
+        seed = payload.get("seed")
+        seed = None if seed is None else int(seed)
+        num_simulations = int(payload.get("num_simulations", default_num_simulations))
+    except InvalidRequest:
+        raise
+    except (AttributeError, KeyError, TypeError, ValueError) as error:
+        raise InvalidRequest(f"Malformed plan request: {error!r}")
+    if any(goal["timeline_years"] < 1 for goal in goals.values()):
+        raise InvalidRequest("Every goal needs timeline_years >= 1.")
+    if num_simulations < 1:
+        raise InvalidRequest("num_simulations must be at least 1.")
+    for goal in goals.values():
+        goal["timeline_years"] = min(goal["timeline_years"], max_years)
+    if allocation is None and user is None:
+        raise InvalidRequest("A plan request needs a 'user' profile or an explicit 'asset_allocation'.")
+    return {
+        "initial_investment": initial_investment,
+        "goals": goals,
+        "user": user,
+        "asset_allocation": allocation,
+        "num_simulations": min(num_simulations, max_simulations),
+        "seed": seed
+    }
+
+
+class PlanningService:
+    """
+    Long-running goal planner that keeps market data warm and coalesces concurrent requests.
+
+    Market data is loaded once (through the local store, like script.py) and reduced to AssetStats
+    keyed by asset class through asset_tickers (DEFAULT_ASSET_TICKERS of script.py by default);
+    requests then only profile the client and simulate. Requests arriving within window seconds
+    of each other are evaluated as one batch: every distinct priority-adjusted allocation of every
+    request becomes a row of one weight matrix, and all rows are applied to the same correlated
+    per-asset draws in a single simulate_allocation_horizon_values call (the multi_asset return
+    model). Paths are simulated per unit of capital and scaled by each request's investment, so
+    requests of different sizes still share the batch.
+
+    Unseeded requests with the same path count share one set of draws. A seeded request only shares
+    draws with requests of the same seed, path count and longest horizon, so its result does not
+    depend on unrelated traffic, and it is memoized in the result cache until the market data changes.
+
+    Every request is bounded: num_simulations must be positive and is clamped to max_simulations,
+    and goal timelines are clamped to max_years, so no single request can exhaust the service's
+    memory. Batches are bounded too: paths are simulated in chunks of SERVICE_CHUNK_SIZE, and a
+    group whose allocation rows would take more than max_group_bytes is split into several
+    simulations on the same draws.
+
+    Backpressure: the request queue holds at most max_queue requests (ServiceBusy beyond that), and
+    at most workers batches run at once; while all workers are busy, waiting requests pile into the
+    next batch instead of spawning more work.
+    """
+
+    def __init__(self, tickers, store=None, period="5y", interval="1d", provider=None, asset_tickers=None,
+                 tax_rates=None, fees=None, inflation_rate=0.05, window=DEFAULT_WINDOW_SECONDS,
+                 max_batch=DEFAULT_MAX_BATCH, max_queue=DEFAULT_MAX_QUEUE, workers=DEFAULT_WORKERS,
+                 num_simulations=DEFAULT_NUM_SIMULATIONS, max_simulations=DEFAULT_MAX_SIMULATIONS,
+                 max_years=DEFAULT_MAX_YEARS, cache=None, financial_data=None, sentiment_data=None,
+                 max_group_bytes=DEFAULT_MAX_GROUP_BYTES):
+        from script import DEFAULT_TAX_RATES, DEFAULT_FEES, DEFAULT_ASSET_TICKERS
+
+        self.asset_tickers = DEFAULT_ASSET_TICKERS if asset_tickers is None else asset_tickers
+        # Every ticker holding an asset class is loaded along with the requested ones
+        self.tickers = list(tickers) + [ticker for ticker in self.asset_tickers.values() if ticker not in tickers]
+        self.store = store
+        self.period = period
+        self.interval = interval
+        self.provider = provider
+        self.tax_rates = tax_rates or DEFAULT_TAX_RATES
+        self.fees = fees or DEFAULT_FEES
+        self.inflation_rate = inflation_rate
+        self.window = window
+        self.max_batch = max_batch
+        self.num_simulations = num_simulations
+        self.max_simulations = max_simulations
+        self.max_years = max_years
+        self.max_group_bytes = max_group_bytes
+        self.cache = cache if cache is not None else ResultCache()
+        self.latency = LatencyTracker()
+        self.batches = 0
+        self.batched_requests = 0
+        self.rejected = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._slots = threading.BoundedSemaphore(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="planner")
+        self._state_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._dispatcher = None
+        self._state = None
+        if financial_data is not None:
+            self._install(financial_data, sentiment_data)
+
+    def _install(self, financial_data, sentiment_data):
+        # Swap in a new snapshot keyed by asset class; batches already running keep the one they
+        # started with, and a snapshot missing an asset class's ticker is refused here, not per request
+        asset_stats = financial_data if isinstance(financial_data, AssetStats) else \
+            AssetStats.from_price_history(financial_data)
+        asset_stats = asset_stats.for_assets(self.asset_tickers, ASSET_CLASSES)
+        if sentiment_data is None:
+            import pandas as pd
+
+            # No sentiment reads as neutral in dynamic_allocation
+            sentiment_data = pd.DataFrame({"ticker": [], "sentiment_score": []})
+        with self._state_lock:
+            self._state = {"asset_stats": asset_stats, "sentiment_data": sentiment_data, "loaded_at": time.time()}
+
+    def load(self):
+        """
+        Loads (or refreshes) market data from the store, fetching only stale tickers.
+
+        Returns:
+        - status (dict): Tickers and load time of the snapshot now served.
+        """
+        from market_data_store import MarketDataStore
+        from script import STORE_DIR, load_market_data
+
+        self.store = self.store or MarketDataStore(STORE_DIR)
+        financial_data, sentiment_data = load_market_data(self.tickers, self.store, self.period, self.interval,
+                                                          self.provider)
+        self._install(financial_data, sentiment_data)
+        return self.status()
+
+    def status(self):
+        state = self._state
+        return {
+            "status": "ok" if state is not None else "loading",
+            "tickers": self.tickers,
+            "loaded_at": None if state is None else state["loaded_at"]
+        }
+
+    def start(self):
+        """
+        Starts the dispatcher thread that forms batches.
+        """
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch, name="plan-dispatcher", daemon=True)
+            self._dispatcher.start()
+        return self
+
+    def stop(self):
+        """
+        Stops the dispatcher after the queued requests and waits for running batches.
+        """
+        if self._dispatcher is not None:
+            self._queue.put(None)
+            self._dispatcher.join()
+            self._dispatcher = None
+        self._executor.shutdown(wait=True)
+
+    def submit(self, payload):
+        """
+        Queues a plan request; raises InvalidRequest for a malformed payload and ServiceBusy when
+        the queue is full.
+
+        Parameters:
+        - payload (dict): Request with 'initial_investment', 'goals' and a 'user' profile (age,
+          income_stability, risk_tolerance) or an explicit 'asset_allocation'; optional 'seed'
+          and 'num_simulations' (clamped to max_simulations; goal timelines to max_years).
+
+        Returns:
+        - future (Future): Resolves to {goal name: result} as in check_multi_goal_feasibility
+          (without the goal_solver adjustments), plus 'asset_allocation'.
+        """
+        request = _parse_request(payload, self.num_simulations, self.max_simulations, self.max_years)
+        future = Future()
+        enqueued_at = time.perf_counter()
+        future.add_done_callback(lambda _: self.latency.record(time.perf_counter() - enqueued_at))
+        try:
+            self._queue.put_nowait((request, future))
+        except queue.Full:
+            with self._counter_lock:
+                self.rejected += 1
+            increment("requests_rejected")
+            raise ServiceBusy("The planning queue is full; retry later.")
+        return future
+
+    def plan(self, payload, timeout=None):
+        """
+        Evaluates one plan request synchronously (see submit).
+        """
+        return self.submit(payload).result(timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def metrics(self):
+        """
+        Returns latency percentiles and batching counters.
+        """
+        return {
+            "latency": self.latency.percentiles(),
+            "queue_depth": self.queue_depth(),
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "mean_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else None,
+            "rejected": self.rejected
+        }
+
+    def _dispatch(self):
+        # Take a worker slot, then gather requests for up to window seconds (or max_batch of them)
+        stopping = False
+        while not stopping:
+            self._slots.acquire()
+            item = self._queue.get()
+            if item is None:
+                self._slots.release()
+                break
+            batch = [item]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch):
+        try:
+            with self._counter_lock:
+                self.batches += 1
+                self.batched_requests += len(batch)
+            increment("requests_coalesced", len(batch))
+            with stage("service_batch"):
+                self._evaluate_batch(batch)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+        finally:
+            self._slots.release()
+
+    def _evaluate_batch(self, batch):
+        state = self._state
+        if state is None:
+            raise RuntimeError("Market data is not loaded yet.")
+        asset_stats = state["asset_stats"]
+
+        # Resolve allocations and serve memoized seeded requests straight from the cache
+        groups = {}
+        for request, future in batch:
+            try:
+                allocation = request["asset_allocation"] or self._allocation(request["user"], state)
+                key = None
+                if request["seed"] is not None:
+                    key = stable_hash(ENGINE_VERSION, "planning_service", request, allocation, asset_stats,
+                                      self.asset_tickers, self.tax_rates, self.fees, self.inflation_rate)
+                    cached = self.cache.get(key)
+                    if cached is not None:
+                        future.set_result(cached)
+                        continue
+                max_years = max(goal["timeline_years"] for goal in request["goals"].values())
+                group_key = (request["num_simulations"], None) if request["seed"] is None else \
+                    (request["num_simulations"], request["seed"], max_years)
+                groups.setdefault(group_key, []).append((request, future, allocation, key))
+            except Exception as error:
+                future.set_exception(error)
+
+        for (num_simulations, seed, *_), members in groups.items():
+            for part in self._bounded_parts(num_simulations, members):
+                try:
+                    self._evaluate_group(asset_stats, num_simulations, seed, part)
+                except Exception as error:
+                    for _, future, _, _ in part:
+                        if not future.done():
+                            future.set_exception(error)
+
+    def _allocation(self, user, state):
+        risk_score = risk_profile(user["age"], user["income_stability"], user["risk_tolerance"])
+        return dynamic_allocation(risk_score, state["sentiment_data"], state["asset_stats"])
+
+    def _bounded_parts(self, num_simulations, members):
+        # Splits a group between whole requests so that no simulation holds more allocation rows than
+        # fit into max_group_bytes; seeded parts redraw the same paths, so their results are unchanged
+        max_years = max(goal["timeline_years"] for request, _, _, _ in members for goal in request["goals"].values())
+        max_rows = max(1, self.max_group_bytes // (num_simulations * max(1, max_years) * 8))
+        parts = [[]]
+        rows = set()
+        for member in members:
+            request, _, allocation, _ = member
+            member_rows = {tuple(priority_adjusted_allocation(allocation, goal["priority"]).items())
+                           for goal in request["goals"].values()}
+            if parts[-1] and len(rows | member_rows) > max_rows:
+                parts.append([])
+                rows = set()
+            parts[-1].append(member)
+            rows |= member_rows
+        return parts
+
+    def _evaluate_group(self, asset_stats, num_simulations, seed, members):
+        # Distinct priority-adjusted allocations of all members become rows of one weight matrix
+        assets = list(members[0][2].keys())
+        allocation_rows = {}
+        for request, _, allocation, _ in members:
+            if list(allocation.keys()) != assets:
+                raise ValueError("Coalesced requests must allocate the same asset classes in the same order.")
+            for goal in request["goals"].values():
+                adjusted = priority_adjusted_allocation(allocation, goal["priority"])
+                allocation_rows.setdefault(tuple(adjusted[asset] for asset in assets), len(allocation_rows))
+        weights = np.array(list(allocation_rows.keys()), dtype=np.float64) / 100
+        horizons = sorted({goal["timeline_years"] for request, _, _, _ in members
+                           for goal in request["goals"].values()})
+
+        mean_returns, _ = asset_stats.vectors(assets)
+        covariance = asset_stats.covariance_matrix(assets)
+        seed_sequence = np.random.SeedSequence(seed)
+        values = simulate_allocation_horizon_values(1.0, weights, mean_returns, covariance, horizons,
+                                                    num_simulations, seed=seed_sequence, chunk_size=SERVICE_CHUNK_SIZE)
+
+        # Split the batch back out: each goal reads its row and horizon, scaled by the request's capital
+        for request, future, allocation, key in members:
+            results = {}
+            for goal_name, goal in request["goals"].items():
+                adjusted = priority_adjusted_allocation(allocation, goal["priority"])
+                row = allocation_rows[tuple(adjusted[asset] for asset in assets)]
+                projections = values[:, row, horizons.index(goal["timeline_years"])] * request["initial_investment"]
+                net_values = net_projections(projections, self.tax_rates, self.fees, self.inflation_rate,
+                                             goal["timeline_years"], out=projections)
+                results[goal_name] = summarize_net_goal(goal, net_values)
+            response = {"asset_allocation": allocation, "goals": results}
+            if key is not None:
+                self.cache.put(key, response)
+            future.set_result(response)
+
+
+class PlanningRequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON endpoints of the planning service: POST /plan, POST /refresh, GET /health, GET /metrics.
+    """
+
+    # Seconds a request may wait for its batch before the client gets a 504
+    request_timeout = 60
+
+    def _send_json(self, status, body, headers=None):
+        encoded = json.dumps(body, default=float).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            self._send_json(200, service.status())
+        elif self.path == "/metrics":
+            self._send_json(200, service.metrics())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        service = self.server.service
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "The request body is not valid JSON."})
+            return
+        if self.path == "/refresh":
+            try:
+                self._send_json(200, service.load())
+            except (OSError, ValueError) as error:
+                # Fetch, store or missing-ticker failures; the previous snapshot keeps being served
+                self._send_json(502, {"error": f"Market data refresh failed: {error}",
+                                      "loaded_at": service.status()["loaded_at"]})
+            except Exception as error:
+                traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
+                self._send_json(500, {"error": f"Market data refresh failed: {error}",
+                                      "loaded_at": service.status()["loaded_at"]})
+        elif self.path == "/plan":
+            try:
+                future = service.submit(payload)
+            except InvalidRequest as error:
+                self._send_json(400, {"error": str(error)})
+                return
+            except ServiceBusy as error:
+                self._send_json(503, {"error": str(error)}, {"Retry-After": "1"})
+                return
+            try:
+                self._send_json(200, future.result(self.request_timeout))
+            except TimeoutError:
+                self._send_json(504, {"error": "The plan did not finish in time."})
+            except Exception as error:
+                # A well-formed request that fails to evaluate is the service's fault
+                traceback.print_exception(type(error), error, error.__traceback__, file=sys.stderr)
+                self._send_json(500, {"error": f"Planning failed: {error}"})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate the output under load
+        pass
+
+
+def create_server(service, host="127.0.0.1", port=8000):
+    """
+    Binds an HTTP server around a started planning service.
+
+    Parameters:
+    - service (PlanningService): Service with market data loaded.
+    - host (str): Interface to listen on.
+    - port (int): Port to listen on (0 picks a free one).
+
+    Returns:
+    - server (ThreadingHTTPServer): Call serve_forever() to run it.
+    """
+    server = ThreadingHTTPServer((host, port), PlanningRequestHandler)
+    server.daemon_threads = True
+    server.service = service.start()
+    return server
+
+
+def load_test(url, payloads=None, requests=200, concurrency=16, timeout=60):
+    """
+    Fires plan requests at a running service from concurrent clients and measures their latency.
+
+    Parameters:
+    - url (str): Base URL of the service (e.g., 'http://127.0.0.1:8000').
+    - payloads (list): Request bodies, used round-robin (defaults to EXAMPLE_REQUEST).
+    - requests (int): Total number of requests.
+    - concurrency (int): Number of concurrent clients.
+    - timeout (float): Client timeout per request in seconds.
+
+    Returns:
+    - report (dict): 'requests', 'concurrency', 'seconds', 'throughput' (requests/s), 'status_counts'
+      and client-side 'latency' percentiles, plus the service's own '/metrics'.
+    """
+    payloads = payloads or [EXAMPLE_REQUEST]
+    bodies = [json.dumps(payload).encode() for payload in payloads]
+    plan_url = url.rstrip("/") + "/plan"
+
+    def send(index):
+        started = time.perf_counter()
+        request = Request(plan_url, data=bodies[index % len(bodies)], headers={"Content-Type": "application/json"})
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except URLError:
+            status = "error"
+        return status, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(send, range(requests)))
+    seconds = time.perf_counter() - started
+
+    status_counts = {}
+    for status, _ in outcomes:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+    latencies = np.array([latency for status, latency in outcomes if status == 200])
+    with urlopen(url.rstrip("/") + "/metrics", timeout=timeout) as response:
+        service_metrics = json.loads(response.read())
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(seconds, 4),
+        "throughput": round(requests / seconds, 2),
+        "status_counts": status_counts,
+        "latency": _latency_summary(latencies, (50, 90, 99), len(latencies)),
+        "service_metrics": service_metrics
+    }
+
+
+def build_parser():
+    from script import DEFAULT_TICKERS, STORE_DIR, parse_asset_ticker
+
+    parser = argparse.ArgumentParser(description="Serve goal plans over HTTP, or load-test a running service.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the planning service.")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--tickers", nargs="+", default=DEFAULT_TICKERS, help="Tickers to keep warm.")
+    serve.add_argument("--period", default="5y", help="History period (e.g., '5y').")
+    serve.add_argument("--interval", default="1d", help="Bar interval (e.g., '1d').")
+    serve.add_argument("--store", default=STORE_DIR, help="Directory of the local market data store.")
+    serve.add_argument("--replay-dir", help="Read bars from '<ticker>.csv' files in this directory instead of the network.")
+    serve.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_SECONDS * 1000,
+                       help="Coalescing window for concurrent requests.")
+    serve.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help="Most requests per batch.")
+    serve.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                       help="Queued requests before new ones get 503.")
+    serve.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Batches evaluated concurrently.")
+    serve.add_argument("--max-simulations", type=int, default=DEFAULT_MAX_SIMULATIONS,
+                       help="Largest num_simulations a request may use (larger ones are clamped).")
+    serve.add_argument("--max-years", type=int, default=DEFAULT_MAX_YEARS,
+                       help="Longest goal timeline a request may use (longer ones are clamped).")
+    serve.add_argument("--cache-dir", help="Directory of the on-disk result cache (memory-only if omitted).")
+    serve.add_argument("--asset-tickers", nargs="+", type=parse_asset_ticker, default=[],
+                       help="Ticker holding each asset class as CLASS=TICKER (classes not given keep their defaults).")
+
+    test = commands.add_parser("load-test", help="Load-test a running service.")
+    test.add_argument("--url", default="http://127.0.0.1:8000")
+    test.add_argument("--requests", type=int, default=200)
+    test.add_argument("--concurrency", type=int, default=16)
+    test.add_argument("--payload", help="JSON file with one request body or a list of them (default: example request).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "load-test":
+        payloads = None
+        if args.payload:
+            with open(args.payload) as f:
+                payloads = json.load(f)
+            payloads = payloads if isinstance(payloads, list) else [payloads]
+        print(json.dumps(load_test(args.url, payloads, args.requests, args.concurrency), indent=2))
+        return
+
+    from data_providers import ReplayProvider
+    from market_data_store import MarketDataStore
+    from script import DEFAULT_ASSET_TICKERS
+
+    provider = ReplayProvider(args.replay_dir) if args.replay_dir else None
+    asset_tickers = {**DEFAULT_ASSET_TICKERS, **dict(args.asset_tickers)}
+    service = PlanningService(args.tickers, MarketDataStore(args.store), args.period, args.interval, provider,
+                              asset_tickers=asset_tickers, window=args.window_ms / 1000, max_batch=args.max_batch, max_queue=args.max_queue,
+                              workers=args.workers, max_simulations=args.max_simulations, max_years=args.max_years,
+                              cache=ResultCache(args.cache_dir))
+    service.load()
+    server = create_server(service, args.host, args.port)
+    print(f"Serving plans on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
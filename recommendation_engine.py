@@ -1,5 +1,15 @@
-import matplotlib.pyplot as plt
+import os
+from urllib.parse import quote
+
 import numpy as np
+from goal_solver import adjustment_recommendation
+from simulation_engine import run_tasks
+
+# Bins of the histograms pre-computed for reports
+DEFAULT_HISTOGRAM_BINS = 50
+# One reusable report figure (with its axes and artists) per goal count, kept for the lifetime of
+# the (worker) process
+_REPORT_FIGURES = {}
 
 def generate_recommendations(feasibility_data):
     """
@@ -32,7 +42,8 @@ def single_goal_recommendation(goal_data):
     - goal_data (dict): Data for a single goal.
     
     Returns:
-    - recommendation (str): Text recommendation for the goal.
+    - recommendation (str): Text recommendation for the goal, with the concrete investment,
+      timeline or goal amount from goal_solver when the goal data carries them.
     """
     probability_of_success = goal_data['success_probability']
     goal_amount = goal_data['goal_amount']
@@ -40,6 +51,9 @@ def single_goal_recommendation(goal_data):
 
     if probability_of_success >= 75:
         return "Your goal is feasible with the current setup!"
+    elif any(goal_data.get(key) is not None for key in
+             ("required_investment", "required_timeline_years", "achievable_goal_amount")):
+        return adjustment_recommendation(goal_data)
     elif median_projection >= goal_amount:
         return ("Your median projection is above the goal, but success probability is low. "
                 "Consider adjusting risk allocation slightly.")
@@ -59,6 +73,9 @@ def visualize_projections(projections, goal_amount, goal_name="Goal"):
     Returns:
     - None (displays the plot).
     """
+    # matplotlib is only loaded when a plot is actually drawn
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 6))
     plt.hist(projections, bins=50, color='skyblue', edgecolor='black')
     plt.axvline(goal_amount, color='red', linestyle='dashed', linewidth=1.5, label=f"{goal_name} Amount: {goal_amount}")
@@ -68,23 +85,153 @@ def visualize_projections(projections, goal_amount, goal_name="Goal"):
     plt.legend()
     plt.show()
 
-def create_summary(feasibility_data, projections):
+def bin_projections(projections, bins=DEFAULT_HISTOGRAM_BINS):
+    """
+    Pre-bins projections, so reports draw bin heights instead of every simulated path.
+
+    Parameters:
+    - projections (list or ndarray): Projected values; non-finite values are ignored.
+    - bins (int): Number of histogram bins.
+
+    Returns:
+    - counts (ndarray), edges (ndarray): Output of np.histogram.
+    """
+    values = np.asarray(projections, dtype=np.float64).ravel()
+    return np.histogram(values[np.isfinite(values)], bins=bins)
+
+def report_data(feasibility_data, projections, bins=DEFAULT_HISTOGRAM_BINS):
+    """
+    Reduces feasibility results and projection arrays to the small amount of data a report draws.
+
+    Parameters:
+    - feasibility_data (dict): Single-goal result or multi-goal results keyed by goal name.
+    - projections (dict or list): Net projections per goal, or one array for a single goal.
+    - bins (int): Number of histogram bins.
+
+    Returns:
+    - goals (dict): Per goal 'counts', 'edges', 'goal_amount', 'success_probability' and
+      'median_projection'.
+    """
+    if "success_probability" in feasibility_data:
+        feasibility_data, projections = {"Goal": feasibility_data}, {"Goal": projections}
+    goals = {}
+    for goal_name, goal_data in feasibility_data.items():
+        counts, edges = bin_projections(projections[goal_name], bins)
+        goals[goal_name] = {
+            "counts": counts,
+            "edges": edges,
+            "goal_amount": goal_data['goal_amount'],
+            "success_probability": goal_data['success_probability'],
+            "median_projection": goal_data['median_projection']
+        }
+    return goals
+
+def _report_figure(goal_count):
+    # Figures are created without pyplot, so no GUI backend or global figure state is involved and
+    # files are rendered by the Agg (PNG) or SVG canvas. Axes, histogram and goal-line artists are
+    # built once and only their data changes between clients; fixed margins replace tight_layout.
+    report = _REPORT_FIGURES.get(goal_count)
+    if report is not None:
+        return report
+    from matplotlib.figure import Figure
+
+    height = 3.5 * goal_count
+    figure = Figure(figsize=(10, height))
+    figure.subplots_adjust(left=0.08, right=0.97, bottom=0.6 / height, top=1 - 0.7 / height, hspace=0.5)
+    axes = figure.subplots(goal_count, 1, squeeze=False)[:, 0]
+    panels = []
+    for axis in axes:
+        histogram = axis.stairs([0], [0, 1], fill=True, color='skyblue', edgecolor='black')
+        goal_line = axis.axvline(0, color='red', linestyle='dashed', linewidth=1.5)
+        axis.set_xlabel("Projected Value")
+        axis.set_ylabel("Frequency")
+        panels.append((axis, histogram, goal_line, axis.legend([goal_line], [""])))
+    report = _REPORT_FIGURES[goal_count] = (figure, panels)
+    return report
+
+def render_client_report(goals, path, formats=("png",), title=None):
+    """
+    Draws every goal of one client on a single figure and writes it to files (no display).
+
+    Parameters:
+    - goals (dict): Output of report_data.
+    - path (str): Output path without extension.
+    - formats (tuple): File formats to write (e.g., ('png', 'svg')).
+    - title (str): Optional figure title (e.g., the client name).
+
+    Returns:
+    - paths (list): Files written.
+    """
+    figure, panels = _report_figure(max(1, len(goals)))
+    for (axis, histogram, goal_line, legend), (goal_name, goal) in zip(panels, goals.items()):
+        counts, edges, goal_amount = goal["counts"], goal["edges"], goal["goal_amount"]
+        histogram.set_data(counts, edges)
+        goal_line.set_xdata([goal_amount, goal_amount])
+        legend.get_texts()[0].set_text(f"{goal_name} Amount: {goal_amount}")
+        axis.set_title(f"{goal_name}: {goal['success_probability']}% success, "
+                       f"median {goal['median_projection']:,.0f}")
+
+        # Limits follow the histogram and the goal line (autoscaling would rescan every artist)
+        low, high = min(edges[0], goal_amount), max(edges[-1], goal_amount)
+        margin = (high - low) * 0.05 or 1.0
+        axis.set_xlim(low - margin, high + margin)
+        axis.set_ylim(0, max(1, counts.max(initial=0)) * 1.05)
+    figure.suptitle(title or "")
+
+    paths = []
+    for file_format in formats:
+        paths.append(f"{path}.{file_format}")
+        figure.savefig(paths[-1], format=file_format)
+    return paths
+
+def _render_report_task(task):
+    # Renders one client's report (runs inside workers, each reusing its own figures)
+    client_id, goals, path, formats = task
+    return client_id, render_client_report(goals, path, formats, title=str(client_id))
+
+def render_reports(clients, output_dir, formats=("png",), workers=1):
+    """
+    Renders one report per client, on a process pool when more than one worker is requested.
+
+    Only the pre-binned histograms travel to the workers, never the projection arrays.
+
+    Parameters:
+    - clients (dict): report_data output per client id.
+    - output_dir (str): Directory for the report files, named after the client ids.
+    - formats (tuple): File formats to write (e.g., ('png', 'svg')).
+    - workers (int): Number of worker processes.
+
+    Returns:
+    - paths (dict): Files written per client id.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(client_id, goals, os.path.join(output_dir, quote(str(client_id), safe='')), tuple(formats))
+             for client_id, goals in clients.items()]
+    return dict(run_tasks(_render_report_task, tasks, workers))
+
+def create_summary(feasibility_data, projections, report_path=None, formats=("png",)):
     """
     Prints a summary report and visualizes the projections with goal amount.
     
     Parameters:
     - feasibility_data (dict): Data containing probability of success and other key metrics.
     - projections (dict): Dictionary of projections per goal if multiple goals, otherwise a list for a single goal.
+    - report_path (str): If given, all goals are drawn headless on one figure written to this path
+      (without extension) instead of being shown one window per goal.
+    - formats (tuple): File formats of the report (e.g., ('png', 'svg')).
     
     Returns:
     - summary (dict): Contains key insights and recommendations for the user.
     """
     summary = {}
+    if report_path is not None:
+        render_client_report(report_data(feasibility_data, projections), report_path, formats)
     
     if "success_probability" in feasibility_data:
         # Single goal summary
         recommendation = single_goal_recommendation(feasibility_data)
-        visualize_projections(projections, feasibility_data['goal_amount'])
+        if report_path is None:
+            visualize_projections(projections, feasibility_data['goal_amount'])
         summary = {
             "initial_investment": feasibility_data['initial_investment'],
             "goal_amount": feasibility_data['goal_amount'],
@@ -97,9 +244,10 @@ def create_summary(feasibility_data, projections):
         # Multi-goal summary
         for goal_name, goal_data in feasibility_data.items():
             recommendation = single_goal_recommendation(goal_data)
-            visualize_projections(projections[goal_name], goal_data['goal_amount'], goal_name)
+            if report_path is None:
+                visualize_projections(projections[goal_name], goal_data['goal_amount'], goal_name)
             summary[goal_name] = {
-                "initial_investment": goal_data['initial_investment'],
+                "initial_investment": goal_data.get('initial_investment'),
                 "goal_amount": goal_data['goal_amount'],
                 "probability_of_success": goal_data['success_probability'],
                 "median_projection": goal_data['median_projection'],
@@ -109,27 +257,28 @@ def create_summary(feasibility_data, projections):
     
     return summary
 
-# Example usage for multiple goals
-feasibility_data = {
-    "House": {
-        "initial_investment": 50000,
-        "goal_amount": 2000000,
-        "success_probability": 80,
-        "median_projection": 2200000,
-        "projection_range": (1800000, 2500000)
-    },
-    "Retirement": {
-        "initial_investment": 50000,
-        "goal_amount": 10000000,
-        "success_probability": 60,
-        "median_projection": 9000000,
-        "projection_range": (8000000, 11000000)
+if __name__ == "__main__":
+    # Example usage for multiple goals
+    feasibility_data = {
+        "House": {
+            "initial_investment": 50000,
+            "goal_amount": 2000000,
+            "success_probability": 80,
+            "median_projection": 2200000,
+            "projection_range": (1800000, 2500000)
+        },
+        "Retirement": {
+            "initial_investment": 50000,
+            "goal_amount": 10000000,
+            "success_probability": 60,
+            "median_projection": 9000000,
+            "projection_range": (8000000, 11000000)
+        }
     }
-}
-projections = {
-    "House": [1800000, 1900000, 2000000, 2100000, 2200000, 2300000],
-    "Retirement": [8000000, 8500000, 9000000, 9500000, 10000000, 10500000]
-}
-
-summary = create_summary(feasibility_data, projections)
-print(summary)
+    projections = {
+        "House": [1800000, 1900000, 2000000, 2100000, 2200000, 2300000],
+        "Retirement": [8000000, 8500000, 9000000, 9500000, 10000000, 10500000]
+    }
+
+    summary = create_summary(feasibility_data, projections)
+    print(summary)
@@ -0,0 +1,189 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from instrumentation import increment
+
+# Bump whenever a change to the simulation or post-processing alters results for the same inputs,
+# so entries computed by an older engine are never served
+ENGINE_VERSION = "2"
+DEFAULT_MEMORY_ENTRIES = 128
+DEFAULT_MAX_DISK_BYTES = 256 * 1024 * 1024
+
+
+def _update_hash(digest, value):
+    # Type-tagged canonical encoding: equal inputs hash equally whatever their dict order or
+    # container type, and values of different types never collide
+    if isinstance(value, dict):
+        digest.update(b"d%d:" % len(value))
+        for key in sorted(value, key=repr):
+            _update_hash(digest, key)
+            _update_hash(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"l%d:" % len(value))
+        for item in value:
+            _update_hash(digest, item)
+    elif isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value)
+        digest.update(f"a{array.dtype.str}{array.shape}:".encode())
+        digest.update(array.tobytes())
+    elif isinstance(value, (bool, np.bool_)):
+        digest.update(b"b1" if value else b"b0")
+    elif isinstance(value, (int, np.integer)):
+        digest.update(b"i%d;" % int(value))
+    elif isinstance(value, (float, np.floating)):
+        # repr round-trips exactly; integral floats still hash apart from ints
+        digest.update(f"f{float(value)!r};".encode())
+    elif isinstance(value, str):
+        encoded = value.encode()
+        digest.update(b"s%d:" % len(encoded) + encoded)
+    elif value is None:
+        digest.update(b"n")
+    elif hasattr(value, "fingerprint"):
+        digest.update(b"x" + value.fingerprint().encode())
+    elif hasattr(value, "columns") and hasattr(value, "index"):
+        import pandas as pd
+
+        digest.update(b"p")
+        _update_hash(digest, [str(column) for column in value.columns])
+        _update_hash(digest, pd.util.hash_pandas_object(value, index=True).to_numpy())
+    else:
+        raise TypeError(f"Cannot hash value of type {type(value).__name__} for the result cache")
+
+
+def stable_hash(*values):
+    """
+    Hashes inputs into a key that is stable across processes and runs.
+
+    Parameters:
+    - *values: Nested dicts, lists, tuples, scalars, strings, NumPy arrays, DataFrames or objects
+      with a fingerprint() method (e.g., AssetStats).
+
+    Returns:
+    - key (str): Hex SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    _update_hash(digest, list(values))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of computed results: an in-memory LRU in front of a size-bounded directory.
+
+    Values are stored pickled in both tiers, so every hit returns a fresh copy that callers may
+    modify. Disk entries are content-addressed files written atomically; a hit refreshes the file's
+    modification time and the least recently used files are evicted once the directory exceeds
+    max_disk_bytes. Without a directory the cache is memory-only.
+    """
+
+    def __init__(self, directory=None, memory_entries=DEFAULT_MEMORY_ENTRIES, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pkl")
+
+    def _remember(self, key, payload):
+        with self._lock:
+            self._memory[key] = payload
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key, default=None):
+        """
+        Returns a copy of the cached value for key, or default on a miss.
+        """
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+        if payload is None and self.directory:
+            try:
+                with open(self._path(key), "rb") as f:
+                    payload = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                payload = None
+            if payload is not None:
+                # Promote disk hits so repeated lookups stay in memory
+                self._remember(key, payload)
+        if payload is None:
+            increment("result_cache_misses")
+            return default
+        increment("result_cache_hits")
+        return pickle.loads(payload)
+
+    def put(self, key, value):
+        """
+        Stores a value under key in both tiers.
+        """
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, payload)
+        if not self.directory:
+            return
+        # Atomic replace, so a concurrent reader sees either no entry or a complete one
+        temporary_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(payload)
+        os.replace(temporary_path, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        # Drop the least recently used files until the directory fits its budget
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                try:
+                    status = entry.stat()
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, entry.path))
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_bytes -= size
+
+    def clear(self):
+        """
+        Removes every entry from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+        if self.directory:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".pkl"):
+                    os.remove(entry.path)
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for key, computing and storing it on a miss.
+
+        Parameters:
+        - key (str): Cache key from stable_hash.
+        - compute (callable): Produces the value when it is not cached.
+
+        Returns:
+        - value: Cached or freshly computed value.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
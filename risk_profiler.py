@@ -1,5 +1,9 @@
 import numpy as np
-import pandas as pd
+
+# Scoring factors shared by the scalar and batch risk profilers
+STABILITY_FACTORS = {'stable': 1.0, 'moderate': 0.75, 'unstable': 0.5}
+TOLERANCE_FACTORS = {'low': 0.5, 'medium': 0.75, 'high': 1.0}
+ASSET_CLASSES = ['stocks', 'bonds', 'real_estate', 'crypto']
 
 def risk_profile(age, income_stability, risk_tolerance):
     """
@@ -15,8 +19,8 @@ def risk_profile(age, income_stability, risk_tolerance):
     """
     # Base score adjustments for age, income stability, and risk tolerance
     age_factor = max(0, 100 - age) / 100  # Younger age suggests higher risk capacity
-    stability_factor = {'stable': 1.0, 'moderate': 0.75, 'unstable': 0.5}.get(income_stability, 0.5)
-    tolerance_factor = {'low': 0.5, 'medium': 0.75, 'high': 1.0}.get(risk_tolerance, 0.75)
+    stability_factor = STABILITY_FACTORS.get(income_stability, 0.5)
+    tolerance_factor = TOLERANCE_FACTORS.get(risk_tolerance, 0.75)
     
     # Calculate combined risk score
     risk_score = age_factor * stability_factor * tolerance_factor
@@ -37,10 +41,13 @@ def dynamic_allocation(risk_score, sentiment_data, financial_data):
     # Base allocations by risk tolerance level
     base_allocation = {'stocks': 0.4, 'bonds': 0.3, 'real_estate': 0.2, 'crypto': 0.1}
 
+    # Market sentiment only needs to be aggregated once per call
+    positive_sentiment = market_sentiment(sentiment_data) > 0
+
     # Modify allocations based on risk score and sentiment analysis
     for asset in base_allocation:
         # Adjust stock allocation if sentiment is positive
-        if asset == 'stocks' and sentiment_data[sentiment_data['ticker'] == 'NSEI']['sentiment_score'].mean() > 0:
+        if asset == 'stocks' and positive_sentiment:
             base_allocation[asset] += risk_score * 0.1
         # Reduce bond allocation in high-risk scores
         elif asset == 'bonds':
@@ -57,29 +64,116 @@ def dynamic_allocation(risk_score, sentiment_data, financial_data):
 
     return allocation
 
-# Example usage
-user_data = {
-    "age": 30,
-    "income_stability": "stable",
-    "risk_tolerance": "high"
-}
-
-# Mocked financial and sentiment data
-sentiment_data = pd.DataFrame({
-    "ticker": ["NSEI", "BND", "VNQ", "BTC-USD"],
-    "sentiment_score": [0.1, 0.02, -0.03, 0.05]
-})
-financial_data = pd.DataFrame({
-    "ticker": ["NSEI", "BND", "VNQ", "BTC-USD"],
-    "annualized_return": [0.12, 0.04, 0.07, 0.15],
-    "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
-})
-
-risk_score = risk_profile(user_data["age"], user_data["income_stability"], user_data["risk_tolerance"])
-allocation = dynamic_allocation(risk_score, sentiment_data, financial_data)
-
-print("Risk Score:", risk_score)
-print("Recommended Allocation:", allocation)
+def market_sentiment(sentiment_data, ticker='NSEI'):
+    """
+    Aggregates the sentiment score of the market index used to tilt stock allocations.
+
+    Parameters:
+    - sentiment_data (DataFrame): DataFrame with sentiment scores.
+    - ticker (str): Index ticker whose sentiment drives the allocation.
+
+    Returns:
+    - sentiment (float): Mean sentiment score (NaN if the ticker is missing).
+    """
+    return sentiment_data[sentiment_data['ticker'] == ticker]['sentiment_score'].mean()
+
+def _round_like_scalar(values):
+    """
+    Rounds to 2 decimals exactly like Python's round(), which np.round does not always match.
+    Scores take few distinct values, so only the unique values are rounded in Python.
+    """
+    unique_values, inverse = np.unique(values, return_inverse=True)
+    rounded = np.array([round(value, 2) for value in unique_values.tolist()], dtype=np.float64)
+    return rounded[inverse].reshape(np.shape(values))
+
+def risk_profile_batch(users):
+    """
+    Vectorized risk_profile over many users; matches the scalar function exactly.
+
+    Parameters:
+    - users (DataFrame): One row per user with 'age', 'income_stability' and 'risk_tolerance' columns.
+
+    Returns:
+    - risk_scores (ndarray): Risk score of every user, in row order.
+    """
+    age = users['age'].to_numpy()
+    age_factor = np.maximum(0, 100 - age) / 100
+    stability_factor = users['income_stability'].map(STABILITY_FACTORS).fillna(0.5).to_numpy(dtype=np.float64)
+    tolerance_factor = users['risk_tolerance'].map(TOLERANCE_FACTORS).fillna(0.75).to_numpy(dtype=np.float64)
+
+    risk_scores = age_factor * stability_factor * tolerance_factor
+    return _round_like_scalar(risk_scores)
+
+def dynamic_allocation_batch(risk_scores, sentiment_data, financial_data):
+    """
+    Vectorized dynamic_allocation for an array of risk scores; matches the scalar function exactly.
+
+    Parameters:
+    - risk_scores (array-like): Risk scores, one per user.
+    - sentiment_data (DataFrame): DataFrame with sentiment scores.
+    - financial_data (DataFrame): DataFrame with historical asset returns and volatilities.
+
+    Returns:
+    - allocations (ndarray): Matrix of shape (len(risk_scores), 4) with percentage allocations,
+      columns ordered as ASSET_CLASSES.
+    """
+    risk_scores = np.asarray(risk_scores, dtype=np.float64)
+    positive_sentiment = market_sentiment(sentiment_data) > 0
+
+    # Apply the scalar adjustment rules column by column, in the same floating point order
+    stocks = 0.4 + risk_scores * 0.1 if positive_sentiment else np.full_like(risk_scores, 0.4)
+    bonds = 0.3 - (1 - risk_scores) * 0.1
+    real_estate = np.where(risk_scores < 0.5, 0.2 - 0.05, 0.2)
+    crypto = np.where(risk_scores > 0.7, 0.1 + 0.05, 0.1)
+
+    # Normalize allocations to ensure they add up to 100%
+    weights = np.column_stack([stocks, bonds, real_estate, crypto])
+    total_allocation = ((stocks + bonds) + real_estate) + crypto
+    return _round_like_scalar((weights / total_allocation[:, None]) * 100)
+
+def evaluate_clients(users, sentiment_data, financial_data):
+    """
+    Scores and allocates a whole client book in one pass.
+
+    Parameters:
+    - users (DataFrame): One row per user with 'age', 'income_stability' and 'risk_tolerance' columns.
+    - sentiment_data (DataFrame): DataFrame with sentiment scores.
+    - financial_data (DataFrame): DataFrame with historical asset returns and volatilities.
+
+    Returns:
+    - risk_scores (ndarray): Risk score of every user.
+    - allocations (ndarray): Allocation matrix with columns ordered as ASSET_CLASSES.
+    """
+    risk_scores = risk_profile_batch(users)
+    allocations = dynamic_allocation_batch(risk_scores, sentiment_data, financial_data)
+    return risk_scores, allocations
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    # Example usage
+    user_data = {
+        "age": 30,
+        "income_stability": "stable",
+        "risk_tolerance": "high"
+    }
+
+    # Mocked financial and sentiment data
+    sentiment_data = pd.DataFrame({
+        "ticker": ["NSEI", "BND", "VNQ", "BTC-USD"],
+        "sentiment_score": [0.1, 0.02, -0.03, 0.05]
+    })
+    financial_data = pd.DataFrame({
+        "ticker": ["NSEI", "BND", "VNQ", "BTC-USD"],
+        "annualized_return": [0.12, 0.04, 0.07, 0.15],
+        "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
+    })
+
+    risk_score = risk_profile(user_data["age"], user_data["income_stability"], user_data["risk_tolerance"])
+    allocation = dynamic_allocation(risk_score, sentiment_data, financial_data)
+
+    print("Risk Score:", risk_score)
+    print("Recommended Allocation:", allocation)
 
 
 # Explanation
@@ -1,68 +1,160 @@
-import os
-import pickle
-from data_fetcher import fetch_data
+import argparse
+import sys
+
+from data_fetcher import fetch_incremental_financial_data, fetch_sentiment_data
+from data_providers import YFinanceProvider, ReplayProvider
 from risk_profiler import risk_profile, dynamic_allocation
 from goal_checker_multi import check_multi_goal_feasibility
-from tax_adjustment import apply_taxes_and_fees, adjust_for_inflation
 from recommendation_engine import create_summary
+from market_data_store import MarketDataStore
+from asset_stats import AssetStats
+import instrumentation
+from instrumentation import stage, increment
 
-# Set up caching mechanism to avoid repeated fetching
-CACHE_FILE = "cached_data.pkl"
-
-def cache_data(data, filename=CACHE_FILE):
-    with open(filename, "wb") as f:
-        pickle.dump(data, f)
+# Local columnar market data store, keyed per (ticker, period, interval)
+STORE_DIR = "market_data"
 
-def load_cached_data(filename=CACHE_FILE):
-    if os.path.exists(filename):
-        with open(filename, "rb") as f:
-            return pickle.load(f)
-    return None
+def load_market_data(tickers, store, period="5y", interval="1d", provider=None):
+    # Stale tickers only request the bars after their last stored date; fresh ones are read from the store
+    stale_tickers = store.stale_tickers(tickers, period, interval)
+    increment("cache_hits", len(tickers) - len(stale_tickers))
+    increment("cache_misses", len(stale_tickers))
+    with stage("fetch"):
+        if stale_tickers:
+            print(f"Fetching new data for {stale_tickers}...")
+            _, errors = fetch_incremental_financial_data(stale_tickers, provider or YFinanceProvider(), store, period,
+                                                         interval, max_workers=8, retries=2)
+            increment("tickers_fetched", len(stale_tickers) - len(errors))
+            increment("fetch_errors", len(errors))
+        else:
+            print("Using stored financial data.")
+        sentiment_data = fetch_sentiment_data(tickers)
+    with stage("cache_load"):
+        financial_data = store.read_panel(tickers, period, interval)
+    return financial_data, sentiment_data
 
-def run_pipeline(tickers, initial_investment, goals, user_data, tax_rates, fees, inflation_rate):
-    # Step 1: Fetch market data (with caching)
-    cached_data = load_cached_data()
-    if cached_data:
-        print("Using cached financial and sentiment data.")
-        financial_data, sentiment_data = cached_data['financial_data'], cached_data['sentiment_data']
-    else:
-        print("Fetching new data...")
-        data = fetch_data(tickers)
-        financial_data = data['financial_data']
-        sentiment_data = data['sentiment_data']
-        cache_data({'financial_data': financial_data, 'sentiment_data': sentiment_data})
+def run_pipeline(tickers, initial_investment, goals, user_data, tax_rates, fees, inflation_rate,
+                 store=None, period="5y", interval="1d", provider=None, report_path=None, report_formats=("png",),
+                 asset_tickers=None):
+    # Step 1: Fetch market data (served from the local store while fresh), including every ticker
+    # that holds an asset class
+    asset_tickers = asset_tickers or DEFAULT_ASSET_TICKERS
+    tickers = list(tickers) + [ticker for ticker in asset_tickers.values() if ticker not in tickers]
+    store = store or MarketDataStore(STORE_DIR)
+    financial_data, sentiment_data = load_market_data(tickers, store, period, interval, provider)
 
     # Step 2: Profile risk and dynamically allocate assets
-    risk_score = risk_profile(user_data["age"], user_data["income_stability"], user_data["risk_tolerance"])
-    asset_allocation = dynamic_allocation(risk_score, sentiment_data, financial_data)
+    with stage("risk_profiling"):
+        risk_score = risk_profile(user_data["age"], user_data["income_stability"], user_data["risk_tolerance"])
+        asset_allocation = dynamic_allocation(risk_score, sentiment_data, financial_data)
     print("Dynamic Asset Allocation:", asset_allocation)
 
-    # Step 3: Check goal feasibility for multiple goals
-    feasibility_results = check_multi_goal_feasibility(
-        initial_investment, goals, asset_allocation, financial_data, tax_rates, fees, inflation_rate
-    )
+    # Step 3: Check goal feasibility for multiple goals on return statistics of the price history,
+    # looked up per asset class through the ticker holding it
+    with stage("asset_stats"):
+        asset_stats = AssetStats.from_price_history(financial_data).for_assets(asset_tickers, asset_allocation.keys())
+    with stage("goal_check"):
+        feasibility_results, projections = check_multi_goal_feasibility(
+            initial_investment, goals, asset_allocation, asset_stats, tax_rates, fees, inflation_rate,
+            return_projections=True
+        )
     
-    # Step 4: Generate summary and recommendations
-    projections = {goal_name: [feasibility_results[goal_name]['median_projection']] for goal_name in goals}
-    summary = create_summary(feasibility_results, projections)
+    # Step 4: Generate summary and recommendations, plotting the full net projection distributions
+    with stage("plotting"):
+        summary = create_summary(feasibility_results, projections, report_path, report_formats)
     print("Summary:", summary)
+    return summary
 
-# Example user and input data
-tickers = ["RELIANCE.NS", "TCS.NS", "NSEI", "^BSESN"]  # Indian market tickers
-initial_investment = 1000000  # Example starting capital
-goals = {
+# Example user and input data, used as CLI defaults
+DEFAULT_TICKERS = ["RELIANCE.NS", "TCS.NS", "NSEI", "^BSESN"]  # Indian market tickers
+# Ticker whose price history stands for each asset class of the allocation
+DEFAULT_ASSET_TICKERS = {"stocks": "^BSESN", "bonds": "GILT5YBEES.NS", "real_estate": "EMBASSY.NS", "crypto": "BTC-INR"}
+DEFAULT_GOALS = {
     "House": {"goal_amount": 2000000, "timeline_years": 15, "priority": "high"},
     "Retirement": {"goal_amount": 10000000, "timeline_years": 30, "priority": "medium"},
     "Education": {"goal_amount": 1000000, "timeline_years": 10, "priority": "low"}
 }
-user_data = {
-    "age": 30,
-    "income_stability": "stable",
-    "risk_tolerance": "high"
-}
-tax_rates = {"short_term": 0.15, "long_term": 0.10}
-fees = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}
-inflation_rate = 0.05  # 5% inflation
+DEFAULT_TAX_RATES = {"short_term": 0.15, "long_term": 0.10}
+DEFAULT_FEES = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}
+
+def parse_goal(text):
+    # NAME:AMOUNT:YEARS[:PRIORITY], e.g. House:2000000:15:high
+    parts = text.split(":")
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError(f"Goal must look like NAME:AMOUNT:YEARS[:PRIORITY], got {text!r}")
+    priority = parts[3] if len(parts) == 4 else "medium"
+    return parts[0], {"goal_amount": float(parts[1]), "timeline_years": int(parts[2]), "priority": priority}
+
+def parse_asset_ticker(text):
+    # CLASS=TICKER, e.g. stocks=^BSESN
+    asset, separator, ticker = text.partition("=")
+    if not separator or not asset or not ticker:
+        raise argparse.ArgumentTypeError(f"Asset ticker must look like CLASS=TICKER, got {text!r}")
+    return asset, ticker
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Check the feasibility of investment goals against market data.")
+    parser.add_argument("--tickers", nargs="+", default=DEFAULT_TICKERS, help="Tickers to fetch market data for.")
+    parser.add_argument("--initial-investment", type=float, default=1000000, help="Starting capital.")
+    parser.add_argument("--goal", type=parse_goal, action="append", dest="goals",
+                        help="Goal as NAME:AMOUNT:YEARS[:PRIORITY]; repeat for several goals (default: example goals).")
+    parser.add_argument("--asset-tickers", nargs="+", type=parse_asset_ticker, default=[],
+                        help="Ticker holding each asset class as CLASS=TICKER, e.g. stocks=^BSESN bonds=GILT5YBEES.NS "
+                             "(classes not given keep their defaults).")
+    parser.add_argument("--age", type=int, default=30)
+    parser.add_argument("--income-stability", choices=["stable", "moderate", "unstable"], default="stable")
+    parser.add_argument("--risk-tolerance", choices=["low", "medium", "high"], default="high")
+    parser.add_argument("--inflation-rate", type=float, default=0.05, help="Annual inflation rate (e.g., 0.05).")
+    parser.add_argument("--period", default="5y", help="History period (e.g., '5y').")
+    parser.add_argument("--interval", default="1d", help="Bar interval (e.g., '1d').")
+    parser.add_argument("--store", default=STORE_DIR, help="Directory of the local market data store.")
+    parser.add_argument("--replay-dir", help="Read bars from '<ticker>.csv' files in this directory instead of the network.")
+    parser.add_argument("--report", help="Write the projection report headless to this path (without extension) "
+                                         "instead of showing one window per goal.")
+    parser.add_argument("--report-format", action="append", choices=["png", "svg", "pdf"],
+                        help="Report file format; repeat for several (default: png).")
+    parser.add_argument("--log-json", action="store_true", help="Write one JSON log line per finished stage to stderr.")
+    parser.add_argument("--metrics-json", help="Write stage timings and counters as JSON to this file.")
+    parser.add_argument("--metrics-prometheus", help="Write stage timings and counters in Prometheus text format.")
+    parser.add_argument("--trace-memory", action="store_true", help="Track per-stage memory peaks with tracemalloc.")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"], help="Profile the run.")
+    parser.add_argument("--profile-output", help="File for the profile (pstats or HTML); printed to stderr if omitted.")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    goals = dict(args.goals) if args.goals else DEFAULT_GOALS
+    user_data = {
+        "age": args.age,
+        "income_stability": args.income_stability,
+        "risk_tolerance": args.risk_tolerance
+    }
+    provider = ReplayProvider(args.replay_dir) if args.replay_dir else None
+    asset_tickers = {**DEFAULT_ASSET_TICKERS, **dict(args.asset_tickers)}
+    pipeline_args = (args.tickers, args.initial_investment, goals, user_data, DEFAULT_TAX_RATES, DEFAULT_FEES,
+                     args.inflation_rate, MarketDataStore(args.store), args.period, args.interval, provider,
+                     args.report, tuple(args.report_format or ["png"]), asset_tickers)
+
+    # Instrumentation stays disabled (and free) unless some metrics output is requested
+    instrumented = args.log_json or args.metrics_json or args.metrics_prometheus or args.trace_memory
+    if instrumented:
+        instrumentation.enable(sys.stderr if args.log_json else None, args.trace_memory)
+    try:
+        if args.profile:
+            instrumentation.profile_run(run_pipeline, *pipeline_args, profiler=args.profile,
+                                        output=args.profile_output)
+        else:
+            run_pipeline(*pipeline_args)
+    finally:
+        metrics = instrumentation.disable() if instrumented else None
+    if metrics is not None:
+        if args.metrics_json:
+            with open(args.metrics_json, "w") as f:
+                f.write(instrumentation.export_json(metrics))
+        if args.metrics_prometheus:
+            with open(args.metrics_prometheus, "w") as f:
+                f.write(instrumentation.export_prometheus(metrics))
 
-# Run the full pipeline
-run_pipeline(tickers, initial_investment, goals, user_data, tax_rates, fees, inflation_rate)
+if __name__ == "__main__":
+    # Run the full pipeline
+    main()
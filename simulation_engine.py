@@ -0,0 +1,605 @@
+import os
+import time
+import warnings
+from functools import partial
+
+import numpy as np
+
+from streaming_stats import StreamingSummary, DEFAULT_RELATIVE_ACCURACY, verdict_is_settled, wilson_interval
+from instrumentation import increment
+
+# Upper bound on the size of the (simulations x years) return matrix held in memory at once
+DEFAULT_MAX_CHUNK_BYTES = 64 * 1024 * 1024
+# Sampling strategies; 'control_variate' draws plain paths and reweights them afterwards
+SAMPLING_METHODS = ("plain", "antithetic", "control_variate", "sobol")
+
+
+def _chunk_rows(max_years, dtype, max_chunk_bytes):
+    """
+    Works out how many simulation paths fit into one chunk under the memory budget.
+
+    Parameters:
+    - max_years (int): Number of yearly steps simulated per path.
+    - dtype (dtype): Floating point type of the simulated matrix.
+    - max_chunk_bytes (int): Memory budget for a single (paths x years) matrix.
+
+    Returns:
+    - rows (int): Number of paths to simulate per chunk (at least 1).
+    """
+    bytes_per_path = max(1, max_years) * np.dtype(dtype).itemsize
+    return max(1, int(max_chunk_bytes // bytes_per_path))
+
+
+def standard_normal_draws(rng, rows, years, dtype=np.float64, sampling="plain"):
+    """
+    Draws a (rows x years) matrix of standard normals with the requested sampling strategy.
+
+    'antithetic' pairs every draw with its negation; 'sobol' maps a scrambled Sobol sequence
+    (one dimension per year, scrambled from rng) through the normal inverse CDF, which needs scipy;
+    'plain' and 'control_variate' draw independent normals. Sobol's generator setup and the control
+    variate's weights are fixed costs; the README's "Sampling strategies" section lists the path
+    counts from which each strategy beats plain sampling.
+
+    Parameters:
+    - rng (Generator): NumPy random generator.
+    - rows (int): Number of paths.
+    - years (int): Number of yearly steps.
+    - dtype (dtype): np.float32 or np.float64.
+    - sampling (str): One of SAMPLING_METHODS.
+
+    Returns:
+    - draws (ndarray): Array of shape (rows, years).
+    """
+    if sampling in ("plain", "control_variate"):
+        return rng.standard_normal((rows, years), dtype=dtype)
+    if sampling == "antithetic":
+        half = rng.standard_normal(((rows + 1) // 2, years), dtype=dtype)
+        return np.concatenate([half, -half])[:rows]
+    if sampling != "sobol":
+        raise ValueError(f"Unknown sampling method: {sampling}")
+    try:
+        from scipy.special import ndtri
+        from scipy.stats import qmc
+    except ImportError:
+        raise ImportError("Sobol sampling needs scipy; use another sampling method or pip install scipy")
+    try:
+        sobol = qmc.Sobol(d=years, scramble=True, rng=rng)
+    except TypeError:
+        # scipy releases before 1.15 take the generator as 'seed'
+        sobol = qmc.Sobol(d=years, scramble=True, seed=rng)
+    with warnings.catch_warnings():
+        # Chunks are rarely a power of two; a prefix of a scrambled sequence is still low-discrepancy
+        warnings.simplefilter("ignore", UserWarning)
+        uniforms = sobol.random(rows)
+    return ndtri(uniforms).astype(dtype, copy=False)
+
+
+def _compound(draws, annual_return, annual_volatility):
+    # 1 + N(annual_return, annual_volatility) from standard normals, compounded in place
+    scalar = draws.dtype.type
+    draws *= scalar(annual_volatility)
+    draws += scalar(1 + annual_return)
+    np.cumprod(draws, axis=1, out=draws)
+    return draws
+
+
+def simulate_growth_paths(annual_return, annual_volatility, years, num_simulations, dtype=np.float64, rng=None,
+                          sampling="plain"):
+    """
+    Draws the full matrix of yearly returns and reduces it to cumulative growth factors.
+
+    Parameters:
+    - annual_return (float): Expected annual return rate.
+    - annual_volatility (float): Annual volatility of returns.
+    - years (int): Investment horizon in years.
+    - num_simulations (int): Number of simulated paths.
+    - dtype (dtype): np.float32 or np.float64.
+    - rng (Generator): NumPy random generator; a fresh one is created if omitted.
+    - sampling (str): Sampling strategy for the normal draws (see standard_normal_draws).
+
+    Returns:
+    - growth (ndarray): Array of shape (num_simulations, years) where column t holds the growth
+      of one unit of capital after t + 1 years.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    draws = standard_normal_draws(rng, num_simulations, years, dtype, sampling)
+    return _compound(draws, annual_return, annual_volatility)
+
+
+def lognormal_controls(draws, annual_return, annual_volatility, horizons):
+    """
+    Builds a lognormal control variate for every horizon from the same normal draws as the paths.
+
+    With s = annual_volatility / (1 + annual_return) and m = log(1 + annual_return) - s**2 / 2, the
+    control exp(h * m + s * (Z_1 + ... + Z_h)) tracks the growth after h years closely and its mean
+    is exactly (1 + annual_return) ** h, the closed-form lognormal mean.
+
+    Parameters:
+    - draws (ndarray): Standard normal draws of shape (rows, years).
+    - annual_return (float): Expected annual return rate (above -100%).
+    - annual_volatility (float): Annual volatility of returns.
+    - horizons (ndarray): Horizons in years.
+
+    Returns:
+    - controls (ndarray): Control values of shape (rows, len(horizons)).
+    - means (ndarray): Exact mean of each control.
+    """
+    if annual_return <= -1:
+        raise ValueError("Control variates need an annual return above -100%.")
+    spread = annual_volatility / (1 + annual_return)
+    drift = np.log1p(annual_return) - spread ** 2 / 2
+    horizons = np.asarray(horizons, dtype=np.int64)
+    sums = np.zeros((draws.shape[0], horizons.size))
+    nonzero = horizons > 0
+    sums[:, nonzero] = np.cumsum(draws, axis=1, dtype=np.float64)[:, horizons[nonzero] - 1]
+    controls = np.exp(horizons * drift + spread * sums)
+    return controls, (1 + annual_return) ** horizons.astype(np.float64)
+
+
+def control_variate_weights(controls, means):
+    """
+    Computes linear control-variate weights for every path and horizon (Hesterberg and Nelson).
+
+    The weights w_i = 1/n - (mean(X) - E[X]) * (X_i - mean(X)) / sum((X_j - mean(X))**2) sum to 1 and
+    make the weighted mean of the control equal its exact mean. Any weighted estimate (a success
+    probability, or a percentile through the weighted distribution) is then the control-variate
+    estimate with the optimal coefficient for that statistic.
+
+    Parameters:
+    - controls (ndarray): Control values of shape (rows, horizons).
+    - means (ndarray): Exact mean of each control.
+
+    Returns:
+    - weights (ndarray): Weights of shape (rows, horizons).
+    """
+    rows = controls.shape[0]
+    centered = controls - controls.mean(axis=0)
+    squares = np.einsum("ij,ij->j", centered, centered)
+    shift = controls.mean(axis=0) - means
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(squares > 0, shift / squares, 0.0)
+    return 1.0 / rows - centered * slope
+
+
+def weighted_success_probability(values, goal_amount, weights=None):
+    """
+    Fraction of paths reaching the goal amount (0 to 1), optionally with path weights.
+    """
+    reached = values >= goal_amount
+    if weights is None:
+        return int(np.count_nonzero(reached)) / len(values)
+    # Control-variate estimates can leave [0, 1] slightly
+    return float(min(1.0, max(0.0, weights[reached].sum())))
+
+
+def weighted_percentiles(values, percentiles, weights=None):
+    """
+    Percentiles of the path values, optionally of the weighted distribution.
+
+    Parameters:
+    - values (ndarray): Path values.
+    - percentiles (list): Percentiles between 0 and 100.
+    - weights (ndarray): Optional path weights summing to 1 (e.g., from control_variate_weights).
+
+    Returns:
+    - results (ndarray): One value per percentile (np.percentile when unweighted).
+    """
+    if weights is None:
+        return np.percentile(values, percentiles)
+    order = np.argsort(values, kind="stable")
+    # Negative weights can make the running sum dip; keep it monotone for the inverse CDF
+    cumulative = np.maximum.accumulate(np.cumsum(weights[order]))
+    positions = np.searchsorted(cumulative, np.asarray(percentiles, dtype=np.float64) / 100, side="left")
+    return values[order][np.minimum(positions, len(values) - 1)]
+
+
+def _simulate_chunk(task):
+    """
+    Simulates one chunk of paths from its own seed stream (runs inside worker processes).
+
+    Parameters:
+    - task (tuple): (annual_return, annual_volatility, horizons, rows, dtype name, SeedSequence,
+      sampling).
+
+    Returns:
+    - values (ndarray): Growth of one unit of capital at each horizon, shape (rows, len(horizons)).
+    - controls (ndarray): Lognormal control per horizon, only with 'control_variate' sampling.
+    """
+    annual_return, annual_volatility, horizons, rows, dtype_name, seed_sequence, sampling = task
+    dtype = np.dtype(dtype_name)
+    values = np.ones((rows, horizons.size), dtype=dtype)
+    controls = np.ones((rows, horizons.size)) if sampling == "control_variate" else None
+    max_years = int(horizons.max()) if horizons.size else 0
+    if max_years > 0:
+        rng = np.random.default_rng(seed_sequence)
+        draws = standard_normal_draws(rng, rows, max_years, dtype, sampling)
+        if sampling == "control_variate":
+            controls, _ = lognormal_controls(draws, annual_return, annual_volatility, horizons)
+        growth = _compound(draws, annual_return, annual_volatility)
+        # A horizon of zero years leaves the initial investment untouched
+        nonzero = horizons > 0
+        values[:, nonzero] = growth[:, horizons[nonzero] - 1]
+    if sampling == "control_variate":
+        return values, controls
+    return values
+
+
+def simulate_horizon_values(initial_investment, annual_return, annual_volatility, horizons, num_simulations=1000,
+                            dtype=np.float64, seed=None, workers=1, chunk_size=None,
+                            max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES, sampling="plain", return_weights=False):
+    """
+    Simulates wealth paths out to the longest horizon and reads off the value at every horizon.
+
+    Paths are simulated in chunks, each drawn from its own stream spawned from one SeedSequence.
+    The chunk layout depends only on num_simulations and chunk_size, so for a given seed the result
+    is bit-identical whatever the number of workers.
+
+    Parameters:
+    - initial_investment (float): Starting capital.
+    - annual_return (float): Expected annual return rate.
+    - annual_volatility (float): Annual volatility of returns.
+    - horizons (list): Investment horizons in years at which to read the path value.
+    - num_simulations (int): Number of simulated paths.
+    - dtype (dtype): np.float32 or np.float64.
+    - seed (int or SeedSequence): Root seed; fresh OS entropy is used if omitted.
+    - workers (int): Number of worker processes; 1 simulates in the calling process.
+    - chunk_size (int): Paths per chunk; derived from max_chunk_bytes if omitted.
+    - max_chunk_bytes (int): Memory budget for the return matrix of a single chunk.
+    - sampling (str): 'plain', 'antithetic', 'control_variate' or 'sobol' (see
+      standard_normal_draws); every chunk is an independent antithetic set or Sobol scramble.
+    - return_weights (bool): Also return the path weights for estimates; they are None except with
+      'control_variate' sampling, where they come from control_variate_weights.
+
+    Returns:
+    - values (ndarray): Array of shape (num_simulations, len(horizons)) with the simulated value
+      of the investment at each horizon.
+    - weights (ndarray): Path weights of the same shape, or None (only with return_weights=True).
+    """
+    dtype = np.dtype(dtype)
+    starts, tasks = _chunk_tasks(annual_return, annual_volatility, horizons, num_simulations, dtype, seed,
+                                 chunk_size, max_chunk_bytes, sampling)
+    increment("paths_simulated", num_simulations)
+
+    values = np.empty((num_simulations, np.size(horizons)), dtype=dtype)
+    controls = np.empty((num_simulations, np.size(horizons))) if sampling == "control_variate" else None
+    for start, chunk in zip(starts, run_tasks(_simulate_chunk, tasks, workers)):
+        if controls is not None:
+            chunk, chunk_controls = chunk
+            controls[start:start + len(chunk_controls)] = chunk_controls
+        values[start:start + len(chunk)] = chunk
+
+    values *= dtype.type(initial_investment)
+    if not return_weights:
+        return values
+    weights = None
+    if controls is not None:
+        # Exact means of the lognormal controls (see lognormal_controls)
+        means = (1 + annual_return) ** np.asarray(horizons, dtype=np.float64).reshape(-1)
+        weights = control_variate_weights(controls, means)
+    return values, weights
+
+
+def _chunk_tasks(annual_return, annual_volatility, horizons, num_simulations, dtype, seed, chunk_size,
+                 max_chunk_bytes, sampling="plain"):
+    """
+    Splits a simulation into chunk tasks, each with its own seed stream.
+
+    Returns:
+    - starts (list): First path index of every chunk.
+    - tasks (list): Arguments for _simulate_chunk, one tuple per chunk.
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.dtype(np.float32), np.dtype(np.float64)):
+        raise ValueError(f"Unsupported dtype for simulation: {dtype}")
+    if sampling not in SAMPLING_METHODS:
+        raise ValueError(f"Unknown sampling method: {sampling}")
+
+    horizons = np.asarray(horizons, dtype=np.int64).reshape(-1)
+    max_years = int(horizons.max()) if horizons.size else 0
+    if chunk_size is None:
+        chunk_size = _chunk_rows(max_years, dtype, max_chunk_bytes)
+    chunk_size = max(1, int(chunk_size))
+
+    # One independent seed stream per chunk
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    starts = list(range(0, num_simulations, chunk_size))
+    streams = seed_sequence.spawn(len(starts))
+    tasks = [
+        (annual_return, annual_volatility, horizons, min(chunk_size, num_simulations - start), dtype.name, stream,
+         sampling)
+        for start, stream in zip(starts, streams)
+    ]
+    return starts, tasks
+
+
+def seed_snapshot(seed):
+    """
+    Returns a seed that draws the same streams as seed does from this point on.
+
+    Spawning streams advances a SeedSequence, so a run that is replayed later (e.g., by the goal
+    solver) takes a snapshot before it starts; unseeded runs get their OS entropy fixed here.
+
+    Parameters:
+    - seed (int, SeedSequence or None): Seed as accepted by the simulators.
+
+    Returns:
+    - seed (int or SeedSequence): The integer seed itself, or a fresh SeedSequence in the same state.
+    """
+    if seed is None:
+        return np.random.SeedSequence()
+    if not isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size,
+                                  n_children_spawned=seed.n_children_spawned)
+
+
+def run_tasks(function, tasks, workers, executor=None):
+    """
+    Runs tasks in order, on a process pool when more than one worker is requested.
+
+    This is the shared process-pool runner of the engines (simulation, SIP, bootstrap and report
+    rendering): results come back in task order whatever the number of workers, and
+    concurrent.futures is only imported when a pool is actually started.
+
+    Parameters:
+    - function (callable): Picklable module-level function applied to every task.
+    - tasks (list): Picklable task arguments, one per call.
+    - workers (int): Number of worker processes; 1 runs the tasks in the calling process.
+    - executor (Executor): Already open pool to reuse instead of starting one for this call.
+
+    Returns:
+    - results (generator): function(task) for every task, in task order.
+    """
+    if executor is not None and len(tasks) > 1:
+        yield from executor.map(function, tasks)
+    elif workers > 1 and len(tasks) > 1:
+        # The process pool machinery is only imported when it is used
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(function, tasks)
+    else:
+        for task in tasks:
+            yield function(task)
+
+
+def _aggregate_chunk(task, initial_investment, goal_amounts, transform, relative_accuracy):
+    """
+    Simulates one chunk and reduces it to one StreamingSummary per horizon (runs inside workers).
+    """
+    values = _simulate_chunk(task)
+    values *= values.dtype.type(initial_investment)
+    horizons = task[2]
+    summaries = []
+    for column, (horizon, goal_amount) in enumerate(zip(horizons.tolist(), goal_amounts)):
+        column_values = values[:, column]
+        if transform is not None:
+            column_values = transform(column_values, horizon)
+        summaries.append(StreamingSummary(goal_amount, relative_accuracy).update(column_values))
+    return summaries
+
+
+def aggregate_horizon_values(initial_investment, annual_return, annual_volatility, horizons, goal_amounts,
+                             num_simulations=1000, transform=None, dtype=np.float64, seed=None, workers=1,
+                             chunk_size=None, max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES,
+                             relative_accuracy=DEFAULT_RELATIVE_ACCURACY, executor=None):
+    """
+    Streams a simulation through success counters and quantile sketches at constant memory.
+
+    Each chunk is reduced to per-horizon summaries as soon as it is simulated (inside the worker
+    when running on a process pool), and the summaries are merged, so no projection array is kept.
+
+    Parameters:
+    - initial_investment (float): Starting capital.
+    - annual_return (float): Expected annual return rate.
+    - annual_volatility (float): Annual volatility of returns.
+    - horizons (list): Investment horizons in years.
+    - goal_amounts (list): Goal amount checked at each horizon.
+    - num_simulations (int): Number of simulated paths.
+    - transform (callable): Optional picklable function (values, horizon) -> values applied to every
+      chunk before aggregation (e.g., taxes, fees and inflation).
+    - dtype (dtype): np.float32 or np.float64.
+    - seed (int or SeedSequence): Root seed; fresh OS entropy is used if omitted.
+    - workers (int): Number of worker processes.
+    - chunk_size (int): Paths per chunk; derived from max_chunk_bytes if omitted.
+    - max_chunk_bytes (int): Memory budget for the return matrix of a single chunk.
+    - relative_accuracy (float): Relative error bound of the streamed percentiles.
+    - executor (Executor): Open process pool to run the chunks on instead of starting one.
+
+    Returns:
+    - summaries (list): One StreamingSummary per horizon.
+    """
+    starts, tasks = _chunk_tasks(annual_return, annual_volatility, horizons, num_simulations, dtype, seed,
+                                 chunk_size, max_chunk_bytes)
+    increment("paths_simulated", num_simulations)
+    summaries = [StreamingSummary(goal_amount, relative_accuracy) for goal_amount in goal_amounts]
+    aggregate = partial(_aggregate_chunk, initial_investment=initial_investment, goal_amounts=list(goal_amounts),
+                        transform=transform, relative_accuracy=relative_accuracy)
+    for chunk_summaries in run_tasks(aggregate, tasks, workers, executor):
+        for summary, chunk_summary in zip(summaries, chunk_summaries):
+            summary.merge(chunk_summary)
+    return summaries
+
+
+def adaptive_horizon_values(initial_investment, annual_return, annual_volatility, horizons, goal_amounts,
+                            batch_size=1000, max_simulations=100000, threshold=0.75, tolerance=0.01,
+                            confidence=0.95, transform=None, dtype=np.float64, seed=None, workers=1,
+                            chunk_size=None, max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES,
+                            relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """
+    Simulates in batches until every horizon's success probability is settled or the cap is hit.
+
+    A probability is settled once its Wilson confidence interval is within the tolerance or lies
+    clearly on one side of the threshold (see verdict_is_settled). Batch k always draws from the
+    k-th stream spawned from seed and is split into chunks of chunk_size paths, so a seeded run is
+    reproducible for any number of workers. Batches that span several chunks share one process
+    pool, started once for the whole loop.
+
+    Parameters:
+    - initial_investment (float): Starting capital.
+    - annual_return (float): Expected annual return rate.
+    - annual_volatility (float): Annual volatility of returns.
+    - horizons (list): Investment horizons in years.
+    - goal_amounts (list): Goal amount checked at each horizon.
+    - batch_size (int): Paths simulated between convergence checks.
+    - max_simulations (int): Upper bound on the total number of paths.
+    - threshold (float): Feasibility cut on the success probability (0 to 1).
+    - tolerance (float): Target half-width of the confidence interval (0 to 1).
+    - confidence (float): Confidence level of the interval.
+    - transform (callable): Optional picklable function (values, horizon) -> values applied before aggregation.
+    - dtype (dtype): np.float32 or np.float64.
+    - seed (int or SeedSequence): Root seed; fresh OS entropy is used if omitted.
+    - workers (int): Number of worker processes the chunks of each batch are spread across.
+    - chunk_size (int): Paths per chunk; derived from max_chunk_bytes if omitted.
+    - max_chunk_bytes (int): Memory budget for the return matrix of a single chunk.
+    - relative_accuracy (float): Relative error bound of the streamed percentiles.
+
+    Returns:
+    - summaries (list): One StreamingSummary per horizon.
+    - diagnostics (dict): 'paths_used' plus per-horizon 'intervals' and 'interval_widths' (0 to 1).
+    """
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    summaries = [StreamingSummary(goal_amount, relative_accuracy) for goal_amount in goal_amounts]
+    paths_used = 0
+    if chunk_size is None:
+        chunk_size = _chunk_rows(int(np.max(horizons, initial=0)), np.dtype(dtype), max_chunk_bytes)
+
+    executor = None
+    if workers > 1 and min(batch_size, max_simulations) > chunk_size:
+        # One pool serves every batch instead of a new pool per batch
+        from concurrent.futures import ProcessPoolExecutor
+
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while paths_used < max_simulations:
+            rows = min(batch_size, max_simulations - paths_used)
+            batch_summaries = aggregate_horizon_values(initial_investment, annual_return, annual_volatility,
+                                                       horizons, goal_amounts, rows, transform, dtype,
+                                                       seed_sequence.spawn(1)[0], workers, chunk_size,
+                                                       max_chunk_bytes, relative_accuracy, executor)
+            for summary, batch_summary in zip(summaries, batch_summaries):
+                summary.merge(batch_summary)
+            paths_used += rows
+            if all(verdict_is_settled(summary.success, threshold, tolerance, confidence) for summary in summaries):
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    intervals = [wilson_interval(summary.success.successes, summary.count, confidence) for summary in summaries]
+    diagnostics = {
+        "paths_used": paths_used,
+        "intervals": intervals,
+        "interval_widths": [upper - lower for lower, upper in intervals]
+    }
+    return summaries, diagnostics
+
+
+def adaptive_batch_values(initial_investment, annual_return, annual_volatility, horizons, paths_used, batch_size=1000,
+                          dtype=np.float64, seed=None, workers=1, chunk_size=None,
+                          max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES):
+    """
+    Simulates the paths an adaptive run aggregated as one value matrix.
+
+    Batch k draws from the k-th stream spawned from seed with the chunk layout of
+    adaptive_horizon_values, and the draws only depend on the longest horizon, so for the same
+    seed, batch size, chunk size and longest horizon the rows are exactly the paths that run used.
+
+    Parameters:
+    - initial_investment (float): Starting capital.
+    - annual_return (float): Expected annual return rate.
+    - annual_volatility (float): Annual volatility of returns.
+    - horizons (list): Investment horizons in years at which to read the path value.
+    - paths_used (int): Number of paths the adaptive run used (its diagnostics' 'paths_used').
+    - batch_size (int): Batch size of the adaptive run.
+    - dtype (dtype): np.float32 or np.float64.
+    - seed (int or SeedSequence): Root seed of the adaptive run.
+    - workers (int): Number of worker processes.
+    - chunk_size (int): Paths per chunk; derived from max_chunk_bytes if omitted.
+    - max_chunk_bytes (int): Memory budget for the return matrix of a single chunk.
+
+    Returns:
+    - values (ndarray): Array of shape (paths_used, len(horizons)).
+    """
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    if chunk_size is None:
+        chunk_size = _chunk_rows(int(np.max(horizons, initial=0)), np.dtype(dtype), max_chunk_bytes)
+    batches = []
+    simulated = 0
+    while simulated < paths_used:
+        rows = min(batch_size, paths_used - simulated)
+        batches.append(simulate_horizon_values(initial_investment, annual_return, annual_volatility, horizons, rows,
+                                               dtype, seed_sequence.spawn(1)[0], workers, chunk_size,
+                                               max_chunk_bytes))
+        simulated += rows
+    if not batches:
+        return np.empty((0, np.size(horizons)), dtype=dtype)
+    return np.concatenate(batches)
+
+
+def simulate_terminal_values(initial_investment, annual_return, annual_volatility, years, num_simulations=1000,
+                             dtype=np.float64, seed=None, workers=1, chunk_size=None,
+                             max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES, sampling="plain"):
+    """
+    Runs the vectorized Monte Carlo simulation and returns the end value of every path.
+
+    Parameters:
+    - initial_investment (float): Starting capital.
+    - annual_return (float): Expected annual return rate.
+    - annual_volatility (float): Annual volatility of returns.
+    - years (int): Investment horizon in years.
+    - num_simulations (int): Number of simulated paths.
+    - dtype (dtype): np.float32 or np.float64.
+    - seed (int or SeedSequence): Root seed; fresh OS entropy is used if omitted.
+    - workers (int): Number of worker processes.
+    - chunk_size (int): Paths per chunk; derived from max_chunk_bytes if omitted.
+    - max_chunk_bytes (int): Memory budget for the return matrix of a single chunk.
+    - sampling (str): 'plain', 'antithetic' or 'sobol' path sampling ('control_variate' paths are
+      plain; their weights come from simulate_horizon_values).
+
+    Returns:
+    - projections (ndarray): Simulated end values, one per path.
+    """
+    values = simulate_horizon_values(initial_investment, annual_return, annual_volatility, [years], num_simulations,
+                                     dtype=dtype, seed=seed, workers=workers, chunk_size=chunk_size,
+                                     max_chunk_bytes=max_chunk_bytes, sampling=sampling)
+    return values[:, 0]
+
+
+def measure_parallel_scaling(worker_counts=(1, 2, 4, 8), num_simulations=1000000, years=30, chunk_size=50000,
+                             annual_return=0.08, annual_volatility=0.15, seed=0):
+    """
+    Times the same seeded simulation for several worker counts.
+
+    Parameters:
+    - worker_counts (tuple): Worker counts to measure.
+    - num_simulations (int): Number of simulated paths per run.
+    - years (int): Investment horizon in years.
+    - chunk_size (int): Paths per chunk (kept fixed so every run draws identical paths).
+    - annual_return (float): Expected annual return rate.
+    - annual_volatility (float): Annual volatility of returns.
+    - seed (int): Root seed shared by all runs.
+
+    Returns:
+    - timings (dict): Wall time in seconds and speedup over the first entry, keyed by worker count.
+    """
+    timings = {}
+    reference = None
+    for workers in worker_counts:
+        started = time.perf_counter()
+        values = simulate_terminal_values(1.0, annual_return, annual_volatility, years, num_simulations,
+                                          seed=seed, workers=workers, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+        if reference is None:
+            reference = (values, elapsed)
+        elif not np.array_equal(values, reference[0]):
+            raise RuntimeError(f"Simulation with {workers} workers is not reproducible")
+        timings[workers] = {"seconds": round(elapsed, 4), "speedup": round(reference[1] / elapsed, 2)}
+    return timings
+
+
+if __name__ == "__main__":
+    print(f"CPU cores available: {os.cpu_count()}")
+    print(measure_parallel_scaling())
+
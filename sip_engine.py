@@ -0,0 +1,192 @@
+import numpy as np
+
+from simulation_engine import DEFAULT_MAX_CHUNK_BYTES, run_tasks
+from streaming_stats import wilson_interval
+from instrumentation import increment
+
+# Lots held at least this many months are taxed as long-term gains
+LONG_TERM_MONTHS = 12
+MONTHS_PER_YEAR = 12
+
+
+def contribution_schedule(months, monthly_contribution, initial_investment=0.0, annual_step_up=0.0):
+    """
+    Builds the amount invested at the start of every month.
+
+    Parameters:
+    - months (int): Number of monthly steps.
+    - monthly_contribution (float or list): SIP amount per month, or one amount per month.
+    - initial_investment (float): Lump sum invested together with the first instalment.
+    - annual_step_up (float): Yearly increase of the SIP amount (e.g., 0.1 for 10%).
+
+    Returns:
+    - contributions (ndarray): Amount invested at the start of each month.
+    """
+    contributions = np.broadcast_to(np.asarray(monthly_contribution, dtype=np.float64), (months,)).copy()
+    if annual_step_up:
+        contributions *= (1 + annual_step_up) ** (np.arange(months) // MONTHS_PER_YEAR)
+    if months:
+        contributions[0] += initial_investment
+    return contributions
+
+
+def _simulate_sip_chunk(task):
+    """
+    Simulates one chunk of monthly SIP paths and values every horizon lot by lot (runs inside workers).
+
+    Each instalment buys units at the path's current unit price (the cumulative growth so far), the
+    way a fund NAV works. With U(t) the cumulative units bought up to month t and P(t) the price,
+    the wealth after month t is P(t) * U(t), and every lot bought at least LONG_TERM_MONTHS before
+    the horizon is a prefix of the lots, so long- and short-term values follow from one cumulative
+    sum: cost is linear in paths x months, without a loop over lots.
+
+    Parameters:
+    - task (tuple): (annual_return, annual_volatility, contributions, horizon months, rows, tax_rates,
+      SeedSequence).
+
+    Returns:
+    - values (ndarray): Gross wealth, shape (rows, horizons).
+    - taxes (ndarray): Capital gains tax due on liquidation at each horizon, shape (rows, horizons).
+    """
+    annual_return, annual_volatility, contributions, horizon_months, rows, tax_rates, seed_sequence = task
+    months = contributions.size
+    values = np.zeros((rows, horizon_months.size))
+    taxes = np.zeros((rows, horizon_months.size))
+    if months == 0:
+        return values, taxes
+
+    # Monthly returns 1 + N(annual_return / 12, annual_volatility / sqrt(12)), compounded in place
+    rng = np.random.default_rng(seed_sequence)
+    prices = rng.standard_normal((rows, months))
+    prices *= annual_volatility / np.sqrt(MONTHS_PER_YEAR)
+    prices += 1 + annual_return / MONTHS_PER_YEAR
+    np.cumprod(prices, axis=1, out=prices)
+
+    # Units bought by instalment j at the price reached after month j - 1, accumulated over lots
+    units = np.empty((rows, months))
+    units[:, 0] = contributions[0]
+    np.divide(contributions[1:], prices[:, :-1], out=units[:, 1:])
+    np.cumsum(units, axis=1, out=units)
+    invested = np.cumsum(contributions)
+
+    for column, month in enumerate(horizon_months.tolist()):
+        if month == 0:
+            continue
+        price = prices[:, month - 1]
+        total_units = units[:, month - 1]
+        values[:, column] = price * total_units
+
+        # Lots bought in months 0 .. month - LONG_TERM_MONTHS are long-term at this horizon
+        last_long_term = month - LONG_TERM_MONTHS
+        if last_long_term >= 0:
+            long_term_units = units[:, last_long_term]
+            long_term_cost = invested[last_long_term]
+        else:
+            long_term_units = np.zeros(rows)
+            long_term_cost = 0.0
+        long_term_gain = price * long_term_units - long_term_cost
+        short_term_gain = price * (total_units - long_term_units) - (invested[month - 1] - long_term_cost)
+        # Losses offset gains within the same holding category
+        taxes[:, column] = (np.maximum(long_term_gain, 0) * tax_rates['long_term']
+                            + np.maximum(short_term_gain, 0) * tax_rates['short_term'])
+    return values, taxes
+
+
+def simulate_sip(monthly_contribution, annual_return, annual_volatility, horizons, tax_rates, initial_investment=0.0,
+                 annual_step_up=0.0, num_simulations=1000, seed=None, workers=1, chunk_size=None,
+                 max_chunk_bytes=DEFAULT_MAX_CHUNK_BYTES):
+    """
+    Simulates monthly contributions (SIP) with per-lot short- and long-term capital gains tax.
+
+    Paths are simulated in chunks, each drawn from its own stream spawned from one SeedSequence, so
+    a seeded run is bit-identical for any number of workers.
+
+    Parameters:
+    - monthly_contribution (float or list): SIP amount per month, or one amount per month.
+    - annual_return (float): Expected annual return rate.
+    - annual_volatility (float): Annual volatility of returns.
+    - horizons (list): Investment horizons in years (whole or fractional, rounded to months).
+    - tax_rates (dict): Tax rates for 'short_term' and 'long_term' gains.
+    - initial_investment (float): Lump sum invested at the start.
+    - annual_step_up (float): Yearly increase of the SIP amount (e.g., 0.1 for 10%).
+    - num_simulations (int): Number of simulated paths.
+    - seed (int or SeedSequence): Root seed; fresh OS entropy is used if omitted.
+    - workers (int): Number of worker processes.
+    - chunk_size (int): Paths per chunk; derived from max_chunk_bytes if omitted.
+    - max_chunk_bytes (int): Memory budget for the per-chunk price and unit matrices.
+
+    Returns:
+    - result (dict): 'value' (gross wealth), 'tax' and 'net_value' arrays of shape
+      (num_simulations, len(horizons)), and 'invested', the total contributed by each horizon.
+    """
+    horizon_months = np.rint(np.asarray(horizons, dtype=np.float64).reshape(-1) * MONTHS_PER_YEAR).astype(np.int64)
+    months = int(horizon_months.max()) if horizon_months.size else 0
+    contributions = contribution_schedule(months, monthly_contribution, initial_investment, annual_step_up)
+    if chunk_size is None:
+        # Two float64 (paths x months) matrices per chunk: prices and cumulative units
+        chunk_size = max(1, int(max_chunk_bytes // (2 * max(1, months) * 8)))
+
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    starts = list(range(0, num_simulations, chunk_size))
+    tasks = [
+        (annual_return, annual_volatility, contributions, horizon_months, min(chunk_size, num_simulations - start),
+         dict(tax_rates), stream)
+        for start, stream in zip(starts, seed_sequence.spawn(len(starts)))
+    ]
+
+    increment("paths_simulated", num_simulations)
+    values = np.empty((num_simulations, horizon_months.size))
+    taxes = np.empty((num_simulations, horizon_months.size))
+    for start, (chunk_values, chunk_taxes) in zip(starts, run_tasks(_simulate_sip_chunk, tasks, workers)):
+        values[start:start + len(chunk_values)] = chunk_values
+        taxes[start:start + len(chunk_taxes)] = chunk_taxes
+
+    invested = np.concatenate([[0.0], np.cumsum(contributions)])[horizon_months]
+    return {"value": values, "tax": taxes, "net_value": values - taxes, "invested": invested}
+
+
+def check_sip_goal_feasibility(monthly_contribution, goal_amount, timeline_years, annual_return, annual_volatility,
+                               tax_rates, initial_investment=0.0, annual_step_up=0.0, num_simulations=1000,
+                               seed=None, workers=1):
+    """
+    Evaluates if a goal funded by monthly contributions is reached after capital gains tax.
+
+    Parameters:
+    - monthly_contribution (float): SIP amount per month.
+    - goal_amount (float): Target amount after tax.
+    - timeline_years (int): Investment horizon in years.
+    - annual_return (float): Expected annual return rate of the portfolio.
+    - annual_volatility (float): Annual volatility of the portfolio.
+    - tax_rates (dict): Tax rates for 'short_term' and 'long_term' gains.
+    - initial_investment (float): Lump sum invested at the start.
+    - annual_step_up (float): Yearly increase of the SIP amount.
+    - num_simulations (int): Number of simulated paths.
+    - seed (int): Optional root seed.
+    - workers (int): Number of worker processes.
+
+    Returns:
+    - result (dict): Feasibility status, post-tax projections and the total amount invested.
+    """
+    sip = simulate_sip(monthly_contribution, annual_return, annual_volatility, [timeline_years], tax_rates,
+                       initial_investment, annual_step_up, num_simulations, seed, workers)
+    projections = sip["net_value"][:, 0]
+    successes = int(np.count_nonzero(projections >= goal_amount))
+    probability_of_success = successes / len(projections) * 100
+    lower_probability, upper_probability = wilson_interval(successes, len(projections))
+
+    recommendation = "Goal is achievable with current inputs." if probability_of_success >= 75 else (
+        "Consider increasing the monthly contribution, extending timeline, or adjusting risk tolerance."
+    )
+    return {
+        "monthly_contribution": monthly_contribution,
+        "goal_amount": goal_amount,
+        "timeline_years": timeline_years,
+        "total_invested": round(float(sip["invested"][0]), 2),
+        "probability_of_success": round(probability_of_success, 2),
+        "recommendation": recommendation,
+        "median_projection": round(float(np.median(projections)), 2),
+        "projection_range": (round(float(np.percentile(projections, 25)), 2),
+                             round(float(np.percentile(projections, 75)), 2)),
+        "paths_used": len(projections),
+        "interval_width": round((upper_probability - lower_probability) * 100, 2)
+    }
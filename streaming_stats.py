@@ -0,0 +1,246 @@
+import math
+
+import numpy as np
+
+# Default relative accuracy of streamed percentiles (0.1%)
+DEFAULT_RELATIVE_ACCURACY = 0.001
+# Magnitudes below this are counted in the zero bucket
+MIN_INDEXABLE_VALUE = 1e-9
+
+
+class SuccessCounter:
+    """
+    Running count of simulated paths and of paths reaching a goal amount.
+    """
+
+    def __init__(self, goal_amount):
+        self.goal_amount = goal_amount
+        self.count = 0
+        self.successes = 0
+
+    def update(self, values):
+        """
+        Adds one chunk of simulated values.
+        """
+        values = np.asarray(values)
+        self.count += values.size
+        self.successes += int(np.count_nonzero(values >= self.goal_amount))
+        return self
+
+    def merge(self, other):
+        """
+        Adds the counts of another counter (e.g., from a worker process) for the same goal amount.
+        """
+        self.count += other.count
+        self.successes += other.successes
+        return self
+
+    @property
+    def probability(self):
+        """
+        Fraction of paths reaching the goal amount (0 to 1).
+        """
+        return self.successes / self.count if self.count else 0.0
+
+
+class _Buckets:
+    """
+    Dense histogram over integer bucket keys that grows to cover the keys it has seen.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def _cover(self, low, high):
+        if not self.counts.size:
+            self.offset = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            return
+        new_offset = min(self.offset, low)
+        new_end = max(self.offset + self.counts.size - 1, high)
+        if new_offset == self.offset and new_end == self.offset + self.counts.size - 1:
+            return
+        counts = np.zeros(new_end - new_offset + 1, dtype=np.int64)
+        counts[self.offset - new_offset:self.offset - new_offset + self.counts.size] = self.counts
+        self.offset, self.counts = new_offset, counts
+
+    def add_keys(self, keys):
+        if not keys.size:
+            return
+        low, high = int(keys.min()), int(keys.max())
+        self._cover(low, high)
+        self.counts += np.bincount(keys - self.offset, minlength=self.counts.size)[:self.counts.size]
+
+    def add_counts(self, offset, counts):
+        if not counts.size:
+            return
+        self._cover(offset, offset + counts.size - 1)
+        start = offset - self.offset
+        self.counts[start:start + counts.size] += counts
+
+    def keys(self):
+        return np.arange(self.offset, self.offset + self.counts.size)
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with logarithmic buckets (DDSketch).
+
+    A value x > 0 falls into bucket ceil(log_gamma(x)) with gamma = (1 + a) / (1 - a), and every
+    bucket is represented by a value within a relative distance a of all values it holds (negative
+    values use a mirrored set of buckets). Hence, for a relative accuracy a, quantile(q) is within a
+    relative error a of the exact order statistic at rank floor(q * (n - 1)); np.percentile
+    interpolates between that order statistic and the next one, which only adds the (for large n
+    negligible) gap between adjacent order statistics. Memory depends only on the value range:
+    about ln(max / min) / (2a) counters, e.g. ~28k counters for a = 0.1% over 24 orders of magnitude,
+    however many values are streamed. Sketches with the same accuracy merge exactly.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = _Buckets()
+        self.negative = _Buckets()
+        self.zero_count = 0
+        self.count = 0
+
+    def _keys(self, magnitudes):
+        return np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+
+    def update(self, values):
+        """
+        Adds one chunk of values in a single vectorized pass.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        positive = values[values > MIN_INDEXABLE_VALUE]
+        negative = values[values < -MIN_INDEXABLE_VALUE]
+        self.positive.add_keys(self._keys(positive))
+        self.negative.add_keys(self._keys(-negative))
+        self.zero_count += values.size - positive.size - negative.size
+        self.count += values.size
+        return self
+
+    def merge(self, other):
+        """
+        Adds the contents of another sketch with the same relative accuracy.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged.")
+        self.positive.add_counts(other.positive.offset, other.positive.counts)
+        self.negative.add_counts(other.negative.offset, other.negative.counts)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def _representative(self, keys):
+        return 2 * self.gamma ** keys.astype(np.float64) / (self.gamma + 1)
+
+    def quantile(self, q):
+        """
+        Estimates one or several quantiles.
+
+        Parameters:
+        - q (float or array-like): Quantiles between 0 and 1.
+
+        Returns:
+        - values (float or ndarray): Estimated quantile values (NaN if the sketch is empty).
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if not self.count:
+            return np.full(q.shape, np.nan) if q.ndim else float("nan")
+
+        # Buckets in ascending value order: large negatives, zeros, then positives
+        negative_keys = self.negative.keys()[::-1]
+        values = np.concatenate([
+            -self._representative(negative_keys),
+            [0.0],
+            self._representative(self.positive.keys())
+        ])
+        counts = np.concatenate([self.negative.counts[::-1], [self.zero_count], self.positive.counts])
+        cumulative = np.cumsum(counts)
+
+        ranks = np.floor(q * (self.count - 1))
+        estimates = values[np.searchsorted(cumulative, ranks, side="right")]
+        return estimates if q.ndim else float(estimates)
+
+
+class StreamingSummary:
+    """
+    Success counter and quantile sketch for one goal, fed chunk by chunk.
+    """
+
+    def __init__(self, goal_amount, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.success = SuccessCounter(goal_amount)
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def update(self, values):
+        self.success.update(values)
+        self.sketch.update(values)
+        return self
+
+    def merge(self, other):
+        self.success.merge(other.success)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def count(self):
+        return self.success.count
+
+    def summary(self):
+        """
+        Returns success probability (in percent), median and interquartile range.
+        """
+        lower, median, upper = self.sketch.quantile([0.25, 0.5, 0.75])
+        return {
+            "probability_of_success": self.success.probability * 100,
+            "median_projection": float(median),
+            "projection_range": (float(lower), float(upper))
+        }
+
+
+def wilson_interval(successes, count, confidence=0.95):
+    """
+    Wilson score confidence interval for a success probability.
+
+    Parameters:
+    - successes (int): Number of successful paths.
+    - count (int): Number of simulated paths.
+    - confidence (float): Confidence level of the interval.
+
+    Returns:
+    - lower (float), upper (float): Interval bounds between 0 and 1.
+    """
+    from statistics import NormalDist
+
+    if not count:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    p = successes / count
+    denominator = 1 + z ** 2 / count
+    center = (p + z ** 2 / (2 * count)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / count + z ** 2 / (4 * count ** 2)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def verdict_is_settled(counter, threshold=0.75, tolerance=0.01, confidence=0.95):
+    """
+    Decides whether enough paths have been simulated for a success probability.
+
+    The estimate is settled once its confidence interval is narrower than the tolerance on either
+    side, or lies entirely above or below the feasibility threshold.
+
+    Parameters:
+    - counter (SuccessCounter): Running success count.
+    - threshold (float): Feasibility cut on the success probability (0 to 1).
+    - tolerance (float): Target half-width of the confidence interval (0 to 1).
+    - confidence (float): Confidence level of the interval.
+
+    Returns:
+    - settled (bool): True if simulation can stop.
+    """
+    lower, upper = wilson_interval(counter.successes, counter.count, confidence)
+    return (upper - lower) / 2 <= tolerance or lower >= threshold or upper < threshold
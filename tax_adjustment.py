@@ -1,4 +1,190 @@
 import numpy as np
+from streaming_stats import StreamingSummary, DEFAULT_RELATIVE_ACCURACY
+
+def net_cost_factors(tax_rates, fees, inflation_rate, horizons):
+    """
+    Precomputes the per-horizon factors of the tax, fee and inflation adjustment.
+
+    Parameters:
+    - tax_rates (dict): Tax rates for 'short_term' and 'long_term' gains.
+    - fees (dict): Transaction fees as percentages for each asset class.
+    - inflation_rate (float): Annual inflation rate (e.g., 0.05 for 5%).
+    - horizons (int or list): Holding period(s) in years.
+
+    Returns:
+    - factors (dict): 'fee_multiplier' (float), plus 'tax_rates' and 'inflation_divisors' with one
+      entry per horizon.
+    """
+    horizons = np.atleast_1d(horizons).tolist()
+    return {
+        "fee_multiplier": 1 - sum(fees.values()) / 100,
+        "tax_rates": np.array([tax_rates['long_term'] if horizon >= 1 else tax_rates['short_term']
+                               for horizon in horizons]),
+        # Python's pow, as in the scalar formula, so every divisor is bit-identical to it
+        "inflation_divisors": np.array([(1 + inflation_rate) ** horizon for horizon in horizons])
+    }
+
+
+def apply_net_costs(values, factors, out=None):
+    """
+    Applies fees, tax on gains and inflation to an array of projections with precomputed factors.
+
+    The result is bit-identical to apply_taxes_and_fees followed by adjust_for_inflation: the same
+    operations run in the same order, only vectorized. Fees scale every value; a taxable gain only
+    arises where the fee-adjusted value exceeds the original one (negative values when fees are
+    positive), so the tax step only touches those elements.
+
+    Parameters:
+    - values (ndarray): Projections; the last axis runs over the horizons of factors when there is
+      more than one (e.g., shape (simulations, horizons)).
+    - factors (dict): Output of net_cost_factors.
+    - out (ndarray): Optional floating point output array; pass values itself to adjust in place.
+
+    Returns:
+    - net_values (ndarray): Projections after taxes, fees and inflation.
+    """
+    if out is None:
+        out = _float_array(values)
+    elif out is not values:
+        np.copyto(out, values)
+    scalar = out.dtype.type
+    fee_multiplier = scalar(factors["fee_multiplier"])
+
+    # Fees below 100% can only raise negative values (and fee rebates only positive ones); only
+    # those elements can carry a taxable gain, so only they are kept for the tax step
+    candidates = None
+    if fee_multiplier != 1:
+        candidates = out < 0 if fee_multiplier < 1 else out > 0
+        if candidates.any():
+            original = out[candidates]
+        else:
+            candidates = None
+
+    out *= fee_multiplier
+    if candidates is not None:
+        tax_rates = np.broadcast_to(factors["tax_rates"].astype(out.dtype), out.shape)[candidates]
+        after_fees = out[candidates]
+        taxable_gain = np.maximum(scalar(0), after_fees - original)
+        out[candidates] = after_fees - taxable_gain * tax_rates
+
+    out /= factors["inflation_divisors"].astype(out.dtype)
+    return out
+
+
+def _float_array(values):
+    # Fresh floating point copy; integer input is promoted to float64 like the scalar formulas
+    values = np.asarray(values)
+    return np.array(values, dtype=values.dtype if np.issubdtype(values.dtype, np.floating) else np.float64)
+
+
+def net_projections(projections, tax_rates, fees, inflation_rate, horizons, out=None):
+    """
+    Applies taxes, fees and inflation to array projections for one or several horizons.
+
+    Parameters:
+    - projections (ndarray): Projections; the last axis runs over the horizons when several are given.
+    - tax_rates (dict): Tax rates for 'short_term' and 'long_term' gains.
+    - fees (dict): Transaction fees as percentages for each asset class.
+    - inflation_rate (float): Annual inflation rate (e.g., 0.05 for 5%).
+    - horizons (int or list): Holding period(s) in years.
+    - out (ndarray): Optional output array; pass projections itself to adjust in place.
+
+    Returns:
+    - net_values (ndarray): Projections after taxes, fees and inflation.
+    """
+    return apply_net_costs(projections, net_cost_factors(tax_rates, fees, inflation_rate, horizons), out)
+
+
+def _percentile_positions(count, percentiles):
+    # Order statistics and weights of np.percentile's linear method, computed the same way
+    virtual_indexes = (count - 1) * (np.asarray(percentiles, dtype=np.float64) / 100)
+    previous_indexes = np.floor(virtual_indexes)
+    gamma = virtual_indexes - previous_indexes
+    previous_indexes = previous_indexes.astype(np.intp)
+    return previous_indexes, np.minimum(previous_indexes + 1, count - 1), gamma
+
+def _lerp(lower, upper, gamma):
+    # np.percentile's interpolation, which works from the nearer order statistic
+    difference = upper - lower
+    return np.where(gamma >= 0.5, upper - difference * (1 - gamma), lower + difference * gamma)
+
+def sweep_net_costs(projections, goal_amount, holding_period, tax_rates, fees, inflation_rates,
+                    percentiles=(25, 75), presorted=False):
+    """
+    Evaluates one set of pre-tax projections under every combination of tax, fee and inflation scenarios.
+
+    Net value is a non-decreasing function of the pre-tax value for any fees up to 100%, so the
+    order of the projections is the same in every scenario: they are sorted once, every
+    percentile is read from the same order statistics (transformed per scenario) and the number
+    of successes is found by a bisection over the sorted values that runs for all scenarios at
+    once. A sweep therefore costs one sort plus O(log n) work per scenario, and every figure equals
+    what apply_net_costs followed by np.median / np.percentile / a success count gives.
+
+    Parameters:
+    - projections (ndarray): Pre-tax projections of one goal.
+    - goal_amount (float): Target the net projections are compared with.
+    - holding_period (int): Investment horizon in years.
+    - tax_rates (dict or list): Tax rate dict or a list of scenarios.
+    - fees (dict or list): Fee dict or a list of scenarios.
+    - inflation_rates (float or list): Inflation rate or a list of scenarios.
+    - percentiles (tuple): Percentiles of the net projections to report besides the median.
+    - presorted (bool): Projections are already sorted ascending (skips the sort).
+
+    Returns:
+    - sweep (dict): 'success_probability' (percent), 'median_projection' and one 'percentile_<p>'
+      entry per percentile, each of shape (tax scenarios, fee scenarios, inflation scenarios).
+    """
+    tax_rates = [tax_rates] if isinstance(tax_rates, dict) else list(tax_rates)
+    fees = [fees] if isinstance(fees, dict) else list(fees)
+    inflation_rates = np.atleast_1d(inflation_rates).tolist()
+    values = _float_array(projections).reshape(-1)
+    if not presorted:
+        values.sort()
+    count = len(values)
+    if count == 0:
+        raise ValueError("A sensitivity sweep needs at least one projection.")
+    scalar = values.dtype.type
+
+    # Scenario factors broadcast over a (tax, fee, inflation) grid, exactly as net_cost_factors builds them
+    factors = [net_cost_factors(tax_rate, fee, inflation_rate, holding_period)
+               for tax_rate in tax_rates for fee in fees for inflation_rate in inflation_rates]
+    shape = (len(tax_rates), len(fees), len(inflation_rates))
+    fee_multipliers = np.array([factor["fee_multiplier"] for factor in factors]).astype(values.dtype)
+    if (fee_multipliers < 0).any():
+        raise ValueError("Fees above 100% reverse the order of net values and cannot be swept.")
+    scenario_tax_rates = np.array([factor["tax_rates"][0] for factor in factors]).astype(values.dtype)
+    divisors = np.array([factor["inflation_divisors"][0] for factor in factors]).astype(values.dtype)
+
+    def net(gathered):
+        # apply_net_costs on gathered values (scenarios first); elements without a gain subtract zero
+        after_fees = gathered * fee_multipliers.reshape((-1,) + (1,) * (gathered.ndim - 1))
+        taxable_gain = np.maximum(scalar(0), after_fees - gathered)
+        after_fees -= taxable_gain * scenario_tax_rates.reshape(after_fees.shape[:1] + (1,) * (gathered.ndim - 1))
+        after_fees /= divisors.reshape(after_fees.shape[:1] + (1,) * (gathered.ndim - 1))
+        return after_fees
+
+    # Bisection for the first sorted projection whose net value reaches the goal, all scenarios at once
+    low = np.zeros(len(factors), dtype=np.intp)
+    high = np.full(len(factors), count, dtype=np.intp)
+    while (low < high).any():
+        middle = (low + high) // 2
+        reached = net(values[np.minimum(middle, count - 1)]) >= goal_amount
+        active = low < high
+        high = np.where(active & reached, middle, high)
+        low = np.where(active & ~reached, middle + 1, low)
+    sweep = {"success_probability": ((count - low) / count * 100).reshape(shape)}
+
+    # Median as np.median takes it: the middle order statistic or the mean of the two middle ones
+    middle_indexes = [count // 2] if count % 2 else [count // 2 - 1, count // 2]
+    middle_values = net(np.broadcast_to(values[middle_indexes], (len(factors), len(middle_indexes))).copy())
+    sweep["median_projection"] = middle_values.mean(axis=1).reshape(shape)
+
+    previous_indexes, next_indexes, gamma = _percentile_positions(count, percentiles)
+    lower = net(np.broadcast_to(values[previous_indexes], (len(factors), len(percentiles))).copy())
+    upper = net(np.broadcast_to(values[next_indexes], (len(factors), len(percentiles))).copy())
+    for column, percentile in enumerate(percentiles):
+        sweep[f"percentile_{percentile:g}"] = _lerp(lower[:, column], upper[:, column], gamma[column]).reshape(shape)
+    return sweep
 
 def apply_taxes_and_fees(projections, tax_rates, fees, holding_period):
     """
@@ -13,18 +199,8 @@ def apply_taxes_and_fees(projections, tax_rates, fees, holding_period):
     Returns:
     - adjusted_projections (list): Projections adjusted for tax and fees.
     """
-    adjusted_projections = []
-    tax_rate = tax_rates['long_term'] if holding_period >= 1 else tax_rates['short_term']
-    
-    for value in projections:
-        # Apply fees
-        after_fees = value * (1 - sum(fees.values()) / 100)
-        # Apply tax on gains
-        taxable_gain = max(0, after_fees - value)
-        after_tax = after_fees - (taxable_gain * tax_rate)
-        adjusted_projections.append(after_tax)
-    
-    return adjusted_projections
+    # Zero inflation makes the inflation divisor exactly 1, leaving only the tax and fee steps
+    return apply_net_costs(projections, net_cost_factors(tax_rates, fees, 0.0, holding_period)).tolist()
 
 def adjust_for_inflation(projections, inflation_rate, years):
     """
@@ -38,32 +214,53 @@ def adjust_for_inflation(projections, inflation_rate, years):
     Returns:
     - inflation_adjusted_projections (list): Projections adjusted for inflation.
     """
-    inflation_adjusted_projections = [p / ((1 + inflation_rate) ** years) for p in projections]
-    return inflation_adjusted_projections
+    projections = _float_array(projections)
+    projections /= projections.dtype.type((1 + inflation_rate) ** years)
+    return projections.tolist()
 
-def calculate_net_projections(initial_investment, goal_amount, projections, tax_rates, fees, inflation_rate, holding_period):
+def calculate_net_projections(initial_investment, goal_amount, projections, tax_rates, fees, inflation_rate, holding_period,
+                              streaming=False, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
     """
     Calculates net projections by applying taxes, fees, and inflation adjustment.
     
     Parameters:
     - initial_investment (float): Capital invested.
     - goal_amount (float): Target amount the user wants to reach.
-    - projections (list): List of Monte Carlo simulation projections.
+    - projections (list or ndarray): Monte Carlo simulation projections.
     - tax_rates (dict): Tax rates for short-term and long-term gains.
     - fees (dict): Transaction fees for each asset class.
     - inflation_rate (float): Expected annual inflation rate.
     - holding_period (int): Investment period in years.
+    - streaming (bool): Treat projections as an iterable of chunks and aggregate them with a running
+      success count and a quantile sketch instead of keeping every projection in memory.
+    - relative_accuracy (float): Relative error bound of the streamed percentiles.
     
     Returns:
     - result (dict): Net projections, probability of success, and goal feasibility status.
     """
-    # Adjust for taxes and fees
-    adjusted_projections = apply_taxes_and_fees(projections, tax_rates, fees, holding_period)
-    # Adjust for inflation
-    inflation_adjusted_projections = adjust_for_inflation(adjusted_projections, inflation_rate, holding_period)
+    factors = net_cost_factors(tax_rates, fees, inflation_rate, holding_period)
+    if streaming:
+        summary = StreamingSummary(goal_amount, relative_accuracy)
+        for chunk in projections:
+            summary.update(apply_net_costs(chunk, factors))
+        streamed = summary.summary()
+        success_probability = streamed["probability_of_success"]
+        recommendation = "Goal is feasible after adjustments." if success_probability >= 75 else "Increase investment, adjust timeline, or reduce fees."
+        lower_projection, upper_projection = streamed["projection_range"]
+        return {
+            "initial_investment": initial_investment,
+            "goal_amount": goal_amount,
+            "probability_of_success": round(success_probability, 2),
+            "recommendation": recommendation,
+            "median_projection": round(streamed["median_projection"], 2),
+            "projection_range": (round(lower_projection, 2), round(upper_projection, 2))
+        }
+
+    # Adjust for taxes, fees and inflation in one pass over a single array
+    inflation_adjusted_projections = apply_net_costs(projections, factors)
 
     # Probability of meeting the goal
-    success_probability = len([p for p in inflation_adjusted_projections if p >= goal_amount]) / len(inflation_adjusted_projections) * 100
+    success_probability = int(np.count_nonzero(inflation_adjusted_projections >= goal_amount)) / len(inflation_adjusted_projections) * 100
     recommendation = "Goal is feasible after adjustments." if success_probability >= 75 else "Increase investment, adjust timeline, or reduce fees."
 
     return {
@@ -76,17 +273,18 @@ def calculate_net_projections(initial_investment, goal_amount, projections, tax_
                              round(np.percentile(inflation_adjusted_projections, 75), 2))
     }
 
-# Example usage
-initial_investment = 50000
-goal_amount = 150000
-holding_period = 10
-projections = [100000, 120000, 130000, 140000, 150000, 160000]  # Sample projections from Monte Carlo
-tax_rates = {"short_term": 0.15, "long_term": 0.10}  # Placeholder rates for Indian market
-fees = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}  # Fees in percent
-inflation_rate = 0.05  # 5% annual inflation
+if __name__ == "__main__":
+    # Example usage
+    initial_investment = 50000
+    goal_amount = 150000
+    holding_period = 10
+    projections = [100000, 120000, 130000, 140000, 150000, 160000]  # Sample projections from Monte Carlo
+    tax_rates = {"short_term": 0.15, "long_term": 0.10}  # Placeholder rates for Indian market
+    fees = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}  # Fees in percent
+    inflation_rate = 0.05  # 5% annual inflation
 
-result = calculate_net_projections(initial_investment, goal_amount, projections, tax_rates, fees, inflation_rate, holding_period)
-print(result)
+    result = calculate_net_projections(initial_investment, goal_amount, projections, tax_rates, fees, inflation_rate, holding_period)
+    print(result)
 
 
 # Explanation of Key Components
@@ -96,4 +294,4 @@ print(result)
 # Adjusts future projections for inflation to provide real purchasing power, making the tool more realistic for long-term planning.
 # Goal Feasibility:
 # Provides a success probability and recommendation after accounting for taxes, fees, and inflation, helping users make informed decisions.
-# This module ensures realistic, after-tax projections, making goal recommendations more precise.
\ No newline at end of file
+# This module ensures realistic, after-tax projections, making goal recommendations more precise.
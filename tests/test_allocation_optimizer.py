@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from allocation_optimizer import SharedDraws, optimize_allocation
+from asset_stats import AssetStats, asset_return_vectors, asset_covariance
+from multi_asset_engine import simulate_allocation_horizon_values
+from tax_adjustment import net_projections
+
+ASSETS = ["stocks", "bonds", "real_estate", "crypto"]
+TAX_RATES = {"short_term": 0.15, "long_term": 0.1}
+FEES = {"stocks": 0.5, "bonds": 0.2}
+GOALS = {
+    "House": {"goal_amount": 1800000, "timeline_years": 12, "priority": "high"},
+    "Retirement": {"goal_amount": 4000000, "timeline_years": 25, "priority": "medium"},
+    "Education": {"goal_amount": 1200000, "timeline_years": 12, "priority": "low"}
+}
+
+
+@pytest.fixture(scope="module")
+def asset_stats():
+    # Correlated daily returns, so the covariance matrix has off-diagonal terms
+    rng = np.random.default_rng(0)
+    mixing = np.array([[1.0, 0.0, 0.0, 0.0], [0.2, 0.3, 0.0, 0.0], [0.5, 0.1, 0.6, 0.0], [0.8, 0.0, 0.2, 2.5]])
+    returns = rng.normal(size=(1500, 4)) @ mixing.T * 0.01 + np.array([0.0004, 0.0002, 0.0003, 0.0006])
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=pd.bdate_range("2015-01-01", periods=1500),
+                          columns=ASSETS)
+    return AssetStats.from_price_history(prices)
+
+
+def test_shared_draws_match_simulate_allocation_horizon_values(asset_stats):
+    num_simulations = 2000
+    candidates = np.array([[60, 20, 10, 10], [25, 50, 20, 5], [40, 30, 20, 10]], dtype=np.float64) / 100
+    draws = SharedDraws(1000000, GOALS, asset_stats, ASSETS, TAX_RATES, FEES, 0.05, num_simulations, seed=5)
+    probabilities = draws.success_probabilities(candidates)
+
+    mean_returns, _ = asset_return_vectors(asset_stats, ASSETS)
+    covariance = asset_covariance(asset_stats, ASSETS)
+    horizons = sorted({goal["timeline_years"] for goal in GOALS.values()})
+    values = simulate_allocation_horizon_values(1000000, candidates, mean_returns, covariance, horizons,
+                                                num_simulations, seed=5, chunk_size=num_simulations)
+    net_values = net_projections(values, TAX_RATES, FEES, 0.05, horizons)
+    for column, goal in enumerate(GOALS.values()):
+        successes = net_values[:, :, horizons.index(goal["timeline_years"])] >= goal["goal_amount"]
+        # Equal up to floating point rounding, which can only flip paths sitting on the goal amount
+        np.testing.assert_allclose(probabilities[:, column], successes.mean(axis=0), atol=2 / num_simulations)
+
+
+def test_candidate_blocks_do_not_change_the_scores(asset_stats):
+    candidates = np.random.default_rng(1).dirichlet(np.ones(4), size=50)
+    whole = SharedDraws(1000000, GOALS, asset_stats, ASSETS, TAX_RATES, FEES, 0.05, 500, seed=2)
+    blocked = SharedDraws(1000000, GOALS, asset_stats, ASSETS, TAX_RATES, FEES, 0.05, 500, seed=2, block_bytes=4096)
+    np.testing.assert_array_equal(whole.score(candidates)[0], blocked.score(candidates)[0])
+
+
+def test_seeded_optimization_is_reproducible(asset_stats):
+    first = optimize_allocation(1000000, GOALS, asset_stats, TAX_RATES, FEES, 0.05, num_simulations=300, seed=4)
+    second = optimize_allocation(1000000, GOALS, asset_stats, TAX_RATES, FEES, 0.05, num_simulations=300, seed=4)
+    first.pop("elapsed_seconds")
+    second.pop("elapsed_seconds")
+    assert first == second
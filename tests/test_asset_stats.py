@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from asset_stats import AssetStats
+
+DATES = pd.bdate_range("2021-01-01", periods=300)
+
+
+def price_panel(seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0004, 0.01, size=(len(DATES), 3))
+    prices = 100 * np.exp(np.cumsum(returns, axis=0))
+    panel = pd.DataFrame(prices, index=DATES, columns=["SPY", "AGG", "GLD"])
+    # A late listing leaves leading gaps in one ticker
+    panel.iloc[:40, 2] = np.nan
+    return panel
+
+
+@pytest.mark.parametrize("splits", [[200], [100, 101, 250]])
+def test_update_matches_a_rebuild_from_the_full_history(splits):
+    panel = price_panel()
+    bounds = [0] + splits + [len(panel)]
+    stats = AssetStats.from_price_history(panel.iloc[:bounds[1]])
+    for start, stop in zip(bounds[1:-1], bounds[2:]):
+        # Overlapping rows are ignored, so each update may resend the last seen bar
+        stats.update(panel.iloc[start - 1:stop])
+    rebuilt = AssetStats.from_price_history(panel)
+
+    np.testing.assert_allclose(stats.annualized_return, rebuilt.annualized_return, rtol=1e-12)
+    np.testing.assert_allclose(stats.annualized_volatility, rebuilt.annualized_volatility, rtol=1e-12)
+    np.testing.assert_allclose(stats.covariance, rebuilt.covariance, rtol=1e-10)
+    assert stats.last_date == rebuilt.last_date
+    assert stats.version == len(splits)
+
+
+def test_for_assets_reads_each_class_from_its_ticker():
+    stats = AssetStats.from_price_history(price_panel())
+    view = stats.for_assets({"stocks": "SPY", "bonds": "AGG"})
+
+    assert view.tickers == ["stocks", "bonds"]
+    assert view["stocks"] == stats["SPY"]
+    np.testing.assert_array_equal(view.covariance, stats.covariance_matrix(["SPY", "AGG"]))
+    with pytest.raises(ValueError, match="CASH"):
+        stats.for_assets({"stocks": "SPY", "cash": "CASH"})
+
+
+def mixed_calendar_panel(seed=1):
+    # Weekday equity quotes joined with a crypto asset quoted every day
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2019-01-01", "2023-12-31")
+    weekdays = days[days.dayofweek < 5]
+    equity = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0002, 0.01, len(weekdays)))), index=weekdays, name="EQ")
+    crypto = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.001, 0.04, len(days)))), index=days, name="BTC")
+    return pd.concat([equity, crypto], axis=1, sort=True), equity
+
+
+def test_each_ticker_keeps_its_own_calendar():
+    panel, equity = mixed_calendar_panel()
+    stats = AssetStats.from_price_history(panel)
+    alone = AssetStats.from_price_history(equity.to_frame())
+
+    assert stats["EQ"] == pytest.approx(alone["EQ"], rel=1e-12)
+    np.testing.assert_array_equal(stats.periods_per_year, [252, 365])
+    # Crypto's daily log returns, annualized over calendar days
+    daily = np.diff(np.log(panel["BTC"].to_numpy()))
+    assert stats["BTC"][0] == pytest.approx(daily.mean() * 365)
+    # The covariance is measured between the dates both are quoted
+    assert stats.covariance[0, 0] == pytest.approx(alone.covariance[0, 0])
+
+
+def test_update_matches_a_rebuild_on_mixed_calendars():
+    panel, _ = mixed_calendar_panel()
+    stats = AssetStats.from_price_history(panel.iloc[:800])
+    stats.update(panel.iloc[799:1300]).update(panel.iloc[1300:])
+    rebuilt = AssetStats.from_price_history(panel)
+
+    np.testing.assert_allclose(stats.annualized_return, rebuilt.annualized_return, rtol=1e-12)
+    np.testing.assert_allclose(stats.annualized_volatility, rebuilt.annualized_volatility, rtol=1e-12)
+    np.testing.assert_allclose(stats.covariance, rebuilt.covariance, rtol=1e-10)
+    np.testing.assert_array_equal(stats.last_prices, panel.ffill().iloc[-1].to_numpy())
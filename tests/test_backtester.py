@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtester import DAYS_PER_YEAR, backtest, rebalance_starts
+
+ASSETS = ["stocks", "crypto"]
+
+
+def mixed_calendar_prices(seed=0):
+    # Weekday equities joined with crypto quoted every day, from a Monday to a Friday
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2021-01-04", "2023-12-29")
+    crypto = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.001, 0.04, len(days)))), index=days)
+    weekdays = days[days.dayofweek < 5]
+    stocks = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0004, 0.01, len(weekdays)))), index=weekdays)
+    return pd.DataFrame({"stocks": stocks, "crypto": crypto})
+
+
+def test_annualized_return_follows_elapsed_time_not_row_count():
+    prices = mixed_calendar_prices()
+    mixed = backtest(prices, {"stocks": 100}, rebalance="never", assets=ASSETS)
+    weekdays = backtest(prices.dropna(), {"stocks": 100}, rebalance="never", assets=ASSETS)
+
+    years = (prices.index[-1] - prices.index[0]).days / DAYS_PER_YEAR
+    expected = (prices["stocks"].iloc[-1] / prices["stocks"].iloc[0]) ** (1 / years) - 1
+    assert mixed["annualized_return"][0] == pytest.approx(expected, rel=1e-12)
+    assert weekdays["annualized_return"][0] == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize("rebalance", ["daily", "weekly", "monthly", 5])
+def test_rebalancing_only_trades_when_every_market_is_open(rebalance):
+    prices = mixed_calendar_prices()
+    allocation = {"stocks": 60, "crypto": 40}
+    fees = {"stocks": 0.5, "crypto": 1.0}
+    mixed = backtest(prices, allocation, fees, rebalance=rebalance, assets=ASSETS)
+    weekdays = backtest(prices.dropna(), allocation, fees, rebalance=rebalance, assets=ASSETS)
+
+    # Every rebalance closes on a weekday, and the weekend rows only carry the crypto moves through
+    trading = mixed["dates"].dayofweek < 5
+    starts = rebalance_starts(mixed["dates"], rebalance, trading)
+    assert (mixed["dates"][starts[1:] - 1].dayofweek < 5).all()
+    np.testing.assert_allclose(mixed["equity"][:, trading], weekdays["equity"], rtol=1e-12)
+    assert mixed["turnover"] == pytest.approx(weekdays["turnover"], rel=1e-12)
+    assert mixed["fees_paid"] == pytest.approx(weekdays["fees_paid"], rel=1e-12)
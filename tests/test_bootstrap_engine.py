@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bootstrap_engine import (ReturnHistory, bootstrap_annual_returns, bootstrap_block_indices,
+                              simulate_bootstrap_horizon_values)
+
+ASSETS = ["stocks", "bonds", "real_estate", "crypto"]
+
+
+@pytest.fixture(scope="module", params=["stationary", "fixed"])
+def history(request, tmp_path_factory):
+    rng = np.random.default_rng(0)
+    returns = rng.normal([0.0004, 0.0001, 0.0003, 0.0008], [0.01, 0.003, 0.008, 0.03], (700, 4))
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=pd.bdate_range("2018-01-01", periods=700),
+                          columns=ASSETS)
+    return ReturnHistory.from_price_history(prices, str(tmp_path_factory.mktemp("history")), block_length=15,
+                                            method=request.param)
+
+
+@pytest.mark.parametrize("assets", [["real_estate", "stocks"], ASSETS])
+def test_prefix_sums_match_summing_the_sampled_days(history, assets):
+    years, paths = 3, 40
+    sampled = bootstrap_annual_returns(history, assets, years, paths, np.random.default_rng(9))
+
+    # The same layout expanded day by day, summed directly from the daily returns
+    indices = bootstrap_block_indices(paths, years * history.periods_per_year, len(history), history.block_length,
+                                      history.method, np.random.default_rng(9))
+    daily = np.asarray(history.returns)[indices][:, :, history.positions(assets)]
+    yearly = daily.reshape(paths, years, history.periods_per_year, len(assets)).sum(axis=2)
+    np.testing.assert_allclose(sampled, np.expm1(yearly), rtol=1e-9, atol=1e-12)
+
+
+def test_seeded_values_match_across_worker_counts(history):
+    weights = np.array([[0.5, 0.3, 0.1, 0.1], [0.2, 0.6, 0.2, 0.0]])
+    serial = simulate_bootstrap_horizon_values(1000, weights, history, ASSETS, [0, 2, 5], 300, seed=6, workers=1,
+                                               chunk_size=70)
+    parallel = simulate_bootstrap_horizon_values(1000, weights, history, ASSETS, [0, 2, 5], 300, seed=6, workers=2,
+                                                 chunk_size=70)
+    np.testing.assert_array_equal(serial, parallel)
+    np.testing.assert_array_equal(serial[:, :, 0], 1000)
@@ -0,0 +1,107 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fetcher import fetch_data_concurrent, fetch_with_retries
+from data_providers import HTTPProvider
+
+DATES = pd.bdate_range("2024-01-01", periods=30)
+CSV = pd.DataFrame({"Close": np.arange(len(DATES), dtype=np.float64) + 100}, index=DATES) \
+    .rename_axis("Date").to_csv().encode()
+
+
+class BarServer(ThreadingHTTPServer):
+    """
+    Local stand-in for a bar endpoint: known tickers get CSV bars, 'FLAKY' fails once with a 500,
+    'DOWN' always fails with a 500 and anything else is a 404. Counts connections and requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), BarHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = {}
+
+
+class BarHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps the connection open between requests
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        ticker = urlsplit(self.path).path.strip("/").removesuffix(".csv")
+        with self.server.lock:
+            count = self.server.requests[ticker] = self.server.requests.get(ticker, 0) + 1
+        if ticker in ("A", "B", "C") or (ticker == "FLAKY" and count > 1):
+            self._reply(200, CSV)
+        elif ticker in ("FLAKY", "DOWN"):
+            self._reply(500, b"server error")
+        else:
+            self._reply(404, b"not found")
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = BarServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_http_provider_reuses_one_connection_and_skips_unknown_tickers(server):
+    provider = HTTPProvider(_url(server))
+    frames = provider.fetch(["A", "MISSING", "B"], timeout=5)
+    frames.update(provider.fetch(["C"], timeout=5))
+
+    assert sorted(frames) == ["A", "B", "C"]
+    assert server.connections == 1
+    np.testing.assert_array_equal(frames["C"]["Close"].to_numpy(), np.arange(len(DATES)) + 100.0)
+
+
+def test_server_errors_are_retried_on_the_same_provider(server):
+    provider = HTTPProvider(_url(server))
+    with pytest.raises(IOError):
+        fetch_with_retries(provider, ["FLAKY"], timeout=5, retries=0)
+
+    frames = fetch_with_retries(provider, ["FLAKY"], timeout=5, retries=1, backoff=0)
+    assert list(frames) == ["FLAKY"]
+    assert server.requests["FLAKY"] == 2
+
+
+def test_concurrent_fetch_reports_errors_per_ticker(server):
+    tickers = ["A", "MISSING", "FLAKY", "DOWN", "B"]
+    result = fetch_data_concurrent(tickers, provider=HTTPProvider(_url(server)), max_workers=2, timeout=5,
+                                   retries=1, backoff=0)
+
+    assert list(result["financial_data"].columns.get_level_values(0).unique()) == ["A", "FLAKY", "B"]
+    assert result["errors"] == {
+        "MISSING": "no data returned", "DOWN": "OSError: HTTP 500 for /DOWN.csv?period=5y&interval=1d"
+    }
+    assert server.requests["DOWN"] == 2
+    assert server.connections <= 2
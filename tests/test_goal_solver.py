@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from asset_stats import asset_covariance
+from goal_checker import check_goal_feasibility
+from goal_solver import model_growth_paths, solve_goal, success_probability
+from multi_asset_engine import simulate_allocation_horizon_values
+
+ASSET_ALLOCATION = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
+FINANCIAL_DATA = pd.DataFrame({
+    "ticker": ["stocks", "bonds", "real_estate", "crypto"],
+    "annualized_return": [0.12, 0.04, 0.07, 0.15],
+    "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
+})
+WEIGHTS = np.array([0.5, 0.3, 0.1, 0.1])
+RETURNS = FINANCIAL_DATA["annualized_return"].to_numpy()
+VOLATILITIES = FINANCIAL_DATA["annualized_volatility"].to_numpy()
+
+
+def test_multi_asset_growth_paths_come_from_the_multi_asset_engine():
+    covariance = asset_covariance(FINANCIAL_DATA, ASSET_ALLOCATION.keys())
+    growth_paths = model_growth_paths("multi_asset", WEIGHTS, RETURNS, VOLATILITIES, covariance, num_simulations=400,
+                                      seed=3)
+    expected = simulate_allocation_horizon_values(1.0, WEIGHTS, RETURNS, covariance, np.arange(1, 21), 400, seed=3)
+    np.testing.assert_array_equal(growth_paths(20), expected[:, 0, :])
+
+
+@pytest.mark.parametrize("return_model", ["scalar", "multi_asset"])
+def test_solution_is_the_boundary_of_feasibility_on_its_paths(return_model):
+    covariance = asset_covariance(FINANCIAL_DATA, ASSET_ALLOCATION.keys())
+    growth_paths = model_growth_paths(return_model, WEIGHTS, RETURNS, VOLATILITIES, covariance, num_simulations=1000,
+                                      seed=5)
+    solution = solve_goal(50000, 150000, 10, None, None, seed=5, growth_paths=growth_paths)
+
+    # The timeline was found on the first, 2 x timeline horizon, so these are the paths it was solved on
+    growth = growth_paths(20)
+    assert success_probability(growth, solution["required_investment"], 150000, 10) >= 0.75
+    assert success_probability(growth, solution["required_investment"] - 1, 150000, 10) < 0.75
+    assert success_probability(growth, 50000, solution["achievable_goal_amount"], 10) >= 0.75
+    assert success_probability(growth, 50000, solution["achievable_goal_amount"] + 2, 10) < 0.75
+    years = solution["required_timeline_years"]
+    assert success_probability(growth, 50000, 150000, years) >= 0.75
+    assert success_probability(growth, 50000, 150000, years - 1) < 0.75
+
+
+@pytest.mark.parametrize("return_model", ["scalar", "multi_asset"])
+def test_feasibility_check_solves_on_the_paths_it_counted(return_model):
+    result = check_goal_feasibility(50000, 150000, 10, ASSET_ALLOCATION, FINANCIAL_DATA, seed=2,
+                                    return_model=return_model)
+    covariance = asset_covariance(FINANCIAL_DATA, ASSET_ALLOCATION.keys())
+    growth_paths = model_growth_paths(return_model, WEIGHTS, RETURNS, VOLATILITIES, covariance, seed=2)
+    # Paths out to the timeline replay the check's draws
+    growth = growth_paths(10)
+    assert result["probability_of_success"] == round(success_probability(growth, 50000, 150000, 10) * 100, 2)
+    expected = solve_goal(50000, 150000, 10, None, None, seed=2, growth_paths=growth_paths, growth=growth)
+    assert {key: result[key] for key in expected} == expected
+
+
+def test_advice_never_contradicts_the_verdict_at_the_boundary():
+    # On independent solver paths this reported 74.7% and advised 98,906.99, 5 years or 120,062.47
+    financial_data = pd.DataFrame({
+        "ticker": ["stocks", "bonds"],
+        "annualized_return": [0.10, 0.05],
+        "annualized_volatility": [0.18, 0.05]
+    })
+    result = check_goal_feasibility(100000, 118750, 5, {"stocks": 60, "bonds": 40}, financial_data, seed=6)
+    assert result["probability_of_success"] == 74.7
+    assert result["required_investment"] > 100000
+    assert result["required_timeline_years"] > 5
+    assert result["achievable_goal_amount"] < 118750
+
+
+@pytest.mark.parametrize("options", [
+    {"aggregation": "streaming"},
+    {"adaptive": True, "num_simulations": 500, "max_simulations": 3000},
+    {"sampling": "antithetic"},
+    {"sampling": "control_variate"},
+    {"return_model": "multi_asset"}
+])
+def test_advice_is_consistent_with_the_verdict_in_every_mode(options):
+    allocation = {"stocks": 60, "bonds": 40}
+    for seed in range(3):
+        for goal_amount in np.linspace(120000, 135000, 6):
+            result = check_goal_feasibility(100000, goal_amount, 5, allocation, FINANCIAL_DATA, seed=seed, **options)
+            if result["probability_of_success"] >= 75:
+                continue
+            assert result["required_investment"] is None or result["required_investment"] >= 100000
+            assert result["required_timeline_years"] is None or result["required_timeline_years"] > 5
+            assert result["achievable_goal_amount"] is None or result["achievable_goal_amount"] <= goal_amount
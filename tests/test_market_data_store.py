@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_fetcher import fetch_incremental_financial_data, plan_incremental_requests
+from market_data_store import MarketDataStore
+
+DATES = pd.bdate_range("2020-01-01", "2020-12-31")
+BARS = pd.DataFrame({"Close": np.arange(len(DATES), dtype=np.float64) + 100}, index=DATES)
+
+
+class FrameProvider:
+    """
+    Serves one frame for every ticker and records the requested start dates.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.starts = []
+
+    def fetch(self, tickers, start=None, period="5y", interval="1d", timeout=None):
+        self.starts.append(start)
+        frame = self.frame if start is None else self.frame[self.frame.index >= start]
+        return {ticker: frame for ticker in tickers}
+
+
+@pytest.mark.parametrize("period", ["1y", "6mo"])
+def test_incremental_fetch_replaces_a_partial_last_bar_and_keeps_the_period(tmp_path, period):
+    store = MarketDataStore(str(tmp_path))
+    # The first fetch ran mid-session: its last bar is partial
+    partial = BARS.iloc[:150].copy()
+    partial.iloc[-1, 0] = -1.0
+    fetch_incremental_financial_data(["X"], FrameProvider(partial), store, period=period)
+
+    provider = FrameProvider(BARS)
+    fetch_incremental_financial_data(["X"], provider, store, period=period)
+    stored = store.read("X", period)
+
+    assert provider.starts == [partial.index[-1]]
+    expected = BARS[BARS.index > DATES[-1] - pd.DateOffset(**({"years": 1} if period == "1y" else {"months": 6}))]
+    assert list(stored.index) == list(expected.index)
+    np.testing.assert_array_equal(stored["Close"].to_numpy(), expected["Close"].to_numpy())
+
+
+def test_requests_start_at_the_last_stored_bar(tmp_path):
+    store = MarketDataStore(str(tmp_path))
+    store.write("A", BARS.iloc[:10])
+    store.write("B", BARS.iloc[:10])
+    store.write("C", BARS.iloc[:20])
+    requests = plan_incremental_requests(["A", "B", "C", "D"], store)
+    assert sorted(requests, key=lambda request: str(request[1])) == [
+        (["A", "B"], DATES[9]), (["C"], DATES[19]), (["D"], None)
+    ]
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from multi_asset_engine import simulate_allocation_horizon_values
+from goal_checker_multi import check_multi_goal_feasibility
+
+MEAN_RETURNS = np.array([0.08, 0.04, 0.12])
+COVARIANCE = np.array([[0.04, 0.01, 0.0], [0.01, 0.02, 0.003], [0.0, 0.003, 0.09]])
+WEIGHTS = np.array([[0.5, 0.3, 0.2], [0.2, 0.6, 0.2]])
+
+
+@pytest.mark.parametrize("chunk_size", [None, 333])
+def test_seeded_values_match_across_worker_counts(chunk_size):
+    serial = simulate_allocation_horizon_values(1000, WEIGHTS, MEAN_RETURNS, COVARIANCE, [0, 3, 10], 2000, seed=4,
+                                                chunk_size=chunk_size, workers=1)
+    parallel = simulate_allocation_horizon_values(1000, WEIGHTS, MEAN_RETURNS, COVARIANCE, [0, 3, 10], 2000, seed=4,
+                                                  chunk_size=chunk_size, workers=2)
+    np.testing.assert_array_equal(serial, parallel)
+    np.testing.assert_array_equal(serial[:, :, 0], 1000)
+
+
+def test_allocations_are_evaluated_on_the_same_draws():
+    batched = simulate_allocation_horizon_values(1000, WEIGHTS, MEAN_RETURNS, COVARIANCE, [10], 500, seed=1)
+    single = simulate_allocation_horizon_values(1000, WEIGHTS[1], MEAN_RETURNS, COVARIANCE, [10], 500, seed=1)
+    np.testing.assert_allclose(batched[:, 1], single[:, 0], rtol=1e-12)
+
+
+@pytest.mark.parametrize("shared_paths", [False, True])
+def test_multi_goal_results_match_across_worker_counts(shared_paths):
+    goals = {
+        "House": {"goal_amount": 2000000, "timeline_years": 15, "priority": "high"},
+        "Education": {"goal_amount": 1500000, "timeline_years": 10, "priority": "low"}
+    }
+    asset_allocation = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
+    financial_data = pd.DataFrame({
+        "ticker": ["stocks", "bonds", "real_estate", "crypto"],
+        "annualized_return": [0.12, 0.04, 0.07, 0.15],
+        "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
+    })
+    tax_rates = {"short_term": 0.15, "long_term": 0.1}
+    results = [
+        check_multi_goal_feasibility(1000000, goals, asset_allocation, financial_data, tax_rates, {"stocks": 0.5}, 0.05,
+                                     shared_paths=shared_paths, seed=3, workers=workers, chunk_size=300,
+                                     return_model="multi_asset")
+        for workers in (1, 2)
+    ]
+    assert results[0] == results[1]
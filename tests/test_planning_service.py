@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from asset_stats import AssetStats
+from planning_service import InvalidRequest, PlanningService, _parse_request
+from risk_profiler import ASSET_CLASSES
+
+TICKERS = {"stocks": "^BSESN", "bonds": "GILT5YBEES.NS", "real_estate": "EMBASSY.NS", "crypto": "BTC-INR"}
+REQUEST = {
+    "initial_investment": 1000000,
+    "goals": {"House": {"goal_amount": 2000000, "timeline_years": 15, "priority": "high"},
+              "Education": {"goal_amount": 1000000, "timeline_years": 10, "priority": "low"}},
+    "user": {"age": 35, "income_stability": "stable", "risk_tolerance": "medium"},
+    "seed": 7,
+    "num_simulations": 2000
+}
+OTHER_REQUESTS = [
+    # Same seed, path count and longest horizon, so these share the first request's draws
+    {**REQUEST, "user": {"age": 60, "income_stability": "unstable", "risk_tolerance": "low"},
+     "initial_investment": 250000},
+    {**REQUEST, "asset_allocation": {"stocks": 80, "bonds": 10, "real_estate": 5, "crypto": 5}, "user": None},
+    # Different seeds and horizons form groups of their own
+    {**REQUEST, "seed": 8},
+    {**REQUEST, "seed": None, "goals": {"Car": {"goal_amount": 600000, "timeline_years": 5, "priority": "medium"}}}
+]
+
+
+@pytest.fixture(scope="module")
+def asset_stats():
+    rng = np.random.default_rng(0)
+    drift = np.array([0.0004, 0.0002, 0.0003, 0.0008])
+    volatility = np.array([0.01, 0.003, 0.008, 0.03])
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(drift, volatility, (1500, 4)), axis=0)),
+                          index=pd.bdate_range("2015-01-01", periods=1500), columns=list(TICKERS.values()))
+    return AssetStats.from_price_history(prices)
+
+
+def _serve(asset_stats, payloads, **options):
+    # All payloads are queued within one coalescing window, so they are evaluated as one batch
+    service = PlanningService([], asset_tickers=TICKERS, financial_data=asset_stats, window=0.2, workers=1,
+                              **options)
+    try:
+        futures = [service.submit(payload) for payload in payloads]
+        service.start()
+        results = [future.result(timeout=60) for future in futures]
+    finally:
+        service.stop()
+    return results, service
+
+
+def test_coalesced_results_do_not_depend_on_other_requests(asset_stats):
+    (alone,), _ = _serve(asset_stats, [REQUEST])
+    together, service = _serve(asset_stats, [REQUEST] + OTHER_REQUESTS)
+    assert service.batches == 1
+    assert together[0] == alone
+
+
+def test_request_order_within_a_batch_does_not_matter(asset_stats):
+    forward, _ = _serve(asset_stats, [REQUEST] + OTHER_REQUESTS[:2])
+    backward, _ = _serve(asset_stats, OTHER_REQUESTS[:2][::-1] + [REQUEST])
+    assert forward[0] == backward[-1]
+
+
+def test_large_groups_are_split_within_the_memory_budget(asset_stats, monkeypatch):
+    import planning_service
+
+    calls = []
+    simulate = planning_service.simulate_allocation_horizon_values
+
+    def recording(initial_investment, weights, *args, **kwargs):
+        calls.append((len(weights), kwargs["chunk_size"]))
+        return simulate(initial_investment, weights, *args, **kwargs)
+
+    payloads = [REQUEST] + OTHER_REQUESTS[:2]
+    whole, _ = _serve(asset_stats, payloads)
+    monkeypatch.setattr(planning_service, "simulate_allocation_horizon_values", recording)
+    # Room for the two allocation rows of a single request only
+    split, service = _serve(asset_stats, payloads, max_group_bytes=2 * 2000 * 15 * 8)
+
+    assert service.batches == 1
+    assert len(calls) == 3
+    assert all(rows <= 2 and chunk_size == planning_service.SERVICE_CHUNK_SIZE for rows, chunk_size in calls)
+    assert split == whole
+
+
+def test_parse_request_bounds_the_work_of_a_request():
+    request = _parse_request({**REQUEST, "num_simulations": 10 ** 9,
+                              "goals": {"Far": {"goal_amount": 1, "timeline_years": 500}}}, 1000,
+                             max_simulations=5000, max_years=50)
+    assert request["num_simulations"] == 5000
+    assert request["goals"]["Far"]["timeline_years"] == 50
+    assert list(_parse_request({**REQUEST, "asset_allocation": {"bonds": 100}}, 1000)["asset_allocation"]) == \
+        ASSET_CLASSES
+
+
+@pytest.mark.parametrize("payload", [
+    [],
+    {**REQUEST, "num_simulations": 0},
+    {**REQUEST, "user": None},
+    {**REQUEST, "user": {"age": "old"}},
+    {**REQUEST, "asset_allocation": {"gold": 100}},
+    {**REQUEST, "goals": {"House": {"goal_amount": 1, "timeline_years": 0}}}
+])
+def test_parse_request_rejects_malformed_requests(payload):
+    with pytest.raises(InvalidRequest):
+        _parse_request(payload, 1000)
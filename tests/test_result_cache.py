@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import instrumentation
+from asset_stats import AssetStats
+from goal_checker_multi import check_multi_goal_feasibility
+from result_cache import ResultCache, stable_hash
+
+GOALS = {
+    "House": {"goal_amount": 2000000, "timeline_years": 15, "priority": "high"},
+    "Education": {"goal_amount": 1000000, "timeline_years": 10, "priority": "low"}
+}
+ALLOCATION = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
+TICKERS = {"stocks": "SPY", "bonds": "AGG", "real_estate": "VNQ", "crypto": "BTC"}
+TAX_RATES = {"short_term": 0.15, "long_term": 0.10}
+FEES = {"stocks": 0.5, "bonds": 0.2, "real_estate": 0.3, "crypto": 0.8}
+
+
+def price_panel(periods=600, seed=0):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal([0.0005, 0.0002, 0.0003, 0.0008], [0.01, 0.003, 0.008, 0.03], size=(periods, 4))
+    return pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=pd.bdate_range("2020-01-01", periods=periods),
+                        columns=list(TICKERS.values()))
+
+
+@pytest.fixture
+def counters():
+    metrics = instrumentation.enable()
+    yield lambda: metrics.snapshot()["counters"]
+    instrumentation.disable()
+
+
+def test_key_changes_when_asset_stats_see_new_bars():
+    panel = price_panel()
+    stats = AssetStats.from_price_history(panel.iloc[:400])
+    before = stable_hash("plan", stats, {"b": 1, "a": [1.0, 2]})
+
+    assert stable_hash("plan", stats, {"a": [1.0, 2], "b": 1}) == before
+    assert stable_hash("plan", stats, {"b": 1, "a": [1, 2]}) != before
+    stats.update(panel.iloc[399:])
+    assert stable_hash("plan", stats, {"b": 1, "a": [1.0, 2]}) != before
+
+
+def test_memory_tier_evicts_the_least_recently_used_entry():
+    cache = ResultCache(memory_entries=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    # Reading 'a' makes 'b' the least recently used entry
+    value = cache.get("a")
+    value.append(99)
+    cache.put("c", [3])
+
+    assert cache.get("a") == [1]
+    assert cache.get("b") is None
+    assert cache.get("c") == [3]
+
+
+def test_disk_tier_stays_within_its_byte_budget(tmp_path):
+    payload = b"x" * 1000
+    directory = str(tmp_path)
+    cache = ResultCache(directory, memory_entries=0, max_disk_bytes=2500)
+    cache.put("a", payload)
+    cache.put("b", payload)
+    # Age both files, then touch 'a' through a disk hit so 'b' is the oldest
+    os.utime(os.path.join(directory, "a.pkl"), (1, 1))
+    os.utime(os.path.join(directory, "b.pkl"), (2, 2))
+    assert ResultCache(directory, memory_entries=0).get("a") == payload
+    cache.put("c", payload)
+
+    assert sorted(os.listdir(directory)) == ["a.pkl", "c.pkl"]
+    assert sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)) <= 2500
+    assert cache.get("b") is None
+    assert cache.get("c") == payload
+
+
+def test_cached_feasibility_results_are_identical_to_fresh_runs(tmp_path, counters):
+    stats = AssetStats.from_price_history(price_panel()).for_assets(TICKERS)
+    arguments = (1000000, GOALS, ALLOCATION, stats, TAX_RATES, FEES, 0.05)
+    options = {"seed": 5, "num_simulations": 500}
+    fresh = check_multi_goal_feasibility(*arguments, **options)
+
+    cache = ResultCache(str(tmp_path))
+    computed = check_multi_goal_feasibility(*arguments, cache=cache, **options)
+    in_memory = check_multi_goal_feasibility(*arguments, cache=cache, **options)
+    on_disk = check_multi_goal_feasibility(*arguments, cache=ResultCache(str(tmp_path)), **options)
+
+    assert counters()["result_cache_misses"] == 1
+    assert counters()["result_cache_hits"] == 2
+    assert computed == fresh
+    assert in_memory == fresh
+    assert on_disk == fresh
+    # A different seed is a different key
+    check_multi_goal_feasibility(*arguments, cache=cache, seed=6, num_simulations=500)
+    assert counters()["result_cache_misses"] == 2
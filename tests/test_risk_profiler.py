@@ -0,0 +1,28 @@
+import itertools
+
+import pandas as pd
+import pytest
+
+from risk_profiler import (ASSET_CLASSES, STABILITY_FACTORS, TOLERANCE_FACTORS, risk_profile, dynamic_allocation,
+                           evaluate_clients)
+
+
+@pytest.fixture
+def users():
+    # Every combination of the categorical inputs, including unknown values, over a range of ages
+    rows = itertools.product(range(18, 101, 7), list(STABILITY_FACTORS) + ["unknown"],
+                             list(TOLERANCE_FACTORS) + ["unknown"])
+    return pd.DataFrame(list(rows), columns=["age", "income_stability", "risk_tolerance"])
+
+
+@pytest.mark.parametrize("sentiment_score", [0.05, -0.05])
+def test_batch_evaluation_matches_the_scalar_functions(users, sentiment_score):
+    sentiment_data = pd.DataFrame({"ticker": ["NSEI"], "sentiment_score": [sentiment_score]})
+    risk_scores, allocations = evaluate_clients(users, sentiment_data, None)
+
+    # Plain Python values, as a single client would pass them
+    for user, risk_score, allocation in zip(users.to_dict("records"), risk_scores, allocations):
+        expected_score = risk_profile(user["age"], user["income_stability"], user["risk_tolerance"])
+        assert risk_score == expected_score
+        expected_allocation = dynamic_allocation(expected_score, sentiment_data, None)
+        assert dict(zip(ASSET_CLASSES, allocation.tolist())) == expected_allocation
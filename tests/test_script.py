@@ -0,0 +1,27 @@
+import pytest
+
+from benchmark import ASSET_CLASS_TICKERS, ASSET_TICKERS, write_replay_files
+from asset_stats import AssetStats
+from data_providers import ReplayProvider
+from market_data_store import MarketDataStore
+from script import load_market_data
+
+
+def test_replayed_crypto_calendar_leaves_the_equity_statistics_alone(tmp_path):
+    (tmp_path / "bars").mkdir()
+    write_replay_files(str(tmp_path / "bars"), ASSET_TICKERS)
+    store = MarketDataStore(str(tmp_path / "store"))
+    panel, _ = load_market_data(ASSET_TICKERS, store, provider=ReplayProvider(str(tmp_path / "bars")))
+    crypto = ASSET_CLASS_TICKERS["crypto"]
+    weekday_tickers = [ticker for ticker in ASSET_TICKERS if ticker != crypto]
+
+    stats = AssetStats.from_price_history(panel)
+    without_crypto = AssetStats.from_price_history(store.read_panel(weekday_tickers))
+
+    # The daily crypto bars add weekend rows to the joined panel
+    assert len(panel) > len(store.read_panel(weekday_tickers))
+    for ticker in weekday_tickers:
+        assert stats[ticker] == pytest.approx(without_crypto[ticker], rel=1e-12)
+    assert stats.periods_per_year[stats.index[crypto]] == 365
+    view = stats.for_assets(ASSET_CLASS_TICKERS)
+    assert view["stocks"] == pytest.approx(without_crypto[ASSET_CLASS_TICKERS["stocks"]], rel=1e-12)
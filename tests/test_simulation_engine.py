@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from simulation_engine import (simulate_horizon_values, simulate_terminal_values, adaptive_horizon_values,
+                               adaptive_batch_values, seed_snapshot)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 97])
+def test_seeded_horizon_values_match_across_worker_counts(chunk_size):
+    serial = simulate_horizon_values(1000, 0.08, 0.15, [1, 5, 10], 500, seed=7, workers=1, chunk_size=chunk_size)
+    parallel = simulate_horizon_values(1000, 0.08, 0.15, [1, 5, 10], 500, seed=7, workers=2, chunk_size=chunk_size)
+    np.testing.assert_array_equal(serial, parallel)
+
+
+def test_terminal_values_read_the_horizon_values():
+    terminal = simulate_terminal_values(1000, 0.08, 0.15, 10, 300, seed=3, chunk_size=64)
+    horizons = simulate_horizon_values(1000, 0.08, 0.15, [10], 300, seed=3, chunk_size=64)
+    np.testing.assert_array_equal(terminal, horizons[:, 0])
+
+
+def test_different_seeds_give_different_paths():
+    first = simulate_horizon_values(1000, 0.08, 0.15, [10], 200, seed=1)
+    second = simulate_horizon_values(1000, 0.08, 0.15, [10], 200, seed=2)
+    assert not np.array_equal(first, second)
+
+
+def test_zero_year_horizon_keeps_the_investment():
+    values = simulate_horizon_values(1000, 0.08, 0.15, [0, 3], 50, seed=0)
+    np.testing.assert_array_equal(values[:, 0], 1000)
+
+
+def test_adaptive_batches_match_across_worker_counts_and_share_one_pool(monkeypatch):
+    import concurrent.futures
+
+    started = []
+
+    class CountingPool(concurrent.futures.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            started.append(1)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", CountingPool)
+    # A goal near the 75% cut needs several batches before the interval settles
+    results = [adaptive_horizon_values(1000, 0.07, 0.15, [10], [1350], batch_size=1000, max_simulations=20000,
+                                       tolerance=0.005, seed=5, workers=workers, chunk_size=250)
+               for workers in (1, 2)]
+    (serial, serial_diagnostics), (parallel, parallel_diagnostics) = results
+    assert serial_diagnostics == parallel_diagnostics
+    assert serial_diagnostics["paths_used"] > 1000
+    assert serial[0].success.successes == parallel[0].success.successes
+    assert serial[0].summary() == parallel[0].summary()
+    assert len(started) == 1
+
+
+def test_adaptive_stops_at_the_simulation_cap():
+    # A goal at the median sits on a 50% cut, so the interval never settles on either side
+    median = np.median(simulate_horizon_values(1000, 0.07, 0.15, [10], 100000, seed=0))
+    _, diagnostics = adaptive_horizon_values(1000, 0.07, 0.15, [10], [median], batch_size=300, max_simulations=1000,
+                                             threshold=0.5, tolerance=0.0001, seed=1)
+    assert diagnostics["paths_used"] == 1000
+
+
+@pytest.mark.parametrize("seed", [11, None])
+def test_adaptive_batch_values_replay_the_paths_of_an_adaptive_run(seed):
+    seed = seed_snapshot(seed)
+    replay_seed = seed_snapshot(seed)
+    summaries, diagnostics = adaptive_horizon_values(1000.0, 0.07, 0.15, [8], [1700.0], batch_size=300,
+                                                     max_simulations=1500, threshold=0.5, seed=seed, chunk_size=128)
+    values = adaptive_batch_values(1.0, 0.07, 0.15, np.arange(1, 9), diagnostics["paths_used"], batch_size=300,
+                                   seed=replay_seed, chunk_size=128)
+
+    assert values.shape == (diagnostics["paths_used"], 8)
+    assert np.count_nonzero(values[:, 7] * 1000.0 >= 1700.0) == summaries[0].success.successes
+
+
+def test_longer_horizons_keep_the_draws_of_the_longest_one():
+    values = simulate_horizon_values(1.0, 0.07, 0.15, [6], 500, seed=4)
+    every_year = simulate_horizon_values(1.0, 0.07, 0.15, np.arange(1, 7), 500, seed=4)
+    np.testing.assert_array_equal(every_year[:, -1], values[:, 0])
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from sip_engine import LONG_TERM_MONTHS, _simulate_sip_chunk, contribution_schedule, simulate_sip
+
+TAX_RATES = {"short_term": 0.15, "long_term": 0.10}
+
+
+def brute_force_sip(annual_return, annual_volatility, contributions, horizon_months, rows, tax_rates, seed):
+    # Reference: every lot valued and taxed on its own, one path and one horizon at a time
+    rng = np.random.default_rng(np.random.SeedSequence(seed))
+    draws = rng.standard_normal((rows, contributions.size))
+    values = np.zeros((rows, len(horizon_months)))
+    taxes = np.zeros((rows, len(horizon_months)))
+    losing_lots = 0
+    for row in range(rows):
+        prices = []
+        price = 1.0
+        for month in range(contributions.size):
+            price *= 1 + annual_return / 12 + annual_volatility / np.sqrt(12) * draws[row, month]
+            prices.append(price)
+        for column, horizon in enumerate(horizon_months):
+            gains = {"short_term": 0.0, "long_term": 0.0}
+            for lot in range(horizon):
+                bought_at = 1.0 if lot == 0 else prices[lot - 1]
+                units = contributions[lot] / bought_at
+                value = units * prices[horizon - 1]
+                values[row, column] += value
+                holding = "long_term" if horizon - lot >= LONG_TERM_MONTHS else "short_term"
+                gains[holding] += value - contributions[lot]
+                losing_lots += value < contributions[lot]
+            taxes[row, column] = sum(max(gain, 0.0) * tax_rates[holding] for holding, gain in gains.items())
+    return values, taxes, losing_lots
+
+
+def test_chunk_matches_a_per_lot_loop():
+    # Horizons straddle the 12-month boundary; the step-up and a weak, volatile market add losing lots
+    horizon_months = np.array([0, 11, 12, 13, 24, 30])
+    contributions = contribution_schedule(30, 1000.0, initial_investment=5000.0, annual_step_up=0.1)
+    rows, seed = 64, 11
+    task = (-0.02, 0.35, contributions, horizon_months, rows, TAX_RATES, np.random.SeedSequence(seed))
+
+    values, taxes = _simulate_sip_chunk(task)
+    expected_values, expected_taxes, losing_lots = brute_force_sip(
+        -0.02, 0.35, contributions, horizon_months, rows, TAX_RATES, seed
+    )
+
+    assert losing_lots > 0
+    assert (expected_taxes[:, 1:] > 0).any() and (expected_taxes[:, 1:] == 0).any()
+    np.testing.assert_allclose(values, expected_values, rtol=1e-14, atol=0)
+    np.testing.assert_allclose(taxes, expected_taxes, rtol=1e-12, atol=1e-9)
+
+
+@pytest.mark.parametrize("chunk_size", [50, 128])
+def test_seeded_runs_are_identical_for_any_worker_count(chunk_size):
+    options = dict(initial_investment=2000.0, annual_step_up=0.05, num_simulations=300, seed=3,
+                   chunk_size=chunk_size)
+    single = simulate_sip(500.0, 0.09, 0.2, [1, 2.5, 5], TAX_RATES, workers=1, **options)
+    parallel = simulate_sip(500.0, 0.09, 0.2, [1, 2.5, 5], TAX_RATES, workers=2, **options)
+    for key in ("value", "tax", "net_value", "invested"):
+        np.testing.assert_array_equal(single[key], parallel[key])
@@ -0,0 +1,103 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tax_adjustment import apply_net_costs, net_cost_factors, net_projections, sweep_net_costs
+from goal_checker_multi import check_multi_goal_feasibility, sensitivity_sweep
+
+TAX_SCENARIOS = [{"short_term": short, "long_term": long} for short in (0.15, 0.3) for long in (0.0, 0.1, 0.2)]
+FEE_SCENARIOS = [{"stocks": 0.0}, {"stocks": 0.5, "bonds": 0.2}, {"stocks": 2.0}, {"stocks": 50.0}, {"rebate": -5.0}]
+INFLATION_SCENARIOS = [0.0, 0.03, 0.06]
+
+
+def list_net_projections(projections, tax_rates, fees, inflation_rate, holding_period):
+    # The original per-element formulas: apply_taxes_and_fees, then adjust_for_inflation
+    tax_rate = tax_rates['long_term'] if holding_period >= 1 else tax_rates['short_term']
+    adjusted_projections = []
+    for value in projections:
+        after_fees = value * (1 - sum(fees.values()) / 100)
+        taxable_gain = max(0, after_fees - value)
+        adjusted_projections.append(after_fees - (taxable_gain * tax_rate))
+    return [p / ((1 + inflation_rate) ** holding_period) for p in adjusted_projections]
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("fees", FEE_SCENARIOS)
+@pytest.mark.parametrize("horizon", [0, 10])
+def test_net_costs_equal_the_list_formulas(dtype, fees, horizon):
+    # Losses and gains, so fees (and the rebate) raise some values into a taxable gain
+    projections = (np.random.default_rng(horizon).lognormal(0.5, 0.6, 257) * 1e6 - 2e6).astype(dtype)
+    tax_rates, inflation_rate = TAX_SCENARIOS[4], 0.06
+    expected = np.array(list_net_projections(list(projections), tax_rates, fees, inflation_rate, horizon), dtype=dtype)
+
+    factors = net_cost_factors(tax_rates, fees, inflation_rate, horizon)
+    net_values = apply_net_costs(projections, factors)
+    assert net_values.dtype == dtype
+    np.testing.assert_array_equal(net_values, expected)
+    np.testing.assert_array_equal(net_projections(projections, tax_rates, fees, inflation_rate, horizon), expected)
+
+    # In place: the input buffer itself holds the result
+    buffer = projections.copy()
+    assert apply_net_costs(buffer, factors, out=buffer) is buffer
+    np.testing.assert_array_equal(buffer, expected)
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_net_costs_per_horizon_column_equal_the_list_formulas(dtype):
+    horizons = [0, 1, 5, 10]
+    projections = (np.random.default_rng(3).normal(0, 1e6, (100, len(horizons)))).astype(dtype)
+    fees = FEE_SCENARIOS[1]
+    out = np.empty_like(projections)
+    net_values = net_projections(projections, TAX_SCENARIOS[1], fees, 0.03, horizons, out=out)
+
+    assert net_values is out
+    for column, horizon in enumerate(horizons):
+        expected = list_net_projections(list(projections[:, column]), TAX_SCENARIOS[1], fees, 0.03, horizon)
+        np.testing.assert_array_equal(net_values[:, column], np.array(expected, dtype=dtype))
+
+
+@pytest.mark.parametrize("count", [1, 2, 7, 1000, 1001])
+@pytest.mark.parametrize("horizon", [0, 10])
+def test_sweep_matches_the_exact_computation(count, horizon):
+    # Some projections are losses, so both sides of the tax-on-gains branch are covered
+    projections = np.random.default_rng(count).lognormal(0.5, 0.6, count) * 1e6 - 2e5
+    goal_amount = 1.5e6
+    sweep = sweep_net_costs(projections, goal_amount, horizon, TAX_SCENARIOS, FEE_SCENARIOS, INFLATION_SCENARIOS)
+
+    scenarios = itertools.product(enumerate(TAX_SCENARIOS), enumerate(FEE_SCENARIOS), enumerate(INFLATION_SCENARIOS))
+    for (i, tax_rates), (j, fees), (k, inflation_rate) in scenarios:
+        net_values = net_projections(projections, tax_rates, fees, inflation_rate, horizon)
+        assert sweep["success_probability"][i, j, k] == np.count_nonzero(net_values >= goal_amount) / count * 100
+        assert sweep["median_projection"][i, j, k] == np.median(net_values)
+        assert sweep["percentile_25"][i, j, k] == np.percentile(net_values, 25)
+        assert sweep["percentile_75"][i, j, k] == np.percentile(net_values, 75)
+
+
+def test_sweep_rejects_fees_that_reverse_the_order():
+    with pytest.raises(ValueError):
+        sweep_net_costs(np.arange(10.0), 5.0, 10, TAX_SCENARIOS[0], {"stocks": 150.0}, 0.05)
+
+
+def test_sensitivity_sweep_points_equal_seeded_feasibility_runs():
+    goals = {
+        "House": {"goal_amount": 2000000, "timeline_years": 15, "priority": "high"},
+        "Education": {"goal_amount": 1000000, "timeline_years": 10, "priority": "low"}
+    }
+    asset_allocation = {"stocks": 50, "bonds": 30, "real_estate": 10, "crypto": 10}
+    financial_data = pd.DataFrame({
+        "ticker": ["stocks", "bonds", "real_estate", "crypto"],
+        "annualized_return": [0.12, 0.04, 0.07, 0.15],
+        "annualized_volatility": [0.18, 0.05, 0.12, 0.25]
+    })
+    sweep = sensitivity_sweep(1000000, goals, asset_allocation, financial_data, TAX_SCENARIOS[:2], FEE_SCENARIOS[:2],
+                              INFLATION_SCENARIOS, seed=11, num_simulations=500)
+
+    for row in sweep.itertuples():
+        results = check_multi_goal_feasibility(1000000, goals, asset_allocation, financial_data,
+                                               TAX_SCENARIOS[row.tax_scenario], FEE_SCENARIOS[row.fee_scenario],
+                                               row.inflation_rate, seed=11, num_simulations=500)
+        result = results[row.goal]
+        assert row.success_probability == pytest.approx(result["success_probability"], abs=0.01)
+        assert row.median_projection == pytest.approx(result["median_projection"], abs=0.01)